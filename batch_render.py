@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+批量渲染：不打开界面，把项目文件（.rbp）或纯文本（.txt）直接导出为图片
+
+与界面共用换行结果的磁盘缓存，界面中生成过的文本在这里不需要重新测量，反之亦然。
+
+用法:
+    python batch_render.py 草稿1.rbp 草稿2.txt -o 输出目录 [--profile large] [--format jpeg] [--backend qt]
+
+纯文本文件：第一行作为标题，其余内容按空行分为内容块。
+项目文件：使用项目中保存的文本块、背景、字体、输出尺寸和导出格式，命令行参数优先。
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from core.image_generator import ImageGenerator
+from core.exporter import ImageEncoder, ExportSettings, EXPORT_FORMATS
+from core.output_profiles import OUTPUT_PROFILES, get_profile
+from core.render_backends import RENDER_BACKENDS
+from core.project_file import ProjectFile
+
+
+def load_backgrounds(config_path=os.path.join('resources', 'config.json')):
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('backgrounds', [])
+
+
+def load_text_file(path):
+    """读取纯文本：第一行为标题，其余按空行分块"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().replace('\r\n', '\n').split('\n')
+
+    blocks = []
+    title = lines[0].strip() if lines else ''
+    if title:
+        blocks.append({'type': 'title', 'text': title, 'font_size': 50, 'line_spacing': 45})
+
+    for paragraph in '\n'.join(lines[1:]).split('\n\n'):
+        if paragraph.strip():
+            blocks.append({'type': 'content', 'text': paragraph.strip('\n'), 'font_size': 36, 'line_spacing': 45})
+    return blocks, {}
+
+
+def load_project(path):
+    """读取项目文件的文本块和样式"""
+    _, state = ProjectFile.load(path)
+    blocks = [dict(block, block_id=None) for block in state['blocks'] if block['text'].strip()]
+    return blocks, state.get('style', {})
+
+
+def render_file(generator, path, output_dir, backgrounds, args):
+    if path.endswith('.rbp'):
+        blocks, style = load_project(path)
+    else:
+        blocks, style = load_text_file(path)
+
+    background_value = args.background or style.get('background') or 'lightgray'
+    background = next((bg for bg in backgrounds if bg['value'] == background_value), None)
+    font_style = args.font_style or style.get('font_style', 'normal')
+    profile = get_profile(args.profile or style.get('output_profile'))
+
+    settings = ExportSettings.from_dict(style.get('export'))
+    if args.format:
+        settings.format = args.format
+    if args.quality:
+        settings.quality = args.quality
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    folder = os.path.join(output_dir, name)
+    os.makedirs(folder, exist_ok=True)
+
+    start = time.perf_counter()
+    page_plan = generator.paginate(blocks, font_style)
+    layout_time = time.perf_counter() - start
+
+    encoder = ImageEncoder()
+    for i, page in enumerate(page_plan):
+        image = generator.render_page(page, background, font_style, profile)
+        encoder.save(image, os.path.join(folder, f"{name}_{i + 1}{settings.extension}"), settings)
+
+    print(f"{path}: {len(page_plan)} 页 -> {folder}（分页 {layout_time * 1000:.0f} ms）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量把项目文件或纯文本渲染为图片')
+    parser.add_argument('inputs', nargs='+', help='.rbp 项目文件或 .txt 文本文件')
+    parser.add_argument('-o', '--output', default='batch_output', help='输出目录')
+    parser.add_argument('--profile', choices=list(OUTPUT_PROFILES), help='输出尺寸')
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), help='导出格式')
+    parser.add_argument('--quality', type=int, help='有损格式的质量')
+    parser.add_argument('--background', help='背景名称（config.json 中的 value）')
+    parser.add_argument('--font-style', choices=['normal', 'handwritten'], help='字体样式')
+    parser.add_argument('--no-cache', action='store_true', help='不使用换行结果的磁盘缓存')
+    parser.add_argument('--backend', choices=list(RENDER_BACKENDS), help='渲染后端（默认 pil）')
+    args = parser.parse_args()
+
+    generator = ImageGenerator(use_layout_cache=not args.no_cache, render_backend=args.backend)
+    backgrounds = load_backgrounds()
+
+    failed = 0
+    for path in args.inputs:
+        try:
+            render_file(generator, path, args.output, backgrounds, args)
+        except Exception as e:
+            failed += 1
+            print(f"{path}: 渲染失败 - {str(e)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
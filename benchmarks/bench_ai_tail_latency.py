@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+AI 润色长尾耗时测试：在注入故障的本地模拟服务器上对比不重试、重试、重试 + 对冲请求
+
+用法:
+    python benchmarks/bench_ai_tail_latency.py [--requests 200] [--slow-rate 0.05] [--error-rate 0.05]
+
+模拟服务器按比例返回 500/503/429、断开连接或额外延迟（见 tools/fake_ai_server.py），
+每种配置使用同样的随机种子，输出成功率、p50/p95/p99 耗时和请求结果统计。
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.ai_helper import AIHelper
+from tools.fake_ai_server import FakeAIServer
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))]
+
+
+async def run_case(name, args, **helper_options):
+    server = FakeAIServer(delay=args.delay, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                          drop_rate=args.drop_rate, slow_rate=args.slow_rate, slow_delay=args.slow_delay,
+                          seed=args.seed)
+    await server.start()
+    helper = AIHelper(api_key='bench', api_url=server.url, use_cache=False, max_concurrency=args.concurrency,
+                      backoff_base=0.05, backoff_max=0.5, deadline=args.deadline, **helper_options)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    failures = 0
+
+    async def one(i):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await helper.call_api(f"第 {i} 段")
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                failures += 1
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await helper.close()
+        await server.stop()
+
+    print(f"\n== {name} ==")
+    print(f"成功 {len(latencies)}/{args.requests}，总耗时 {elapsed:.2f} s，服务器收到 {server.requests} 个请求，"
+          f"注入故障 {dict(server.faults)}")
+    if latencies:
+        print("端到端耗时: " + ", ".join(f"p{int(f * 100)} {percentile(latencies, f) * 1000:.0f} ms"
+                                          for f in (0.5, 0.95, 0.99)))
+    print(helper.stats.format_report())
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AI 润色长尾耗时测试')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--delay', type=float, default=0.05, help='正常请求的响应延迟（秒）')
+    parser.add_argument('--slow-rate', type=float, default=0.05)
+    parser.add_argument('--slow-delay', type=float, default=1.0)
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.02)
+    parser.add_argument('--drop-rate', type=float, default=0.02)
+    parser.add_argument('--deadline', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(run_case("不重试", args, max_retries=0))
+    asyncio.run(run_case("重试", args))
+    failures = asyncio.run(run_case("重试 + p90 对冲请求", args, hedge_percentile=0.9, hedge_min_samples=20))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
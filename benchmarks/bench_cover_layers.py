@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+封面渲染性能测试：对比每次整页重绘与分层缓存
+
+用法:
+    python benchmarks/bench_cover_layers.py [--repeat 30] [--profile large]
+
+模拟在封面编辑中连续调整椭圆大小（每次样式标记都不同），分别计时:
+    - 整页重绘：背景、文字、装饰、Logo 全部重新绘制（分层之前的做法）
+    - 分层缓存：只重新绘制装饰层，再合成
+同时检查两种方式的输出像素完全一致。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import ImageChops, ImageDraw
+
+from core.image_generator import ImageGenerator
+from core.output_profiles import OUTPUT_PROFILES, get_profile
+
+TEXT = '封面标题示例😀\n这是一段比较长的封面文字，用来测试分层渲染在调整装饰时的速度'
+
+
+def make_content(size):
+    return {
+        'text': TEXT, 'font_size': 60, 'font_bold': False, 'char_spacing': 4, 'line_spacing': 30,
+        'marks': {
+            (0, 3): {'type': 'ellipse', 'color': '#ff0000', 'size': size, 'width': 3, 'position': 0},
+            (9, 20): {'type': 'underline', 'color': '#0000ff', 'width': 4, 'offset': 5}
+        }
+    }
+
+
+def legacy_cover(generator, content, background, profile):
+    """分层之前的做法：每次都从背景开始整页绘制"""
+    profile = get_profile(profile)
+    _, font, layout = generator.get_cover_layout(content)
+    image = generator.create_page_image(background, profile)
+    generator.draw_styled_text(ImageDraw.Draw(image), content['text'], content['marks'], 0, 0, font,
+                               content['char_spacing'], content['line_spacing'], profile.scale, layout)
+    images = [image]
+    generator.logo_processor.add_logo(images)
+    return images[0]
+
+
+def run(name, render, repeat):
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for i in range(repeat):
+            render(make_content(8 + i % 20))
+        best = min(best, time.perf_counter() - start)
+    per_call = best / repeat * 1000
+    print(f"{name}: {per_call:.1f} ms/次")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description='封面分层渲染性能测试')
+    parser.add_argument('--repeat', type=int, default=30, help='每轮调整椭圆的次数')
+    parser.add_argument('--profile', choices=list(OUTPUT_PROFILES), default=None, help='输出尺寸')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    with open(os.path.join('resources', 'config.json'), 'r', encoding='utf-8') as f:
+        background = json.load(f)['backgrounds'][0]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = ImageGenerator(use_layout_cache=False)
+        legacy_cover(generator, make_content(8), background, args.profile)
+
+    ok = True
+    for size in (8, 15, 27):
+        expected = legacy_cover(generator, make_content(size), background, args.profile)
+        actual = generator.create_cover_image(make_content(size), background, args.profile)
+        ok &= ImageChops.difference(expected, actual).getbbox() is None
+    print(f"输出一致: {ok}")
+
+    legacy = run("整页重绘", lambda c: legacy_cover(generator, c, background, args.profile), args.repeat)
+    generator.cover_renderer.builds.clear()
+    layered = run("分层缓存", lambda c: generator.create_cover_image(c, background, args.profile), args.repeat)
+    print(f"加速 {legacy / layered:.1f}x，各层绘制次数 {dict(generator.cover_renderer.builds)}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+分页性能测试：对比逐块 pop(0)、每次分割都复制剩余行的旧算法与当前的线性分页
+
+用法:
+    python benchmarks/bench_pagination.py [--blocks 5000] [--long-lines 20000]
+
+两个场景:
+    - 多个内容块：默认 5000 个长短不一的段落
+    - 单个超长内容块：需要被强制分割成很多页
+换行结果先预热到内存缓存中，计时只包含分页本身；同时检查两种算法的分页结果完全一致。
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.image_generator import ImageGenerator
+
+
+def legacy_paginate(generator, text_content, font_style='normal'):
+    """旧的分页算法（去掉日志），用于对比"""
+    current_font = generator.fonts[font_style]
+    pages = []
+    remaining_content = text_content.copy()
+
+    while remaining_content:
+        current_page_content = []
+        current_y = generator.margin
+        while remaining_content:
+            item = remaining_content[0]
+            if 'wrapped_lines' in item:
+                wrapped_lines = item['wrapped_lines']
+            else:
+                wrapped_lines = generator.get_block_lines(item, current_font, font_style)
+            block_height = generator.calculate_block_height(wrapped_lines, item)
+
+            if current_y + block_height > generator.height - generator.margin:
+                if not current_page_content:
+                    remaining_height = generator.height - current_y - generator.margin
+                    line_spacing = item.get('line_spacing', 45)
+                    max_lines = 0
+                    for line in wrapped_lines:
+                        line_height = line_spacing // 2 if not line.strip() else line_spacing
+                        if remaining_height >= line_height:
+                            max_lines += 1
+                            remaining_height -= line_height
+                        else:
+                            break
+                    if max_lines > 0:
+                        current_item = dict(item)
+                        current_item['wrapped_lines'] = wrapped_lines[:max_lines]
+                        remaining_item = dict(item)
+                        remaining_item['wrapped_lines'] = wrapped_lines[max_lines:]
+                        current_page_content.append(current_item)
+                        remaining_content[0] = remaining_item
+                    else:
+                        remaining_content.pop(0)
+                break
+
+            processed_item = dict(item)
+            processed_item['wrapped_lines'] = wrapped_lines
+            current_page_content.append(processed_item)
+            current_y += block_height
+            remaining_content.pop(0)
+
+        if current_page_content:
+            pages.append(current_page_content)
+    return pages
+
+
+def make_blocks(count, seed=1):
+    """生成 count 个长短不一的内容块，每隔一段插入一个标题"""
+    random.seed(seed)
+    words = ['今天', '分享', '一个', '小技巧', '效率', '提升', '记录', '生活', 'Python', '排版', '\n']
+    blocks = []
+    for i in range(count):
+        if i % 50 == 0:
+            blocks.append({'block_id': i, 'version': 1, 'type': 'title',
+                           'text': f'第 {i // 50 + 1} 章', 'font_size': 50, 'line_spacing': 45})
+        else:
+            text = ''.join(random.choice(words) for _ in range(random.randint(5, 120)))
+            blocks.append({'block_id': i, 'version': 1, 'type': 'content',
+                           'text': text, 'font_size': 36, 'line_spacing': 45})
+    return blocks
+
+
+def make_long_block(line_count):
+    """一个需要强制分割成很多页的超长内容块（预先换好行）"""
+    lines = [('第 %d 行' % i) if i % 7 else '' for i in range(line_count)]
+    return [{'type': 'content', 'text': '\n'.join(lines), 'font_size': 36,
+             'line_spacing': 45, 'wrapped_lines': lines}]
+
+
+def plan_signature(page_plan):
+    return [[(item['type'], item['text'], list(item['wrapped_lines'])) for item in page] for page in page_plan]
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_case(name, generator, blocks, repeat):
+    legacy_time, legacy_plan = best_of(lambda: legacy_paginate(generator, blocks), repeat)
+    linear_time, linear_plan = best_of(lambda: generator.paginate(blocks), repeat)
+    same = plan_signature(legacy_plan) == plan_signature(linear_plan)
+    print(f"{name}: {len(linear_plan)} 页 | 旧算法 {legacy_time * 1000:8.1f} ms | "
+          f"线性分页 {linear_time * 1000:8.1f} ms | 加速 {legacy_time / max(linear_time, 1e-9):5.1f}x | "
+          f"结果一致: {'是' if same else '否'}")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分页性能测试')
+    parser.add_argument('--blocks', type=int, default=5000, help='内容块数量')
+    parser.add_argument('--long-lines', type=int, default=20000, help='超长内容块的行数')
+    parser.add_argument('--repeat', type=int, default=3, help='每个场景重复次数（取最好成绩）')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    generator = ImageGenerator(use_layout_cache=False)
+
+    blocks = make_blocks(args.blocks)
+    start = time.perf_counter()
+    generator.paginate(blocks)
+    print(f"预热换行缓存: {args.blocks} 个内容块，{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    ok = True
+    for count in sorted({args.blocks // 4, args.blocks // 2, args.blocks}):
+        ok &= run_case(f"{count:6d} 个内容块", generator, blocks[:count], args.repeat)
+    ok &= run_case(f"{args.long_lines:6d} 行单块", generator, make_long_block(args.long_lines), args.repeat)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+渲染后端对比：PIL（逐字符 ImageDraw）与 Qt（QPainter 在 QImage 上按段绘制 QGlyphRun）
+
+用法:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_render_backends.py [--pages 20] [--profile large]
+        [--font resources/fonts/xxx.ttf]
+
+对同一份分页方案分别计时:
+    - 光栅化：render_page_native，两种后端各自的原生图片
+    - 显示：转换为 QPixmap 的耗时（PIL 需要先转换像素，QImage 直接使用）
+并检查视觉一致性：在文字像素（任一后端输出中与空白页明显不同的像素）范围内，
+差异明显（>64）的像素比例不超过阈值。页面大部分是相同的背景，所以不按整页平均。
+Qt 无法加载正文字体、改用默认字体时，两者比较的是不同的字体，直接判为未通过。
+标题和正文都包含 emoji，emoji 的绘制也在检查范围内（彩色 emoji 字体用 drawText 绘制，只有装了这种字体时才会检查到）。
+没有界面字体时可用 --font 指定一个 TrueType 字体作为正文字体。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import ImageFont
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QPixmap
+
+from core.image_generator import ImageGenerator
+from core.output_profiles import OUTPUT_PROFILES, get_profile
+from ui.qt_image import pil_to_qpixmap
+
+PARAGRAPH = '这是一段用于测试渲染速度的正文内容😀，包含中文、English words、数字 12345、emoji 🎉✨ 和标点符号。'
+
+
+def make_blocks(pages):
+    blocks = []
+    for i in range(pages):
+        blocks.append({'type': 'title', 'text': f'第 {i + 1} 章 渲染测试 🚀', 'font_size': 50, 'line_spacing': 45})
+        for _ in range(6):
+            blocks.append({'type': 'content', 'text': PARAGRAPH * 3, 'font_size': 36, 'line_spacing': 45})
+    return blocks
+
+
+def best_time(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def compare(pil_images, qt_images, blank, generator):
+    """
+    参数:
+        blank (PIL.Image): 没有文字的页面（背景和 Logo），用于找出文字像素
+
+    返回:
+        tuple: (文字像素内的平均像素差, 文字像素内差异明显的像素比例, 文字像素数)
+    """
+    base = np.asarray(blank, dtype=np.int16)
+    total_diff = 0.0
+    strong = 0
+    text_pixels = 0
+    for pil_image, qt_image in zip(pil_images, qt_images):
+        a = np.asarray(pil_image, dtype=np.int16)
+        b = np.asarray(generator.get_backend('qt').to_pil(qt_image), dtype=np.int16)
+        text = (np.abs(a - base).max(axis=2) > 32) | (np.abs(b - base).max(axis=2) > 32)
+        diff = np.abs(a - b).max(axis=2)
+        total_diff += diff[text].sum()
+        strong += int((diff > 64).sum())  # 文字像素以外的明显差异也计入
+        text_pixels += int(text.sum())
+    text_pixels = max(1, text_pixels)
+    return total_diff / text_pixels, strong / text_pixels, text_pixels
+
+
+def main():
+    parser = argparse.ArgumentParser(description='渲染后端对比')
+    parser.add_argument('--pages', type=int, default=20, help='大约的页数')
+    parser.add_argument('--profile', choices=list(OUTPUT_PROFILES), default=None, help='输出尺寸')
+    parser.add_argument('--font', help='正文字体文件（替换默认字体）')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数（取最好成绩）')
+    parser.add_argument('--max-strong-ratio', type=float, default=0.01,
+                        help='文字像素中允许的差异明显像素比例')
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    logging.disable(logging.CRITICAL)
+    with open(os.path.join('resources', 'config.json'), 'r', encoding='utf-8') as f:
+        background = json.load(f)['backgrounds'][0]
+    profile = get_profile(args.profile)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = ImageGenerator(use_layout_cache=False)
+    if args.font:
+        generator.fonts['normal'] = ImageFont.truetype(args.font, 32)
+    page_plan = generator.paginate(make_blocks(args.pages))
+    print(f"{len(page_plan)} 页，{profile.width}x{profile.height}")
+
+    results = {}
+    for name in ('pil', 'qt'):
+        generator.render_page_native(page_plan[0], background, 'normal', profile, name)  # 预热字体和背景
+        render_time, images = best_time(
+            lambda: [generator.render_page_native(page, background, 'normal', profile, name) for page in page_plan],
+            args.repeat)
+        to_pixmap = pil_to_qpixmap if name == 'pil' else QPixmap.fromImage
+        display_time, _ = best_time(lambda: [to_pixmap(image) for image in images], args.repeat)
+        results[name] = images
+        print(f"{name:>3}: 光栅化 {render_time / len(page_plan) * 1000:6.1f} ms/页，"
+              f"显示转换 {display_time / len(page_plan) * 1000:5.2f} ms/页")
+
+    blank = generator.render_page([], background, 'normal', profile, 'pil')
+    mean_diff, strong_ratio, text_pixels = compare(results['pil'], results['qt'], blank, generator)
+    fallback_fonts = generator.get_backend('qt').fallback_fonts
+    ok = strong_ratio <= args.max_strong_ratio and not fallback_fonts
+    print(f"视觉一致性: 文字像素 {text_pixels}，平均像素差 {mean_diff:.2f}，"
+          f"差异明显的像素 {strong_ratio * 100:.2f}% -> {'通过' if ok else '未通过'}"
+          f"（阈值 {args.max_strong_ratio * 100:.2f}%）")
+    if fallback_fonts:
+        print(f"Qt 无法加载字体，使用了默认字体: {sorted(map(str, fallback_fonts))}")
+    del app
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -70,6 +70,7 @@ def build_mac_app():
             
             # 添加所需的包
             '--hidden-import=PIL',
+            '--hidden-import=numpy',  # 程序化背景生成
             '--hidden-import=PyQt6',
             '--hidden-import=aiohttp',
             '--hidden-import=markdown',  # 添加markdown解析模块
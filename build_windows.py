@@ -97,6 +97,7 @@ def main():
             '--hidden-import=ui.markdown_editor',
             '--hidden-import=markdown',
             '--hidden-import=PIL',
+            '--hidden-import=numpy',  # 程序化背景生成
             '--clean',
             '--noconfirm',
             '--noupx',
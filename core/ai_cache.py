@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from utils.app_paths import get_cache_dir
+
+
+class AICache:
+    """
+    AI 润色结果的本地缓存（SQLite，WAL 模式，前面加一层内存缓存）
+
+    功能:
+        - 键为 (模型, 系统提示词, 内容, 请求参数) 的 sha256，内容没变时直接返回上次的结果
+        - 条目超过有效期（ttl 秒）后失效
+        - 按总大小淘汰最久未使用的条目
+        - 最近使用的条目同时保存在内存中，命中时不需要查询数据库
+        - 界面和命令行等多个进程可以同时读写同一个缓存文件；缓存出错时只记录日志
+    """
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_bytes=32 * 1024 * 1024, memory_items=256):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.enabled = True
+        self._memory = OrderedDict()  # 键 -> (结果, 写入时间)
+        self._memory_lock = threading.Lock()
+        self._local = threading.local()  # sqlite 连接不能跨线程使用，每个线程一个连接
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger('AICache')
+
+        try:
+            if self.path is None:
+                self.path = os.path.join(get_cache_dir(), 'ai_cache.sqlite3')
+            conn = self._connect()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+            self.logger.info(f"AI 缓存: {self.path}")
+        except (sqlite3.Error, OSError) as e:
+            # 无法创建缓存目录或数据库时只使用内存缓存
+            self._disable(e)
+
+    @staticmethod
+    def make_key(model, system_prompt, content, params=None):
+        """生成缓存键"""
+        payload = json.dumps([model, system_prompt, content, params or {}], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _disable(self, error):
+        self.enabled = False
+        self.logger.warning(f"AI 缓存不可用，已禁用: {str(error)}")
+
+    def _remember(self, key, result, created):
+        with self._memory_lock:
+            self._memory[key] = (result, created)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        读取缓存
+
+        返回:
+            str: 缓存的润色结果，未命中或已过期时返回 None
+        """
+        now = time.time()
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._memory[key]
+
+        if not self.enabled:
+            self.misses += 1
+            return None
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT result, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            result, created = row
+            if now - created > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            self.logger.warning(f"读取 AI 缓存失败: {str(e)}")
+            self.misses += 1
+            return None
+
+        self._remember(key, result, created)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """写入缓存，每写入一定次数清理一次过期和超出大小的条目"""
+        now = time.time()
+        self._remember(key, result, now)
+        if not self.enabled:
+            return
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, result, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, result, len(result.encode('utf-8')), now, now))
+        except sqlite3.Error as e:
+            self.logger.warning(f"写入 AI 缓存失败: {str(e)}")
+            return
+
+        self._puts += 1
+        if self._puts % 64 == 0:
+            self.evict()
+
+    def total_bytes(self):
+        if not self.enabled:
+            return 0
+        row = self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return row[0]
+
+    def evict(self):
+        """删除过期条目；总大小超过上限时删除最久未使用的条目直到降到上限的 80%"""
+        if not self.enabled:
+            return 0
+        try:
+            conn = self._connect()
+            removed = conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)).rowcount
+            total = self.total_bytes()
+            if total > self.max_bytes:
+                target = int(self.max_bytes * 0.8)
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    rows = conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall()
+                    keys = []
+                    for key, size in rows:
+                        if total <= target:
+                            break
+                        keys.append((key,))
+                        total -= size
+                    conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+                    removed += len(keys)
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    raise
+            if removed:
+                self.logger.info(f"AI 缓存淘汰 {removed} 条")
+            return removed
+        except sqlite3.Error as e:
+            self.logger.warning(f"清理 AI 缓存失败: {str(e)}")
+            return 0
+
+    def clear(self):
+        with self._memory_lock:
+            self._memory.clear()
+        if self.enabled:
+            self._connect().execute("DELETE FROM responses")
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
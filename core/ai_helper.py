@@ -1,47 +1,466 @@
-import requests
+import os
 import json
+import time
+import random
 import asyncio
+import logging
+
+import aiohttp
+
+from core.token_chunker import chunk_text, chunk_blocks
+from core.ai_cache import AICache
+from core.request_stats import RequestStats
+
+DEFAULT_API_URL = 'https://open.bigmodel.cn/api/paas/v4/chat/completions'
+DEFAULT_MODEL = 'glm-4-plus'
+SYSTEM_PROMPT = "你是一个专业的文字润色助手。"
+
+# 可以重试的 HTTP 状态码：限流和服务器错误
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
+
 
 class AIHelper:
-    def __init__(self):
-        self.api_key = '你的智谱AI API密钥'
-        self.api_url = 'https://open.bigmodel.cn/api/paas/v4/chat/completions'
-        
-    async def polish_text(self, content):
-        try:
-            response = await self.call_api(content)
-            return self.process_response(response)
-        except Exception as e:
-            print(f"AI处理错误: {str(e)}")
-            return content
-            
-    async def call_api(self, content):
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {self.api_key}'
-        }
-        
-        data = {
-            "model": "glm-4-plus",
+    """
+    AI 文字润色（智谱 chat/completions 接口）
+
+    功能:
+        - 共用一个 aiohttp 会话（连接池），连续请求复用连接，不需要每次重新握手
+        - polish_blocks 并发润色多个文本块，用信号量限制同时进行的请求数，结果按原顺序返回
+        - stream_polish 流式返回生成的文字，可以边生成边显示，随时取消
+        - 长文本按 token 预算在段落处切分后并发润色，再按顺序拼接；某一段失败时只有这一段保留原文
+        - 成功的结果按 (模型, 提示词, 内容, 参数) 缓存在本地，同样的内容再次润色时直接返回
+        - 每个请求有总期限（deadline），可重试的错误（连接失败、超时、429、5xx）按带随机抖动的指数退避重试
+        - 可选对冲请求：第一个请求超过最近耗时的分位数仍未返回时再发一个，取先成功的结果
+        - 统计请求结果和耗时直方图（stats）
+        - prepolish 预先润色内容写入缓存；同样的内容正在请求时后来的润色等待同一个请求
+
+    api_url 可以指向本地的模拟服务器（tools/fake_ai_server.py）进行测试，
+    也可以通过环境变量 AI_API_URL / ZHIPU_API_KEY 配置。
+    """
+
+    def __init__(self, api_key=None, api_url=None, model=DEFAULT_MODEL, max_concurrency=4,
+                 timeout=60, max_tokens=4095, requests_per_second=None, chunk_tokens=1500,
+                 cache=None, use_cache=True, deadline=90, max_retries=3, backoff_base=0.5,
+                 backoff_max=8.0, hedge_percentile=None, hedge_min_samples=20):
+        self.api_key = api_key or os.getenv('ZHIPU_API_KEY', '你的智谱AI API密钥')
+        self.api_url = api_url or os.getenv('AI_API_URL', DEFAULT_API_URL)
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self.requests_per_second = requests_per_second  # 每秒最多发起的请求数，None 为不限制
+        self.chunk_tokens = chunk_tokens                # 长文本每个请求的 token 预算（估算值）
+        self._next_request_at = 0.0
+        # 润色结果缓存，内容未变时不再请求；可传入共用的 AICache
+        self.cache = cache if cache is not None else (AICache() if use_cache else None)
+        self.deadline = deadline                  # 单次润色（含重试）的总期限（秒）
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile  # 如 0.95；None 为不发对冲请求
+        self.hedge_min_samples = hedge_min_samples
+        self.stats = RequestStats()
+        self.latencies = self.stats.recent        # 最近成功请求的耗时（秒）
+        self._session = None
+        self._session_loop = None
+        self._inflight = {}  # 缓存键 -> [请求任务, 等待者数]
+        self.logger = logging.getLogger('AIHelper')
+
+    async def get_session(self):
+        """获取共用的会话（会话绑定事件循环，循环变化时重新创建）"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            # 对冲请求需要额外的连接
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency * 2, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    'Content-Type': 'application/json',
+                    'Authorization': f'Bearer {self.api_key}'
+                }
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """关闭会话和连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    def build_payload(self, content, stream=False):
+        payload = {
+            "model": self.model,
             "messages": [
                 {
                     "role": "system",
-                    "content": "你是一个专业的文字润色助手。"
+                    "content": SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
                     "content": content
                 }
             ],
-            "max_tokens": 4095
+            "max_tokens": self.max_tokens
         }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(self.api_url, headers=headers, json=data) as response:
-                return await response.json()
-                
-    def process_response(self, response):
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def cache_key(self, content):
+        return AICache.make_key(self.model, SYSTEM_PROMPT, content, {'max_tokens': self.max_tokens})
+
+    def get_cached(self, content):
+        """读取缓存的润色结果，没有时返回 None"""
+        if self.cache is None:
+            return None
+        return self.cache.get(self.cache_key(content))
+
+    def put_cached(self, content, result):
+        if self.cache is not None:
+            self.cache.put(self.cache_key(content), result)
+
+    async def polish_text(self, content):
+        cached = self.get_cached(content)
+        if cached is not None:
+            return cached
+        try:
+            response = await self.call_api(content)
+            result = self.extract_content(response)
+            self.put_cached(content, result)
+            return result
+        except ValueError:
+            return "AI处理失败"
+        except Exception as e:
+            self.logger.error(f"AI处理错误: {str(e)}")
+            return content
+
+    async def throttle(self):
+        """按 requests_per_second 均匀安排请求的发起时间"""
+        if not self.requests_per_second:
+            return
+        now = time.monotonic()
+        start_at = max(now, self._next_request_at)
+        self._next_request_at = start_at + 1.0 / self.requests_per_second
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+    @staticmethod
+    def is_retryable(error):
+        """连接错误、超时、限流和服务器错误可以重试；其他 4xx 和返回格式错误不重试"""
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in RETRYABLE_STATUS
+        return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                                  asyncio.TimeoutError))
+
+    def backoff_delay(self, attempt):
+        """第 attempt 次重试前的等待时间：指数退避，随机抖动避免同时重试"""
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(cap / 2, cap)
+
+    def hedge_delay(self):
+        """发出对冲请求前等待的时间（最近耗时的分位数），未启用或样本不足时返回 None"""
+        if not self.hedge_percentile:
+            return None
+        return self.stats.percentile(self.hedge_percentile, self.hedge_min_samples)
+
+    async def call_api(self, content, deadline=None):
+        """
+        请求润色接口（含重试和对冲），返回接口的 JSON 结果
+
+        参数:
+            deadline (float): 总期限（秒），默认使用初始化时的设置；超过期限抛出 asyncio.TimeoutError
+        """
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                response = await asyncio.wait_for(self.request_hedged(content), remaining)
+                self.stats.record('success')
+                return response
+            except Exception as e:
+                retry = self.is_retryable(e) and attempt < self.max_retries
+                delay = self.backoff_delay(attempt) if retry else 0
+                if not retry or time.monotonic() + delay >= deadline_at:
+                    self.stats.record('timeout' if isinstance(e, asyncio.TimeoutError) else 'error')
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise asyncio.TimeoutError(f"请求超过期限 {deadline or self.deadline} 秒") from e
+                    raise
+                attempt += 1
+                self.stats.record('retry')
+                self.logger.warning(f"请求失败，{delay:.1f} 秒后第 {attempt} 次重试: {str(e) or type(e).__name__}")
+                await asyncio.sleep(delay)
+
+    async def request_hedged(self, content):
+        """发出请求；启用对冲时，超过耗时分位数仍未返回则再发一个，返回先成功的结果"""
+        hedge_after = self.hedge_delay()
+        first = asyncio.ensure_future(self.request_once(content))
+        if hedge_after is None:
+            return await first
+
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                return first.result()
+
+            self.stats.record('hedged')
+            second = asyncio.ensure_future(self.request_once(content))
+            pending.add(second)
+            errors = []
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.stats.record('hedge_won')
+                        return task.result()
+                    errors.append(task.exception())
+            raise errors[0]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def request_once(self, content):
+        """发出一次请求"""
+        session = await self.get_session()
+        await self.throttle()
+        start = time.perf_counter()
+        async with session.post(self.api_url, json=self.build_payload(content)) as response:
+            response.raise_for_status()
+            result = await response.json()
+        self.stats.record_latency(time.perf_counter() - start)
+        return result
+
+    async def stream_polish(self, content):
+        """
+        流式润色（server-sent events），逐段返回生成的文字
+
+        用法:
+            async for delta in helper.stream_polish(text):
+                ...
+
+        取消正在执行的任务（或提前退出 async for）即可中途停止，连接随之关闭。
+        缓存命中时一次返回全部结果。
+        流式响应可能持续较长时间，只限制两次读取之间的间隔，不限制总时长。
+        还没有输出文字时遇到可重试的错误会重试，输出开始后出错直接抛出。
+        """
+        cached = self.get_cached(content)
+        if cached is not None:
+            yield cached
+            return
+
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        parts = []
+        attempt = 0
+        while True:
+            session = await self.get_session()
+            await self.throttle()
+            start = time.perf_counter()
+            try:
+                async with session.post(self.api_url, json=self.build_payload(content, stream=True),
+                                        timeout=timeout) as response:
+                    response.raise_for_status()
+                    async for data in self.iter_sse(response):
+                        if data == '[DONE]':
+                            break
+                        chunk = json.loads(data)
+                        choices = chunk.get('choices') or [{}]
+                        delta = (choices[0].get('delta') or {}).get('content')
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+            except Exception as e:
+                # 已经输出过文字就不能再重试（否则内容会重复），只在第一段文字之前重试
+                if parts or not self.is_retryable(e) or attempt >= self.max_retries:
+                    self.stats.record('error')
+                    raise
+                delay = self.backoff_delay(attempt)
+                attempt += 1
+                self.stats.record('retry')
+                self.logger.warning(f"流式请求失败，{delay:.1f} 秒后第 {attempt} 次重试: {str(e) or type(e).__name__}")
+                await asyncio.sleep(delay)
+                continue
+            break
+
+        self.stats.record('success')
+        self.stats.record_latency(time.perf_counter() - start)
+        # 完整生成后才写入缓存（中途取消时不会执行到这里）
+        self.put_cached(content, ''.join(parts))
+
+    @staticmethod
+    async def iter_sse(response):
+        """按事件读取 SSE 响应，返回每个事件的 data 内容（多行 data 用换行连接）"""
+        data_lines = []
+        async for raw_line in response.content:
+            line = raw_line.decode('utf-8').rstrip('\r\n')
+            if not line:
+                if data_lines:
+                    yield '\n'.join(data_lines)
+                    data_lines = []
+                continue
+            if line.startswith(':'):
+                continue  # 注释/心跳
+            field, _, value = line.partition(':')
+            if field == 'data':
+                data_lines.append(value[1:] if value.startswith(' ') else value)
+        if data_lines:
+            yield '\n'.join(data_lines)
+
+    async def polish_blocks(self, texts, max_concurrency=None):
+        """
+        并发润色多个文本块
+
+        参数:
+            texts (list): 文本块内容
+            max_concurrency (int): 同时进行的请求数，默认使用初始化时的设置
+
+        返回:
+            list: 与 texts 顺序一致的结果，每项为
+                  {'original': 原文, 'text': 润色结果（失败时为原文）, 'latency': 耗时（秒）,
+                   'error': 错误信息或 None, 'cached': 是否来自缓存}
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def polish_one(text):
+            if not text.strip():
+                return {'original': text, 'text': text, 'latency': 0.0, 'error': None, 'cached': False}
+            start = time.perf_counter()
+            cached = self.get_cached(text)
+            if cached is not None:
+                return {'original': text, 'text': cached, 'latency': time.perf_counter() - start,
+                        'error': None, 'cached': True}
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    result = await self.polish_shared(text)
+                    error = None
+                except Exception as e:
+                    self.logger.error(f"AI处理错误: {str(e)}")
+                    result = text
+                    error = str(e) or type(e).__name__
+                return {'original': text, 'text': result,
+                        'latency': time.perf_counter() - start, 'error': error, 'cached': False}
+
+        results = await asyncio.gather(*(polish_one(text) for text in texts))
+        failed = sum(1 for result in results if result['error'])
+        self.logger.info(f"润色 {len(texts)} 个文本块，失败 {failed} 个")
+        return results
+
+    async def polish_shared(self, text):
+        """
+        请求润色并写入缓存；同样的内容已经在请求中时（如预润色还没返回）等待同一个请求，不重复发送
+
+        所有等待者都取消后才取消请求；已取消（或已结束）的请求不再共用，之后的调用方发起新的请求。
+        """
+        key = self.cache_key(text)
+        entry = self._inflight.get(key)
+        if entry is None or entry[0].done() or entry[0].cancelling():
+            entry = [asyncio.ensure_future(self.request_polish(text)), 0]
+            self._inflight[key] = entry
+            entry[0].add_done_callback(lambda _, entry=entry: self.forget_inflight(key, entry))
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0])
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not entry[0].done():
+                entry[0].cancel()
+                self.forget_inflight(key, entry)
+
+    def forget_inflight(self, key, entry):
+        """移除进行中的请求记录（只在记录仍是这个请求时移除，不影响之后同一内容的新请求）"""
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    async def request_polish(self, text):
+        response = await self.call_api(text)
+        result = self.extract_content(response)
+        self.put_cached(text, result)
+        return result
+
+    async def prepolish(self, texts, max_concurrency=1):
+        """
+        预润色：按 polish_document 同样的方式切分，只请求缓存中没有的片段，结果只写入缓存
+
+        之后整篇润色时这些片段直接从缓存返回，只有之后又修改过的片段需要请求。
+        单个片段失败不抛出异常，通过返回值告诉调用方哪些文本块需要之后重试。
+
+        返回:
+            tuple: (润色成功的片段数, 有片段失败的文本块序号列表)
+        """
+        owners = {}  # 片段 -> 包含它的文本块序号
+        for index, chunk in chunk_blocks(texts, self.chunk_tokens):
+            owners.setdefault(chunk.strip(), set()).add(index)
+        stale = [core for core in owners if core and self.get_cached(core) is None]
+        if not stale:
+            return 0, []
+        results = await self.polish_blocks(stale, max_concurrency)
+        failed = set()
+        for core, result in zip(stale, results):
+            if result['error']:
+                failed |= owners[core]
+        return len(stale) - sum(1 for result in results if result['error']), sorted(failed)
+
+    async def polish_chunks(self, chunks):
+        """
+        并发润色文本片段，片段首尾的空白（段落分隔）原样保留，失败的片段保留原文
+
+        返回:
+            tuple: (润色后的片段列表, 失败的片段数)
+        """
+        cores = [chunk.strip() for chunk in chunks]
+        results = await self.polish_blocks(cores)
+        polished = []
+        for chunk, core, result in zip(chunks, cores, results):
+            if not core:
+                polished.append(chunk)
+                continue
+            start = chunk.find(core)
+            polished.append(chunk[:start] + result['text'] + chunk[start + len(core):])
+        return polished, sum(1 for result in results if result['error'])
+
+    async def polish_long_text(self, text, max_tokens=None):
+        """
+        润色长文本（如导入的 Markdown）
+
+        按 token 预算在段落处切分，各片段并发请求（受并发数和速率限制），再按原顺序拼接
+        """
+        chunks = chunk_text(text, max_tokens or self.chunk_tokens)
+        polished, failed = await self.polish_chunks(chunks)
+        self.logger.info(f"长文本分为 {len(chunks)} 段润色，失败 {failed} 段")
+        return ''.join(polished)
+
+    async def polish_document(self, texts, max_tokens=None):
+        """
+        润色多个文本块，过长的文本块再切分，所有片段一起并发请求
+
+        返回:
+            list: 与 texts 顺序一致的润色结果
+        """
+        pieces = chunk_blocks(texts, max_tokens or self.chunk_tokens)
+        polished, failed = await self.polish_chunks([chunk for _, chunk in pieces])
+        results = ['' for _ in texts]
+        for (index, _), chunk in zip(pieces, polished):
+            results[index] += chunk
+        self.logger.info(f"{len(texts)} 个文本块分为 {len(pieces)} 段润色，失败 {failed} 段")
+        return results
+
+    @staticmethod
+    def extract_content(response):
+        """从接口返回中取出润色结果，格式不对时抛出 ValueError"""
         try:
             return response['choices'][0]['message']['content']
-        except:
-            return "AI处理失败" 
\ No newline at end of file
+        except (KeyError, IndexError, TypeError):
+            raise ValueError(f"无法解析AI返回: {str(response)[:200]}")
+
+    def process_response(self, response):
+        try:
+            return self.extract_content(response)
+        except ValueError:
+            return "AI处理失败"
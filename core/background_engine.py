@@ -0,0 +1,169 @@
+from PIL import Image
+import numpy as np
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+from core.output_profiles import BASE_WIDTH
+
+# 背景参数（间距、线宽等）以基准宽度的画布为准，其他尺寸按比例缩放
+REFERENCE_WIDTH = BASE_WIDTH
+
+BACKGROUND_KINDS = ('solid', 'grid', 'dots', 'lined')
+
+
+def hex_to_rgb(hex_color):
+    """HEX 颜色转换为 RGB 元组"""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+class BackgroundEngine:
+    """
+    背景生成器
+    根据 config.json 中的描述生成背景，支持程序化背景和图片背景
+
+    程序化背景示例:
+        {"type": "grid", "color": "#F2F2F2", "line_color": "#C8C8C8", "spacing": 45}
+
+    支持的类型:
+        - solid: 纯色
+        - grid: 网格（可选 offset_x、offset_y 平移网格线的位置）
+        - dots: 点阵
+        - lined: 横线纸（可选左侧竖线 margin_line）
+
+    生成结果按 (描述, 尺寸) 缓存，返回的图片为共享对象，调用方需要 copy 后再绘制
+    """
+
+    def __init__(self, max_cached=16):
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()  # 界面线程和导出线程共用缓存
+        self.logger = logging.getLogger('BackgroundEngine')
+
+    def get_background(self, background, size):
+        """
+        获取指定尺寸的背景图片
+
+        参数:
+            background: 背景配置（含 procedural 或 url 的字典）、程序化描述字典或图片路径
+            size (tuple): (宽, 高)
+
+        返回:
+            PIL.Image: RGB 背景图片，没有背景时返回 None
+        """
+        if not background:
+            return None
+
+        if isinstance(background, dict):
+            if 'procedural' in background:
+                return self.render(background['procedural'], size)
+            if 'type' in background:
+                return self.render(background, size)
+            background = background.get('url')
+            if not background:
+                return None
+
+        return self.load_file(background, size)
+
+    def render(self, spec, size):
+        """生成程序化背景（带缓存）"""
+        key = ('procedural', self.spec_key(spec), tuple(size))
+        image = self._cache_get(key)
+        if image is None:
+            image = Image.fromarray(self.render_array(spec, size), 'RGB')
+            self._cache_put(key, image)
+        return image
+
+    def load_file(self, path, size):
+        """加载图片背景并缩放（按文件修改时间和尺寸缓存）"""
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError as e:
+            self.logger.error(f"背景图片不存在: {path} ({str(e)})")
+            return None
+
+        key = ('file', path, mtime, tuple(size))
+        image = self._cache_get(key)
+        if image is None:
+            with Image.open(path) as bg:
+                image = bg.convert('RGB').resize(tuple(size))
+            self._cache_put(key, image)
+        return image
+
+    @staticmethod
+    def spec_key(spec):
+        """把描述字典转换为可哈希的缓存键"""
+        return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in spec.items()))
+
+    def render_array(self, spec, size):
+        """
+        用 NumPy 向量化填充生成背景像素
+
+        参数:
+            spec (dict): 程序化背景描述
+            size (tuple): (宽, 高)
+
+        返回:
+            numpy.ndarray: (高, 宽, 3) 的 uint8 数组
+        """
+        width, height = size
+        kind = spec.get('type', 'solid')
+        if kind not in BACKGROUND_KINDS:
+            self.logger.warning(f"未知的背景类型: {kind}，使用纯色背景")
+            kind = 'solid'
+
+        scale = width / REFERENCE_WIDTH
+        color = hex_to_rgb(spec.get('color', '#FFFFFF'))
+        line_color = hex_to_rgb(spec.get('line_color', '#C8C8C8'))
+        spacing = max(2, int(round(spec.get('spacing', 45) * scale)))
+        line_width = max(1, int(round(spec.get('line_width', 1) * scale)))
+
+        pixels = np.empty((height, width, 3), dtype=np.uint8)
+        pixels[...] = color
+
+        if kind == 'grid':
+            start_x = int(round(spec.get('offset_x', 0) * scale))
+            start_y = int(round(spec.get('offset_y', 0) * scale))
+            for offset in range(min(line_width, spacing)):
+                pixels[:, (start_x + offset) % spacing::spacing] = line_color
+                pixels[(start_y + offset) % spacing::spacing, :] = line_color
+
+        elif kind == 'dots':
+            radius = max(1.0, spec.get('dot_radius', 2) * scale)
+            half = spacing / 2
+            ys = (np.arange(height) % spacing) - half
+            xs = (np.arange(width) % spacing) - half
+            mask = (ys[:, None] ** 2 + xs[None, :] ** 2) <= radius ** 2
+            pixels[mask] = line_color
+
+        elif kind == 'lined':
+            top = int(round(spec.get('top', spec.get('spacing', 45) * 2) * scale))
+            for offset in range(min(line_width, spacing)):
+                pixels[top + offset::spacing, :] = line_color
+            if 'margin_line' in spec:
+                margin_x = int(round(spec['margin_line'] * scale))
+                margin_color = hex_to_rgb(spec.get('margin_color', '#F4A7A7'))
+                pixels[:, margin_x:margin_x + line_width] = margin_color
+
+        return pixels
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._cache.clear()
+
+    def _cache_get(self, key):
+        with self._lock:
+            image = self._cache.get(key)
+            if image is not None:
+                self._cache.move_to_end(key)
+            return image
+
+    def _cache_put(self, key, image):
+        with self._lock:
+            self._cache[key] = image
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
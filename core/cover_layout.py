@@ -0,0 +1,95 @@
+from bisect import bisect_left, bisect_right
+
+
+class CoverLayout:
+    """
+    封面文字的行布局
+    保存每个字符的真实 x 偏移、宽度和所在行，文字、椭圆和下划线都从这里读取位置
+
+    属性:
+        glyphs (list): [(text_idx, char, line_idx, x, width, is_emoji), ...]，按文本顺序排列
+        lines (list): [(first_glyph, last_glyph, line_width), ...]，下标为行号
+        origin_x (float): 行首的 x 坐标
+        start_y (float): 第一行的 y 坐标
+        line_height (float): 行高
+        font_size (int): 字号
+    """
+
+    def __init__(self, glyphs, lines, origin_x, start_y, line_height, font_size):
+        self.glyphs = glyphs
+        self.lines = lines
+        self.origin_x = origin_x
+        self.start_y = start_y
+        self.line_height = line_height
+        self.font_size = font_size
+        # 字符在原文中的下标，用于二分查找
+        self._indices = [glyph[0] for glyph in glyphs]
+
+    def line_y(self, line_idx):
+        """某一行的顶部 y 坐标"""
+        return self.start_y + line_idx * self.line_height
+
+    def glyph_range(self, start, end):
+        """
+        返回闭区间 [start, end] 内的第一个和最后一个字符在 glyphs 中的下标
+        区间内没有可见字符（例如只有换行符）时返回 None
+        """
+        first = bisect_left(self._indices, start)
+        last = bisect_right(self._indices, end) - 1
+        if first > last:
+            return None
+        return first, last
+
+    def ellipse_box(self, start, end, style):
+        """
+        计算椭圆标记的外接矩形
+
+        返回:
+            list: [x0, y0, x1, y1]，标记跨行或没有可见字符时返回 None
+        """
+        found = self.glyph_range(start, end)
+        if found is None:
+            return None
+        first, last = found
+        _, _, start_line, start_x, _, _ = self.glyphs[first]
+        _, _, end_line, end_x, end_width, _ = self.glyphs[last]
+        if start_line != end_line:
+            return None
+
+        size = style.get('size', 10)
+        position = style.get('position', 0)
+        ellipse_y = self.line_y(start_line)
+        return [
+            self.origin_x + start_x - size,
+            ellipse_y - size + position,
+            self.origin_x + end_x + end_width + size,
+            ellipse_y + self.font_size + size + position
+        ]
+
+    def underline_segments(self, start, end, style):
+        """
+        计算下划线标记在每一行上的线段
+
+        返回:
+            list: [(x0, y, x1), ...]，每行一段
+        """
+        found = self.glyph_range(start, end)
+        if found is None:
+            return []
+        first, last = found
+        start_line = self.glyphs[first][2]
+        end_line = self.glyphs[last][2]
+        offset = style.get('offset', 5)
+
+        segments = []
+        for line_idx in range(start_line, end_line + 1):
+            line_first, line_last, _ = self.lines[line_idx]
+            seg_first = max(first, line_first)
+            seg_last = min(last, line_last)
+            if seg_first > seg_last:
+                continue
+            x0 = self.glyphs[seg_first][3]
+            x1 = self.glyphs[seg_last][3] + self.glyphs[seg_last][4]
+            y = self.line_y(line_idx) + self.font_size + offset
+            segments.append((self.origin_x + x0, y, self.origin_x + x1))
+        return segments
@@ -0,0 +1,140 @@
+import json
+import logging
+from collections import OrderedDict, Counter
+
+from PIL import Image, ImageDraw
+
+from core.mark_store import MarkStore
+from core.output_profiles import get_profile
+
+
+class CoverLayer:
+    """
+    透明图层中有内容的部分
+
+    属性:
+        image (PIL.Image): RGBA 图片，已裁剪到有内容的范围
+        offset (tuple): 在页面中的位置 (x, y)
+    """
+
+    def __init__(self, image, offset):
+        self.image = image
+        self.offset = offset
+
+    @classmethod
+    def from_canvas(cls, canvas):
+        """从整页大小的透明画布裁剪出有内容的部分，画布为空时返回 None"""
+        bbox = canvas.getchannel('A').getbbox()
+        if bbox is None:
+            return None
+        return cls(canvas.crop(bbox), bbox[:2])
+
+
+class CoverRenderer:
+    """
+    封面分层渲染
+
+    功能:
+        - 封面分为背景、文字、装饰（椭圆、下划线）和 Logo 几层，每层单独缓存
+        - 每层只在影响它的参数变化时重新绘制：
+            背景: 背景配置、输出尺寸
+            文字: 文字、字号、加粗、字间距、行间距、输出尺寸
+            装饰: 文字布局、样式标记、输出尺寸
+            Logo: 输出尺寸
+        - 调整椭圆、下划线时只重新绘制装饰层，再按 背景、椭圆、文字、下划线、Logo 的顺序合成
+        - 透明图层裁剪到有内容的范围，合成时只处理这部分像素
+
+    调用方需持有 ImageGenerator.render_lock（字体和缓存不是线程安全的）。
+    """
+
+    def __init__(self, generator, max_items=6):
+        self.generator = generator
+        self.max_items = max_items  # 每层缓存的条目数（预览、缩略图、导出等尺寸各一份）
+        self.backgrounds = OrderedDict()
+        self.glyphs = OrderedDict()
+        self.decorations = OrderedDict()
+        self.logos = OrderedDict()
+        self.builds = Counter()  # 各层实际绘制的次数
+        self.logger = logging.getLogger('CoverRenderer')
+
+    def cached(self, cache, name, key, build):
+        """读取某一层的缓存，没有时调用 build 绘制并加入缓存（超过上限时淘汰最久未用的）"""
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        value = build()
+        self.builds[name] += 1
+        cache[key] = value
+        while len(cache) > self.max_items:
+            cache.popitem(last=False)
+        return value
+
+    def clear(self):
+        for cache in (self.backgrounds, self.glyphs, self.decorations, self.logos):
+            cache.clear()
+
+    @staticmethod
+    def marks_key(marks):
+        return json.dumps([[start, end, style] for (start, end), style in marks.items()],
+                          sort_keys=True, default=str)
+
+    def render(self, content, background, profile=None):
+        """
+        渲染封面
+
+        参数:
+            content (dict): StyleTextEditor.get_content() 返回的封面内容
+            background: 背景配置（程序化描述或图片路径）
+            profile: 输出尺寸配置名称或 OutputProfile
+
+        返回:
+            PIL.Image: RGB 封面图片
+        """
+        profile = get_profile(profile)
+        size = profile.size
+        layout_key, font, layout = self.generator.get_cover_layout(content)
+        marks = MarkStore.coerce(content.get('marks', {}))
+
+        base = self.cached(
+            self.backgrounds, 'background',
+            (json.dumps(background, sort_keys=True, default=str), size),
+            lambda: self.generator.create_page_image(background, profile).convert('RGBA'))
+        glyphs = self.cached(
+            self.glyphs, 'glyphs', (layout_key, size),
+            lambda: self.render_glyphs(layout, font, profile))
+        ellipses, underlines = self.cached(
+            self.decorations, 'decorations', (layout_key, self.marks_key(marks), size),
+            lambda: self.render_decorations(layout, marks, profile))
+        logo = self.cached(self.logos, 'logo', size, lambda: self.render_logo(size))
+
+        image = base.copy()
+        for layer in (ellipses, glyphs, underlines, logo):
+            if layer is not None:
+                image.alpha_composite(layer.image, dest=layer.offset)
+        return image.convert('RGB')
+
+    def render_glyphs(self, layout, font, profile):
+        canvas = Image.new('RGBA', profile.size, (0, 0, 0, 0))
+        self.generator.draw_cover_glyphs(ImageDraw.Draw(canvas), layout, font, profile.scale)
+        return CoverLayer.from_canvas(canvas)
+
+    def render_decorations(self, layout, marks, profile):
+        """
+        返回:
+            tuple: (椭圆层, 下划线层)，椭圆在文字下面，下划线在文字上面
+        """
+        ellipses = Image.new('RGBA', profile.size, (0, 0, 0, 0))
+        self.generator.draw_cover_ellipses(ImageDraw.Draw(ellipses), layout, marks, profile.scale)
+        underlines = Image.new('RGBA', profile.size, (0, 0, 0, 0))
+        self.generator.draw_cover_underlines(ImageDraw.Draw(underlines), layout, marks, profile.scale)
+        return CoverLayer.from_canvas(ellipses), CoverLayer.from_canvas(underlines)
+
+    def render_logo(self, size):
+        placement = self.generator.logo_processor.get_placement(*size)
+        if placement is None:
+            return None
+        logo, offset = placement
+        # 与 LogoProcessor.add_logo 一样，以 logo 自身为蒙版贴到透明图层上
+        layer = Image.new('RGBA', logo.size, (0, 0, 0, 0))
+        layer.paste(logo, (0, 0), logo)
+        return CoverLayer(layer, offset)
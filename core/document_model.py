@@ -0,0 +1,199 @@
+import logging
+import itertools
+
+
+def normalize_block_text(text):
+    """统一换行符为 \\n，保留前导空格，只去掉每行尾部空格"""
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return '\n'.join(line.rstrip() for line in text.split('\n'))
+
+
+class DocumentBlock:
+    """
+    文档中的一个文本块
+
+    属性:
+        block_id (int): 文档内唯一的编号，随项目文件保存和恢复
+        type (str): 'title' 或 'content'
+        text (str): 规范化后的文本
+        line_spacing (int): 行间距
+        font_size (int): 字号
+        version (int): 任何字段变化时更新为文档内递增的新值，
+                       (block_id, version) 在文档内不会重复，可直接作为缓存键
+    """
+
+    FIELDS = ('type', 'text', 'line_spacing', 'font_size')
+
+    def __init__(self, block_id, version, type='content', text='', line_spacing=45, font_size=36):
+        self.block_id = block_id
+        self.type = type
+        self.text = text
+        self.line_spacing = line_spacing
+        self.font_size = font_size
+        self.version = version
+        self._item = None  # 当前版本的内容字典
+
+    def to_item(self):
+        """
+        返回生成器使用的内容字典（同一版本返回同一个对象，调用方不要修改）
+        """
+        if self._item is None:
+            self._item = {
+                'type': self.type,
+                'text': self.text,
+                'line_spacing': self.line_spacing,
+                'font_size': self.font_size,
+                'block_id': self.block_id,
+                'version': self.version
+            }
+        return self._item
+
+    def __repr__(self):
+        return f"DocumentBlock({self.block_id}, {self.type!r}, v{self.version})"
+
+
+class DocumentModel:
+    """
+    文本编辑文档模型
+    持有所有文本块，每个块带版本号，字段变化时向订阅者发送细粒度的变化事件
+
+    事件（callback(event, block)）:
+        - added: 新增文本块
+        - removed: 删除文本块
+        - type / text / line_spacing / font_size: 对应字段变化
+        - reset: 整个文档被替换（block 为 None）
+    """
+
+    def __init__(self):
+        self._blocks = {}   # block_id -> DocumentBlock
+        self._order = []    # 文本块顺序
+        self._next_id = 1
+        self._versions = itertools.count(1)  # 所有文本块共用，版本号不会重复
+        self._listeners = []
+        self.revision = 0   # 文档任何变化时递增
+        self.logger = logging.getLogger('DocumentModel')
+
+    def subscribe(self, callback):
+        """订阅变化事件"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _emit(self, event, block):
+        self.revision += 1
+        for callback in list(self._listeners):
+            try:
+                callback(event, block)
+            except Exception as e:
+                self.logger.error(f"文档事件处理出错 ({event}): {str(e)}")
+
+    def add_block(self, type='content', text='', line_spacing=45, font_size=36, index=None):
+        """
+        添加文本块
+
+        返回:
+            int: 新文本块的编号
+        """
+        block = DocumentBlock(self._allocate_id(), next(self._versions), type,
+                              normalize_block_text(text), line_spacing, font_size)
+        self._blocks[block.block_id] = block
+        if index is None:
+            self._order.append(block.block_id)
+        else:
+            self._order.insert(index, block.block_id)
+        self._emit('added', block)
+        return block.block_id
+
+    def remove_block(self, block_id):
+        block = self._blocks.pop(block_id, None)
+        if block is None:
+            return False
+        self._order.remove(block_id)
+        self._emit('removed', block)
+        return True
+
+    def set_text(self, block_id, text):
+        return self.update_block(block_id, text=normalize_block_text(text))
+
+    def set_type(self, block_id, type):
+        return self.update_block(block_id, type=type)
+
+    def set_line_spacing(self, block_id, line_spacing):
+        return self.update_block(block_id, line_spacing=line_spacing)
+
+    def set_font_size(self, block_id, font_size):
+        return self.update_block(block_id, font_size=font_size)
+
+    def update_block(self, block_id, **fields):
+        """
+        更新文本块字段，只有值真正变化时才递增版本并发送事件
+
+        返回:
+            bool: 是否有变化
+        """
+        block = self._blocks.get(block_id)
+        if block is None:
+            return False
+
+        changed = [name for name in DocumentBlock.FIELDS
+                   if name in fields and getattr(block, name) != fields[name]]
+        if not changed:
+            return False
+
+        for name in changed:
+            setattr(block, name, fields[name])
+        block.version = next(self._versions)
+        block._item = None
+        for name in changed:
+            self._emit(name, block)
+        return True
+
+    def reset(self, blocks):
+        """
+        用新的内容替换整个文档
+
+        参数:
+            blocks (list): [{'type', 'text', 'line_spacing', 'font_size'}]，
+                           可带 block_id（例如从项目文件恢复时），否则分配新编号
+
+        返回:
+            list: 文本块的编号
+        """
+        self._blocks.clear()
+        self._order = []
+        block_ids = []
+        for data in blocks:
+            block_id = data.get('block_id')
+            if block_id is None or block_id in self._blocks:
+                block_id = self._allocate_id()
+            self._next_id = max(self._next_id, block_id + 1)
+            block = DocumentBlock(block_id, next(self._versions), data.get('type', 'content'),
+                                  normalize_block_text(data.get('text', '')),
+                                  data.get('line_spacing', 45), data.get('font_size', 36))
+            self._blocks[block.block_id] = block
+            self._order.append(block.block_id)
+            block_ids.append(block.block_id)
+        self._emit('reset', None)
+        return block_ids
+
+    def _allocate_id(self):
+        block_id = self._next_id
+        self._next_id += 1
+        return block_id
+
+    def get(self, block_id):
+        return self._blocks.get(block_id)
+
+    def blocks(self):
+        """按顺序返回所有文本块"""
+        return [self._blocks[block_id] for block_id in self._order]
+
+    def items(self):
+        """按顺序返回非空文本块的内容字典"""
+        return [block.to_item() for block in self.blocks() if block.text.strip()]
+
+    def __len__(self):
+        return len(self._order)
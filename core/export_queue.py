@@ -0,0 +1,233 @@
+import os
+import logging
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from core.exporter import ImageEncoder, ZipBundleWriter
+
+
+class ExportCancelled(Exception):
+    """导出任务被取消"""
+    pass
+
+
+class FolderTarget:
+    """导出到文件夹：每页保存为一个图片文件"""
+
+    def __init__(self, folder_path, settings):
+        self.folder_path = folder_path
+        self.settings = settings
+        self.location = folder_path
+        self.encoder = ImageEncoder()
+
+    def open(self):
+        os.makedirs(self.folder_path, exist_ok=True)
+
+    def write_item(self, image, name):
+        filepath = os.path.join(self.folder_path, f"{name}{self.settings.extension}")
+        info = self.encoder.save(image, filepath, self.settings)
+        return dict(info, file=filepath)
+
+    def close(self):
+        pass
+
+    def abort(self):
+        # 已保存的页面保留在文件夹中
+        pass
+
+
+class ZipTarget:
+    """
+    导出到 ZIP：页面直接写入同目录下的临时文件，完成后再替换为目标文件
+    取消或失败时只删除临时文件，目标路径上原有的文件保持不变
+    """
+
+    def __init__(self, zip_path, settings, folder='', metadata=None):
+        self.zip_path = zip_path
+        self.temp_path = f"{zip_path}.part"
+        self.settings = settings
+        self.folder = folder
+        self.metadata = metadata
+        self.location = zip_path
+        self.bundle = None
+
+    def open(self):
+        self.bundle = ZipBundleWriter(self.temp_path, self.settings, folder=self.folder,
+                                      metadata=self.metadata)
+
+    def write_item(self, image, name):
+        return self.bundle.add_page(image, name)
+
+    def close(self):
+        self.bundle.close()
+        os.replace(self.temp_path, self.zip_path)
+
+    def abort(self):
+        if self.bundle is None:
+            return
+        self.bundle.abort()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class TextFileTarget:
+    """导出文本文档：唯一的一项内容是文本字符串"""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.location = filepath
+
+    def open(self):
+        pass
+
+    def write_item(self, text, name):
+        with open(self.filepath, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return {'file': self.filepath, 'size': len(text.encode('utf-8'))}
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+
+class ExportJob:
+    """
+    导出任务
+
+    参数:
+        title (str): 任务名称（用于界面显示）
+        items (list): [(名称, produce)]，produce() 返回要写入的内容（图片或文本），
+                      在工作线程中按需调用，可以在这里做光栅化
+        target: 导出目标（FolderTarget / ZipTarget / TextFileTarget）
+        max_retries (int): 每项失败后的重试次数
+
+    属性:
+        status (str): pending / running / done / cancelled / failed
+        results (list): 每项的导出结果，失败项为 None
+        failures (list): [(序号, 名称, 错误信息)]
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, title, items, target, max_retries=2):
+        self.job_id = next(self._ids)
+        self.title = title
+        self.items = list(items)
+        self.target = target
+        self.max_retries = max_retries
+        self.status = 'pending'
+        self.results = [None] * len(self.items)
+        self.failures = []
+        self.error = None
+        self.completed = 0
+        self._cancel_event = threading.Event()
+
+    @property
+    def total(self):
+        return len(self.items)
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """请求取消，当前页完成后停止"""
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise ExportCancelled()
+
+
+class ExportQueue:
+    """
+    后台导出队列
+    任务提交到线程池中执行，逐页回调进度，支持取消和逐页重试
+
+    回调（在工作线程中调用，界面需要自行切回主线程）:
+        on_progress(job, completed, total, index, result)
+        on_finished(job)
+    """
+
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export')
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger('ExportQueue')
+
+    def submit(self, job, on_progress=None, on_finished=None):
+        """提交导出任务，立即返回"""
+        with self._lock:
+            self.jobs[job.job_id] = job
+        self.logger.info(f"提交导出任务 #{job.job_id}: {job.title}（{job.total} 项）")
+        self.executor.submit(self._run, job, on_progress, on_finished)
+        return job
+
+    def active_jobs(self):
+        """返回尚未结束的任务"""
+        with self._lock:
+            return [job for job in self.jobs.values() if job.status in ('pending', 'running')]
+
+    def cancel_all(self):
+        for job in self.active_jobs():
+            job.cancel()
+
+    def shutdown(self, wait=False):
+        """取消所有任务并关闭线程池"""
+        self.cancel_all()
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job, on_progress, on_finished):
+        try:
+            job.check_cancelled()
+            job.status = 'running'
+            job.target.open()
+
+            for index, (name, produce) in enumerate(job.items):
+                job.check_cancelled()
+                job.results[index] = self._run_item(job, index, name, produce)
+                job.completed += 1
+                if on_progress:
+                    on_progress(job, job.completed, job.total, index, job.results[index])
+
+            job.target.close()
+            job.status = 'done'
+            self.logger.info(f"导出任务 #{job.job_id} 完成，失败 {len(job.failures)} 项")
+
+        except ExportCancelled:
+            job.status = 'cancelled'
+            job.target.abort()
+            self.logger.info(f"导出任务 #{job.job_id} 已取消（完成 {job.completed}/{job.total}）")
+
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            self.logger.error(f"导出任务 #{job.job_id} 失败: {str(e)}")
+            try:
+                job.target.abort()
+            except Exception as abort_error:
+                self.logger.error(f"清理导出目标失败: {str(abort_error)}")
+
+        finally:
+            with self._lock:
+                self.jobs.pop(job.job_id, None)
+            if on_finished:
+                on_finished(job)
+
+    def _run_item(self, job, index, name, produce):
+        """导出一项，失败时重试，最终失败记入 failures"""
+        last_error = None
+        for attempt in range(job.max_retries + 1):
+            job.check_cancelled()
+            try:
+                return job.target.write_item(produce(), name)
+            except Exception as e:
+                last_error = e
+                self.logger.warning(
+                    f"导出任务 #{job.job_id} 第 {index + 1} 项失败（第 {attempt + 1} 次）: {str(e)}")
+
+        job.failures.append((index, name, str(last_error)))
+        return None
@@ -0,0 +1,285 @@
+import io
+import json
+import logging
+import zipfile
+from collections import OrderedDict
+from datetime import datetime
+
+# 支持的导出格式：名称 -> (显示名称, 扩展名, PIL 格式)
+EXPORT_FORMATS = OrderedDict([
+    ('png', ('PNG（无损）', '.png', 'PNG')),
+    ('jpeg', ('JPEG', '.jpg', 'JPEG')),
+    ('webp', ('WebP', '.webp', 'WEBP')),
+])
+
+# JPEG 色度抽样选项
+CHROMA_SUBSAMPLING = ('4:2:0', '4:2:2', '4:4:4')
+
+
+class ExportSettings:
+    """
+    导出设置
+
+    属性:
+        format (str): 'png' / 'jpeg' / 'webp'
+        quality (int): 有损格式的质量（1-100），目标大小模式下为质量上限
+        subsampling (str): JPEG 色度抽样，'4:2:0' / '4:2:2' / '4:4:4'
+        progressive (bool): JPEG 是否使用渐进式编码
+        target_kb (int): 每页大小预算（KB），0 表示不限制
+        min_quality (int): 目标大小模式下的最低质量
+        bundle_zip (bool): 是否把所有页面打包为一个 ZIP 文件
+    """
+
+    def __init__(self, format='png', quality=90, subsampling='4:2:0', progressive=True,
+                 target_kb=0, min_quality=20, bundle_zip=False):
+        self.format = format if format in EXPORT_FORMATS else 'png'
+        self.quality = quality
+        self.subsampling = subsampling if subsampling in CHROMA_SUBSAMPLING else '4:2:0'
+        self.progressive = progressive
+        self.target_kb = target_kb
+        self.min_quality = min_quality
+        self.bundle_zip = bundle_zip
+
+    @property
+    def extension(self):
+        return EXPORT_FORMATS[self.format][1]
+
+    @property
+    def is_lossy(self):
+        return self.format != 'png'
+
+    def to_dict(self):
+        return {
+            'format': self.format,
+            'quality': self.quality,
+            'subsampling': self.subsampling,
+            'progressive': self.progressive,
+            'target_kb': self.target_kb,
+            'min_quality': self.min_quality,
+            'bundle_zip': self.bundle_zip
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{k: v for k, v in (data or {}).items()
+                      if k in ('format', 'quality', 'subsampling', 'progressive',
+                               'target_kb', 'min_quality', 'bundle_zip')})
+
+
+class ImageEncoder:
+    """
+    图片编码器
+    把页面编码为 PNG / JPEG / WebP，支持按大小预算二分查找质量
+
+    功能:
+        - 复用同一个内存缓冲区，不为每次尝试分配新的缓冲
+        - 返回每页最终的大小和质量
+    """
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        self._size = 0
+        self.logger = logging.getLogger('ImageEncoder')
+
+    def encode(self, image, settings):
+        """
+        编码一页图片，结果保留在内部缓冲区中
+
+        参数:
+            image (PIL.Image): 页面图片
+            settings (ExportSettings): 导出设置
+
+        返回:
+            dict: {'size': 字节数, 'quality': 最终质量（PNG 为 None）,
+                   'format': 格式, 'within_budget': 是否满足大小预算}
+        """
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        if not settings.is_lossy:
+            size = self._encode_once(image, settings, None)
+            budget = settings.target_kb * 1024
+            return {'size': size, 'quality': None, 'format': settings.format,
+                    'within_budget': not budget or size <= budget}
+
+        if not settings.target_kb:
+            size = self._encode_once(image, settings, settings.quality)
+            return {'size': size, 'quality': settings.quality, 'format': settings.format,
+                    'within_budget': True}
+
+        quality, size, within_budget = self._search_quality(image, settings)
+        return {'size': size, 'quality': quality, 'format': settings.format,
+                'within_budget': within_budget}
+
+    def _search_quality(self, image, settings):
+        """二分查找满足大小预算的最高质量"""
+        budget = settings.target_kb * 1024
+        low = max(1, min(settings.min_quality, settings.quality))
+        high = settings.quality
+
+        # 先试最高质量，满足预算就不用再搜索
+        size = self._encode_once(image, settings, high)
+        if size <= budget:
+            return high, size, True
+
+        best = None
+        last_quality = high
+        while low <= high - 1:
+            mid = (low + high) // 2
+            size = self._encode_once(image, settings, mid)
+            last_quality = mid
+            if size <= budget:
+                best = mid
+                low = mid + 1
+            else:
+                high = mid
+
+        if best is None:
+            # 最低质量也超出预算，使用最低质量并标记
+            quality = max(1, min(settings.min_quality, settings.quality))
+            if last_quality != quality:
+                size = self._encode_once(image, settings, quality)
+            self.logger.warning(f"最低质量 {quality} 仍超出预算: {size // 1024} KB > {settings.target_kb} KB")
+            return quality, size, False
+
+        if last_quality != best:
+            size = self._encode_once(image, settings, best)
+        return best, size, True
+
+    def _encode_once(self, image, settings, quality):
+        """编码到复用的缓冲区，返回字节数"""
+        self._buffer.seek(0)
+        self._buffer.truncate(0)
+        pil_format = EXPORT_FORMATS[settings.format][2]
+
+        if settings.format == 'jpeg':
+            image.save(self._buffer, pil_format, quality=quality, optimize=True,
+                       progressive=settings.progressive, subsampling=settings.subsampling)
+        elif settings.format == 'webp':
+            image.save(self._buffer, pil_format, quality=quality, method=4)
+        else:
+            image.save(self._buffer, pil_format)
+
+        self._size = self._buffer.tell()
+        return self._size
+
+    def write_to(self, file_obj):
+        """把最近一次的编码结果写入文件对象"""
+        with self._buffer.getbuffer() as view:
+            file_obj.write(view[:self._size])
+
+    def get_bytes(self):
+        """返回最近一次编码结果的副本"""
+        return self._buffer.getvalue()[:self._size]
+
+    def save(self, image, path, settings):
+        """编码并保存到文件，返回 encode 的结果信息"""
+        info = self.encode(image, settings)
+        with open(path, 'wb') as f:
+            self.write_to(f)
+        self.logger.info(f"已保存 {path}: {info['size'] // 1024} KB, 质量 {info['quality']}")
+        return info
+
+
+class ZipBundleWriter:
+    """
+    ZIP 打包导出
+    页面编码后直接写入 ZIP，不生成中间文件，最后写入 manifest.json
+
+    功能:
+        - 使用 ZIP_STORED 存储（PNG/JPEG/WebP 本身已经压缩，再压缩只浪费时间）
+        - 同一时间内存中最多只有一页的编码结果
+
+    用法:
+        with ZipBundleWriter(path, settings, folder='20241120-标题') as bundle:
+            for i, image in enumerate(images):
+                bundle.add_page(image, f"标题_{i + 1}")
+    """
+
+    MANIFEST_NAME = 'manifest.json'
+
+    def __init__(self, path, settings, folder='', metadata=None):
+        self.path = path
+        self.settings = settings
+        self.folder = folder.strip('/')
+        self.metadata = dict(metadata or {})
+        self.encoder = ImageEncoder()
+        self.pages = []
+        self.logger = logging.getLogger('ZipBundleWriter')
+        self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED, allowZip64=True)
+
+    def _entry_name(self, name):
+        return f"{self.folder}/{name}" if self.folder else name
+
+    def add_page(self, image, name):
+        """
+        编码一页并写入 ZIP
+
+        参数:
+            image (PIL.Image): 页面图片
+            name (str): 不含扩展名的文件名
+
+        返回:
+            dict: encode 的结果信息（附带 ZIP 内的文件名）
+        """
+        info = self.encoder.encode(image, self.settings)
+        entry = self._entry_name(f"{name}{self.settings.extension}")
+        with self._zip.open(entry, 'w', force_zip64=info['size'] > 0x7FFFFFFF) as f:
+            self.encoder.write_to(f)
+
+        info = dict(info, file=entry, width=image.width, height=image.height)
+        self.pages.append(info)
+        self.logger.info(f"已写入 {entry}: {info['size'] // 1024} KB")
+        return info
+
+    def build_manifest(self):
+        """生成清单内容"""
+        manifest = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'page_count': len(self.pages),
+            'export': self.settings.to_dict(),
+            'pages': [
+                {'index': i + 1, 'file': page['file'], 'width': page['width'],
+                 'height': page['height'], 'bytes': page['size'], 'quality': page['quality']}
+                for i, page in enumerate(self.pages)
+            ]
+        }
+        manifest.update(self.metadata)
+        return manifest
+
+    def close(self):
+        """写入清单并关闭 ZIP"""
+        if self._zip is None:
+            return
+        try:
+            manifest = json.dumps(self.build_manifest(), ensure_ascii=False, indent=2)
+            self._zip.writestr(self._entry_name(self.MANIFEST_NAME), manifest.encode('utf-8'))
+        finally:
+            self._zip.close()
+            self._zip = None
+
+    def abort(self):
+        """出错时关闭 ZIP（不写清单）"""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def format_export_report(infos):
+    """把每页的导出结果格式化为多行文本"""
+    lines = []
+    for i, info in enumerate(infos):
+        quality = f"，质量 {info['quality']}" if info.get('quality') is not None else ''
+        over = '（超出预算）' if not info.get('within_budget', True) else ''
+        lines.append(f"第 {i + 1} 页: {info['size'] / 1024:.0f} KB{quality}{over}")
+    return '\n'.join(lines)
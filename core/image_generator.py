@@ -4,33 +4,62 @@ import textwrap
 import re
 import sys
 import logging
+import threading
+import bisect
+import json
 from datetime import datetime
 from core.logo_processor import LogoProcessor
+from core.mark_store import MarkStore
+from core.cover_layout import CoverLayout
+from core.cover_renderer import CoverRenderer
+from core.render_backends import create_backend, DEFAULT_RENDER_BACKEND
+from core.background_engine import BackgroundEngine
+from core.layout_cache import LayoutCache
+from core.output_profiles import BASE_WIDTH, BASE_HEIGHT, BASE_MARGIN, get_profile
 import unicodedata
+import hashlib
+
+# 换行/分页算法的版本，修改算法后递增，使项目文件中保存的分页方案失效
+LAYOUT_VERSION = 1
 
 class ImageGenerator:
     """
     图片生成器类
     负责将文本内容转换为图片，支持标题、正文、列表等多种格式的渲染
     """
-    def __init__(self, emoji_scale=0.5):
+    def __init__(self, emoji_scale=0.5, use_layout_cache=True, render_backend=None):
         """
         初始化图片生成器
         设置基本参数、初始化日志系统和字体加载
         
         参数:
             emoji_scale (float): emoji 表情的缩放系数，默认1.5
+            use_layout_cache (bool): 是否使用换行结果的磁盘缓存（界面和批量渲染共用）
+            render_backend (str): 文字页面的渲染后端 'pil' / 'qt'，默认读取环境变量 RENDER_BACKEND
         """
-        self.width = 1080        # 图片宽度
-        self.height = 1440       # 图片高度 (3:4 比例)
-        self.margin = 50         # 页面边距
+        # 以下尺寸均为基准单位，光栅化时按输出尺寸配置缩放
+        self.width = BASE_WIDTH    # 图片宽度
+        self.height = BASE_HEIGHT  # 图片高度 (3:4 比例)
+        self.margin = BASE_MARGIN  # 页面边距
         self.list_indent = 30    # 列表缩进
         self.emoji_scale_factor = emoji_scale  # 添加 emoji 缩放系数
-        self.logo_processor = LogoProcessor(self.width, self.height)
+        self.logo_processor = LogoProcessor()
+        self.background_engine = BackgroundEngine()  # 背景生成与缓存
+        self._scaled_fonts = {}  # (字体路径, 字号, 缩放) -> 缩放后的字体
+        self._cover_layout_cache = None  # (布局参数, 字体, CoverLayout)
+        self.cover_renderer = CoverRenderer(self)  # 封面分层缓存
+        self._block_lines = {}  # block_id -> (version, 字体样式, 换行结果)
+        self.block_lines_limit = 32768  # 内存换行缓存的条目上限，需大于单个文档的内容块数
+        self._font_hashes = {}  # (字体路径, 修改时间) -> 文件摘要
+        # 光栅化共用字体和缓存，后台导出线程与界面线程通过此锁串行绘制
+        self.render_lock = threading.RLock()
+        self.render_backend = render_backend or os.getenv('RENDER_BACKEND') or DEFAULT_RENDER_BACKEND
+        self._backends = {}  # 名称 -> 渲染后端实例
         
         # 设置日志和加载字体
         self.setup_logger()
         self.fonts = self.load_fonts()
+        self.layout_cache = LayoutCache() if use_layout_cache else None
         
     def setup_logger(self):
         """设置日志记录器"""
@@ -166,14 +195,15 @@ class ImageGenerator:
         except TypeError:
             return False
 
-    def create_images(self, text_content, background_path, font_style='normal'):
+    def create_images(self, text_content, background, font_style='normal', profile=None):
         """
         生成图片的主要方法
         
         参数:
             text_content (list): 要渲染的文本内容列表，每项包含类型和文本
-            background_path (str): 背景图片的路径
+            background: 背景配置（程序化描述或图片路径），见 BackgroundEngine
             font_style (str): 字体样式，默认为'normal'
+            profile: 输出尺寸配置名称或 OutputProfile，默认标准尺寸
         
         返回:
             list: 生成的图片列表
@@ -186,135 +216,310 @@ class ImageGenerator:
             - 处理内容溢出和分割
         """
         try:
-            images = []
-            remaining_content = text_content.copy()
+            page_plan = self.paginate(text_content, font_style)
+            return self.render_pages(page_plan, background, font_style, profile)
             
-            while remaining_content:
-                # 创建新页面
-                image = Image.new('RGB', (self.width, self.height), 'white')
-                if background_path:
-                    try:
-                        bg = Image.open(background_path)
-                        bg = bg.resize((self.width, self.height))
-                        image.paste(bg, (0, 0))
-                        self.logger.debug("背景加载成功")
-                    except Exception as e:
-                        self.logger.error(f"背景加载失败: {str(e)}")
+        except Exception as e:
+            self.logger.error(f"生成图片错误: {str(e)}")
+            raise
+    
+    def paginate(self, text_content, font_style='normal'):
+        """
+        计算分页方案
+        
+        参数:
+            text_content (list): 要渲染的文本内容列表，每项包含类型和文本
+            font_style (str): 字体样式，默认为'normal'
+        
+        返回:
+            list: 每页的内容块列表，内容块带有 wrapped_lines
+            
+        功能:
+            - 换行和分页都以基准单位计算，与输出尺寸无关
+            - 同一份分页方案可以按多个输出尺寸光栅化
+            - 用下标和行偏移遍历内容，不修改输入列表；完整放入一页的内容块直接共用换行结果，
+              只有被分割的内容块才切片，总耗时与行数成线性关系
+        """
+        # 直接使用已加载的字体对象，而不是尝试重新加载
+        if font_style not in self.fonts:
+            self.logger.error(f"未找到字体样式: {font_style}")
+            font_style = 'normal'  # 降级到默认字体
+        
+        current_font = self.fonts[font_style]
+        bottom = self.height - self.margin
+        pages = []
+        current_page_content = []
+        current_y = self.margin
+        
+        index = 0        # 当前内容块
+        line_offset = 0  # 当前内容块已放入前面页面的行数
+        metrics = None   # 当前内容块的 (换行结果, 累计行高)
+        
+        while index < len(text_content):
+            item = text_content[index]
+            try:
+                if metrics is None:
+                    # 如果内容已经预处理过，直接使用；否则换行（未修改的文本块直接使用缓存）
+                    if 'wrapped_lines' in item:
+                        wrapped_lines = item['wrapped_lines']
+                    else:
+                        wrapped_lines = self.get_block_lines(item, current_font, font_style)
+                    metrics = (wrapped_lines, self.cumulative_line_heights(wrapped_lines, item))
+                wrapped_lines, heights = metrics
+                line_count = len(wrapped_lines)
                 
-                draw = ImageDraw.Draw(image)
-                current_page_content = []
-                current_y = self.margin
+                # 计算剩余部分的高度
+                block_height = self.slice_height(heights, line_offset, line_count, item)
                 
-                # 处理当前页面的内容
-                while remaining_content:
-                    item = remaining_content[0]
-                    font_size = item.get('font_size', 48 if item['type'] == 'title' else 32)
-                    
-                    try:
-                        # 直接使用已加载的字体对象，而不是尝试重新加载
-                        if font_style not in self.fonts:
-                            self.logger.error(f"未找到字体样式: {font_style}")
-                            font_style = 'normal'  # 降级到默认字体
-                        
-                        current_font = self.fonts[font_style]
-                        
-                        # 如果内容已经预处理过，直接使用
-                        if 'wrapped_lines' in item:
-                            wrapped_lines = item['wrapped_lines']
-                        else:
-                            # 预处理文本换行
-                            max_width = self.width - (self.margin * 2)
-                            wrapped_lines = self.get_wrapped_text(item['text'], current_font, max_width)
-                        
-                        # 计算此内容块的高度
-                        block_height = self.calculate_block_height(wrapped_lines, item)
-                        
-                        # 检查是否需要新页面
-                        if current_y + block_height > self.height - self.margin:
-                            if not current_page_content:
-                                # 如果是第一个内容块且太大，需要强制分割
-                                self.logger.warning(f"内容块太大，需要分割: {block_height} > {self.height - current_y - self.margin}")
-                                
-                                # 修改这里：计算实际可用空间和每行实际高度
-                                available_height = self.height - current_y - self.margin
-                                line_spacing = item.get('line_spacing', 45)
-                                
-                                # 计算每种类型行的实际高度
-                                normal_line_height = line_spacing
-                                empty_line_height = line_spacing // 2
-                                
-                                # 计算可以放入的行数
-                                remaining_height = available_height
-                                max_lines = 0
-                                
-                                for line in wrapped_lines:
-                                    line_height = empty_line_height if not line.strip() else normal_line_height
-                                    if remaining_height >= line_height:
-                                        max_lines += 1
-                                        remaining_height -= line_height
-                                    else:
-                                        break
-                                
-                                self.logger.debug(f"可用高度: {available_height}, 计算得到可容纳行数: {max_lines}")
-                                
-                                if max_lines > 0:
-                                    # 分割内容
-                                    current_lines = wrapped_lines[:max_lines]
-                                    remaining_lines = wrapped_lines[max_lines:]
-                                    
-                                    # 创建分割后的内容块
-                                    current_item = dict(item)
-                                    current_item['wrapped_lines'] = current_lines
-                                    
-                                    remaining_item = dict(item)
-                                    remaining_item['wrapped_lines'] = remaining_lines
-                                    
-                                    # 计算实际高度以验证
-                                    current_height = self.calculate_block_height(current_lines, current_item)
-                                    self.logger.debug(f"分割后当前块实际高度: {current_height}")
-                                    
-                                    current_page_content.append(current_item)
-                                    remaining_content[0] = remaining_item
-                                    self.logger.debug(f"内容块分割完成: 当前页 {len(current_lines)} 行，剩余 {len(remaining_lines)} 行")
-                                else:
-                                    self.logger.error("页面空间不足，跳过当前内容块")
-                                    remaining_content.pop(0)
-                            break
-                        
-                        # 将预处理后的内容添加到当前页面
-                        processed_item = dict(item)
-                        processed_item['wrapped_lines'] = wrapped_lines
-                        current_page_content.append(processed_item)
-                        current_y += block_height
-                        
-                        # 从剩余内容中移除已处理的项
-                        remaining_content.pop(0)
-                    
-                    except Exception as e:
-                        self.logger.error(f"处理内容块时出错: {str(e)}")
-                        remaining_content.pop(0)
-                        continue
+                if current_y + block_height <= bottom:
+                    # 将剩余部分添加到当前页面
+                    current_page_content.append(self.page_item(item, wrapped_lines, line_offset, line_count))
+                    current_y += block_height
+                    index += 1
+                    line_offset = 0
+                    metrics = None
+                    continue
                 
-                # 渲染当前页面的内容
                 if current_page_content:
-                    self.render_text(draw, current_page_content, self.fonts[font_style])
-                    images.append(image)
-                    self.logger.info(f"完成第 {len(images)} 页")
+                    # 当前页已满，换到新页面
+                    pages.append(current_page_content)
+                    self.logger.info(f"完成第 {len(pages)} 页分页")
+                    current_page_content = []
+                    current_y = self.margin
+                    continue
+                
+                # 新页面也放不下，需要强制分割：二分查找累计行高，得到可放入的行数
+                available_height = bottom - current_y
+                self.logger.warning(f"内容块太大，需要分割: {block_height} > {available_height}")
+                max_lines = bisect.bisect_right(heights, heights[line_offset] + available_height,
+                                                line_offset) - 1 - line_offset
+                self.logger.debug(f"可用高度: {available_height}, 计算得到可容纳行数: {max_lines}")
+                
+                if max_lines > 0:
+                    current_page_content.append(
+                        self.page_item(item, wrapped_lines, line_offset, line_offset + max_lines))
+                    line_offset += max_lines
+                    self.logger.debug(f"内容块分割完成: 当前页 {max_lines} 行，剩余 {line_count - line_offset} 行")
+                    pages.append(current_page_content)
+                    self.logger.info(f"完成第 {len(pages)} 页分页")
                 else:
+                    self.logger.error("页面空间不足，跳过当前内容块")
                     self.logger.warning("当前页面没有内容可渲染")
-                
-                # 添加Logo
-                try:
-                    self.logo_processor.add_logo(images)
-                    self.logger.info("Logo添加成功")
-                except Exception as e:
-                    self.logger.error(f"Logo添加失败: {str(e)}")
+                    index += 1
+                    line_offset = 0
+                    metrics = None
+                current_page_content = []
+                current_y = self.margin
+            
+            except Exception as e:
+                self.logger.error(f"处理内容块时出错: {str(e)}")
+                index += 1
+                line_offset = 0
+                metrics = None
+        
+        if current_page_content:
+            pages.append(current_page_content)
+            self.logger.info(f"完成第 {len(pages)} 页分页")
+    
+        return pages
+    
+    def cumulative_line_heights(self, wrapped_lines, item):
+        """
+        计算累计行高，heights[i] 为前 i 行的高度（与 calculate_block_height 的行高规则一致）
+        """
+        line_spacing = item.get('line_spacing', 45)
+        half_spacing = line_spacing // 2
+        heights = [0]
+        total = 0
+        for line in wrapped_lines:
+            total += line_spacing if line.strip() else half_spacing
+            heights.append(total)
+        return heights
+    
+    def slice_height(self, heights, start, end, item):
+        """内容块第 start 到 end 行的高度，标题块末尾额外加半个行间距"""
+        if end <= start:
+            return 0
+        height = heights[end] - heights[start]
+        if item['type'] == 'title':
+            height += item.get('line_spacing', 45) // 2
+        return height
+    
+    def page_item(self, item, wrapped_lines, start, end):
+        """
+        生成分页方案中的内容块
+        整块放入时直接共用换行结果，被分割时才切片
+        """
+        page_item = dict(item)
+        if start == 0 and end == len(wrapped_lines):
+            page_item['wrapped_lines'] = wrapped_lines
+        else:
+            page_item['wrapped_lines'] = wrapped_lines[start:end]
+        return page_item
+    
+    def get_block_lines(self, item, font, font_style):
+        """
+        获取内容块换行后的文本行
+        - 带 block_id/version 的内容块（来自 DocumentModel）按版本缓存在内存中，版本未变时 O(1) 命中
+        - 内存未命中时查询磁盘缓存（按文本和字体指纹），跨会话、跨进程复用
+        - 都未命中时才重新测量换行
+        """
+        block_id = item.get('block_id')
+        if block_id is not None:
+            cached = self._block_lines.get(block_id)
+            if cached is not None and cached[0] == item.get('version') and cached[1] == font_style:
+                return cached[2]
+
+        max_width = self.width - (self.margin * 2)
+        wrapped_lines = None
+        cache_key = None
+        if self.layout_cache is not None:
+            cache_key = LayoutCache.make_key(
+                item['text'], self.font_digest(font), getattr(font, 'size', None),
+                item.get('line_spacing'), max_width, LAYOUT_VERSION)
+            wrapped_lines = self.layout_cache.get(cache_key)
+
+        if wrapped_lines is None:
+            wrapped_lines = self.get_wrapped_text(item['text'], font, max_width)
+            if cache_key is not None:
+                self.layout_cache.put(cache_key, wrapped_lines)
+
+        if block_id is not None:
+            if len(self._block_lines) >= self.block_lines_limit:
+                self._block_lines.clear()
+            self._block_lines[block_id] = (item.get('version'), font_style, wrapped_lines)
+        return wrapped_lines
+    
+    def prime_block_lines(self, item, font_style, wrapped_lines):
+        """写入已知的换行结果（例如从项目文件恢复），之后的分页不再重新换行"""
+        if item.get('block_id') is not None:
+            self._block_lines[item['block_id']] = (item.get('version'), font_style, wrapped_lines)
+    
+    def font_digest(self, font):
+        """字体文件内容的摘要（按路径和修改时间缓存），无法读取文件时返回 'default'"""
+        font_path = getattr(font, 'path', None)
+        if not isinstance(font_path, str) or not os.path.exists(font_path):
+            return 'default'
+        key = (font_path, os.path.getmtime(font_path))
+        if key not in self._font_hashes:
+            with open(font_path, 'rb') as f:
+                self._font_hashes[key] = hashlib.sha1(f.read()).hexdigest()
+        return self._font_hashes[key]
+    
+    def layout_fingerprint(self, font_style='normal'):
+        """
+        分页结果的指纹：算法版本、页面尺寸和字体文件摘要
+        指纹不同时，保存的分页方案不能直接使用
+        """
+        font = self.fonts.get(font_style, self.fonts['normal'])
+        return {
+            'layout_version': LAYOUT_VERSION,
+            'page': [self.width, self.height, self.margin],
+            'font': self.font_digest(font)
+        }
+    
+    def page_fingerprint(self, page, background, font_style='normal'):
+        """
+        单页内容的指纹：背景、字体和页面中每个内容块的换行结果
+        指纹不变时，该页的渲染结果（如缩略图）可以直接复用
+        """
+        payload = [LAYOUT_VERSION, background, font_style, [
+            [item['type'], bool(item.get('text')), item.get('font_size'), item.get('line_spacing'),
+             item['wrapped_lines']]
+            for item in page
+        ]]
+        data = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+    
+    def render_pages(self, page_plan, background, font_style='normal', profile=None, native=False):
+        """
+        按输出尺寸光栅化分页方案
+        
+        参数:
+            page_plan (list): paginate 返回的分页方案
+            background: 背景配置（程序化描述或图片路径）
+            font_style (str): 字体样式
+            profile: 输出尺寸配置名称或 OutputProfile
+            native (bool): 返回渲染后端的原生图片（Qt 后端为 QImage，界面可直接显示），默认返回 PIL.Image
+        
+        返回:
+            list: 生成的图片列表
+        """
+        profile = get_profile(profile)
+        render = self.render_page_native if native else self.render_page
+        images = []
+        for page in page_plan:
+            images.append(render(page, background, font_style, profile))
+            self.logger.info(f"完成第 {len(images)} 页 ({profile.width}x{profile.height})")
+        return images
+    
+    def render_page(self, page, background, font_style='normal', profile=None, backend=None):
+        """
+        光栅化分页方案中的一页（含 Logo）
+        
+        参数:
+            page (list): 分页方案中的一页
+            background: 背景配置（程序化描述或图片路径）
+            font_style (str): 字体样式
+            profile: 输出尺寸配置名称或 OutputProfile
+            backend (str): 渲染后端名称，默认使用初始化时的设置
+        
+        返回:
+            PIL.Image: 页面图片
+        """
+        return self.get_backend(backend).to_pil(
+            self.render_page_native(page, background, font_style, profile, backend))
+    
+    def render_page_native(self, page, background, font_style='normal', profile=None, backend=None):
+        """
+        用渲染后端光栅化一页，返回后端的原生图片（PIL 后端为 PIL.Image，Qt 后端为 QImage）
+        """
+        profile = get_profile(profile)
+        with self.render_lock:
+            backend = self.get_backend(backend)
+            base_font = self.fonts.get(font_style, self.fonts['normal'])
+            font = self.get_scaled_font(base_font, profile.scale)
             
-            return images
+            canvas = backend.new_canvas(self.get_page_background(background, profile), profile.size)
+            self.render_text(backend, canvas, page, font, profile.scale)
             
-        except Exception as e:
-            self.logger.error(f"生成图片错误: {str(e)}")
-            raise
+            # 添加Logo
+            try:
+                placement = self.logo_processor.get_placement(*profile.size)
+                if placement is not None:
+                    backend.draw_overlay(canvas, *placement)
+            except Exception as e:
+                self.logger.error(f"Logo添加失败: {str(e)}")
+            return backend.finish(canvas)
+    
+    def get_backend(self, name=None):
+        """获取渲染后端（每种后端创建一次）"""
+        name = name or self.render_backend
+        if name not in self._backends:
+            self._backends[name] = create_backend(name)
+        return self._backends[name]
+    
+    def to_pil(self, image):
+        """把任意后端的原生图片转换为 PIL.Image（用于导出）"""
+        if isinstance(image, Image.Image):
+            return image
+        return self.get_backend().to_pil(image)
+    
+    def get_scaled_font(self, font, scale):
+        """
+        获取按输出尺寸缩放后的字体（带缓存）
+        不支持缩放的字体（如位图 emoji 字体）原样返回
+        """
+        if scale == 1 or not hasattr(font, 'font_variant'):
+            return font
+        key = (getattr(font, 'path', None), font.size, scale)
+        if key not in self._scaled_fonts:
+            try:
+                self._scaled_fonts[key] = font.font_variant(size=max(1, int(round(font.size * scale))))
+            except Exception as e:
+                self.logger.debug(f"字体无法缩放，使用原始尺寸: {str(e)}")
+                self._scaled_fonts[key] = font
+        return self._scaled_fonts[key]
     
     def calculate_content_height(self, content_items, font):
         """计算内容块的总高度"""
@@ -434,25 +639,78 @@ class ImageGenerator:
             
         return first_part, second_part
     
-    def create_single_image(self, text_content, background_path, font_style='normal'):
+    def create_page_image(self, background, profile=None):
+        """
+        创建带背景的空白页面
+
+        参数:
+            background: 背景配置（程序化描述或图片路径），为空时使用白色
+            profile: 输出尺寸配置名称或 OutputProfile，默认标准尺寸
+
+        返回:
+            PIL.Image: 可直接绘制的页面图片
+        """
+        bg = self.get_page_background(background, profile)
+        if bg is not None:
+            # 缓存的背景是共享对象，复制后再绘制
+            return bg.copy()
+        return Image.new('RGB', get_profile(profile).size, 'white')
+
+    def get_page_background(self, background, profile=None):
+        """
+        获取共用的背景图片（不能直接在上面绘制），没有背景或加载失败时返回 None
+        """
+        try:
+            return self.background_engine.get_background(background, get_profile(profile).size)
+        except Exception as e:
+            self.logger.error(f"背景加载失败: {str(e)}")
+            return None
+
+    def create_cover_image(self, content, background, profile=None):
+        """
+        生成封面图片
+
+        参数:
+            content (dict): StyleTextEditor.get_content() 返回的封面内容
+            background: 背景配置（程序化描述或图片路径）
+            profile: 输出尺寸配置名称或 OutputProfile
+
+        返回:
+            PIL.Image: 封面图片
+
+        功能:
+            - 封面布局以基准单位计算并缓存，多个输出尺寸共用同一份布局
+            - 背景、文字、装饰分层缓存（见 CoverRenderer），只调整装饰时只重新绘制装饰层
+        """
+        with self.render_lock:
+            return self.cover_renderer.render(content, background, profile)
+
+    def get_cover_layout(self, content):
+        """
+        获取封面文字的布局（基准单位），文字和字体参数不变时直接使用上次的结果
+
+        返回:
+            tuple: (布局参数, 字体, CoverLayout)，布局参数可作为缓存键
+        """
+        char_spacing = content.get('char_spacing', 0)
+        line_spacing = content.get('line_spacing', 20)
+        layout_key = (content['text'], content.get('font_size', 48), content.get('font_bold', False),
+                      char_spacing, line_spacing)
+        if self._cover_layout_cache is None or self._cover_layout_cache[0] != layout_key:
+            font = self.create_font(content.get('font_size', 48), content.get('font_bold', False))
+            layout = self.layout_styled_text(content['text'], font, char_spacing, line_spacing)
+            self._cover_layout_cache = (layout_key, font, layout)
+        return self._cover_layout_cache
+
+    def create_single_image(self, text_content, background, font_style='normal'):
         """创建单个图片"""
         print("\n=== 开始创建图片 ===")
         print(f"文本内容: {text_content.get('text', '')[:50]}...")  # 只印前50个字符
         print(f"字体大小: {text_content.get('font_size', 48)}")
         print(f"是否加粗: {text_content.get('font_bold', False)}")
         
-        # 创建基础图片
-        image = Image.new('RGB', (self.width, self.height), 'white')
-        
-        # 加载背景
-        if background_path:
-            try:
-                bg = Image.open(background_path)
-                bg = bg.resize((self.width, self.height))
-                image.paste(bg, (0, 0))
-                print(f"背景图片加载成功: {background_path}")
-            except Exception as e:
-                print(f"加载背景图片失败: {str(e)}")
+        # 创建带背景的基础图片
+        image = self.create_page_image(background)
         
         # 创建绘图对象
         draw = ImageDraw.Draw(image)
@@ -815,18 +1073,34 @@ class ImageGenerator:
         
         return lines
     
-    def render_text(self, draw, text_content, font):
-        """渲染文本到图片"""
-        current_y = self.margin
+    def render_text(self, backend, canvas, text_content, font, scale=1.0):
+        """
+        渲染文本到图片
+        
+        参数:
+            backend: 渲染后端（见 core/render_backends.py）
+            canvas: 渲染后端的画布
+            text_content (list): 当前页的内容块（带 wrapped_lines）
+            font: 已按输出尺寸缩放的字体
+            scale (float): 基准单位到输出像素的缩放系数
+        
+        每行按普通文字和 emoji 分成若干段，每个字符的位置按字体宽度计算，交给渲染后端绘制。
+        """
+        current_y = self.margin  # 基准单位
         last_item_type = None
+        emoji_font = self.get_scaled_font(self.fonts['emoji'], scale)
         
         for item in text_content:
             if not item.get('text'):
                 continue
             
             lines = item['wrapped_lines']
-            font_size = item.get('font_size', 48 if item['type'] == 'title' else 32)
+            font_size = item.get('font_size', 48 if item['type'] == 'title' else 32) * scale
             line_spacing = item.get('line_spacing', 45)
+            # 计算 emoji 缩放比例，加入调整系数
+            emoji_scale = (font_size / emoji_font.size) * self.emoji_scale_factor
+            # 计算 emoji 的偏移量，使其垂直居中对齐
+            emoji_offset = (font.size - emoji_font.size * emoji_scale) // 2
             
             if last_item_type == 'title' and item['type'] == 'content':
                 current_y += line_spacing // 2
@@ -836,177 +1110,155 @@ class ImageGenerator:
                     current_y += line_spacing // 2
                     continue
                 
+                # 每个字符的前进量，emoji 考虑缩放
+                emoji_flags = [self.is_emoji(char) for char in line]
+                advances = [emoji_font.getlength(char) * emoji_scale if is_emoji else font.getlength(char)
+                            for char, is_emoji in zip(line, emoji_flags)]
+                
                 # 计算行的位置
                 if item['type'] == 'title':
-                    text_width = sum(
-                        self.fonts['emoji'].getlength(char) * (font_size / self.fonts['emoji'].size) * self.emoji_scale_factor
-                        if self.is_emoji(char) else font.getlength(char)
-                        for char in line
-                    )
-                    x = (self.width - text_width) // 2
+                    x = (self.width * scale - sum(advances)) // 2
                 else:
-                    x = self.margin
+                    x = self.margin * scale
                 
-                # 渲染文本
-                current_x = x
-                for char in line:
-                    try:
-                        if self.is_emoji(char):
-                            current_font = self.fonts['emoji']
-                            # 计算缩放比例，加入调整系数
-                            scale = (font_size / current_font.size) * self.emoji_scale_factor
-                            # 计算 emoji 的偏移量，使其垂直居中对齐
-                            emoji_offset = (font.size - current_font.size * scale) // 2
-                            
-                            # 绘制 emoji
-                            draw.text((current_x, current_y + emoji_offset), char, 
-                                    font=current_font, fill='black', embedded_color=True)
-                            # 更新水平位置，考虑缩放
-                            current_x += current_font.getlength(char) * scale
-                        else:
-                            current_font = font
-                            draw.text((current_x, current_y), char, 
-                                    font=current_font, fill='black')
-                            current_x += current_font.getlength(char)
-                    except Exception as e:
-                        self.logger.error(f"Error rendering character '{char}': {str(e)}")
-                        continue
+                # 按普通文字 / emoji 分段渲染
+                pixel_y = current_y * scale
+                start = 0
+                while start < len(line):
+                    is_emoji = emoji_flags[start]
+                    end = start
+                    positions = []
+                    while end < len(line) and emoji_flags[end] == is_emoji:
+                        positions.append(x)
+                        x += advances[end]
+                        end += 1
+                    if is_emoji:
+                        backend.draw_run(canvas, line[start:end], positions, pixel_y + emoji_offset,
+                                         emoji_font, emoji=True)
+                    else:
+                        backend.draw_run(canvas, line[start:end], positions, pixel_y, font)
+                    start = end
                 
                 current_y += line_spacing
             
             last_item_type = item['type']
     
-    def draw_styled_text(self, draw, text, marks, x, y, font, char_spacing=0, line_spacing=20):
-        """绘制带样式的文本，支持 emoji"""
-        char_width = font.getlength("测")  # 使用一个汉字宽度作为参考
-        space_width = font.getlength(" ")  # 获取空格的宽度
+    def layout_styled_text(self, text, font, char_spacing=0, line_spacing=20):
+        """
+        计算封面文字的行布局
+
+        参数:
+            text (str): 封面文本
+            font: 字体对象
+            char_spacing (int): 字间距
+            line_spacing (int): 行间距
+
+        返回:
+            CoverLayout: 每个字符的真实 x 偏移、宽度和行号
+
+        功能:
+            - 按字符的真实宽度（含 emoji 缩放）换行
+            - 文字、椭圆和下划线共用同一份布局，装饰与字形对齐
+        """
         line_height = font.size + line_spacing / 4  # 行高等于字体大小加行间距
-        
-        # 计算每行最大宽度（考虑右边距）
         max_width = self.width - (self.margin * 2)
-        
-        # 分行处理文本
+        emoji_font = self.fonts['emoji']
+        emoji_scale = (font.size / emoji_font.size) * self.emoji_scale_factor
+
+        glyphs = []
         lines = []
-        current_line = []
+        line_first = 0
         current_width = 0
-        
-        # 从左边距开始
-        x = self.margin
-        
-        # 分行处理文本
+
         for i, char in enumerate(text):
             if char == '\n':  # 处理换行符
-                if current_line:
-                    lines.append((current_line, current_width))
-                    current_line = []
+                if len(glyphs) > line_first:
+                    lines.append((line_first, len(glyphs) - 1, current_width))
+                    line_first = len(glyphs)
                     current_width = 0
                 continue
-            
-            # 计算字符宽度（包括空格）
-            char_full_width = font.getlength(char) + char_spacing
-            
+
+            # 计算字符宽度和前进量，与绘制时一致
+            is_emoji = self.is_emoji(char)
+            if is_emoji:
+                width = emoji_font.getlength(char) * emoji_scale
+                advance = width
+            else:
+                width = font.getlength(char)
+                advance = width + char_spacing
+
             # 检查是否需要换行
-            if current_width + char_full_width > max_width and current_line:
-                # 当前行已满，开始新行
-                lines.append((current_line, current_width))
-                current_line = []
+            if current_width + advance > max_width and len(glyphs) > line_first:
+                lines.append((line_first, len(glyphs) - 1, current_width))
+                line_first = len(glyphs)
                 current_width = 0
-            
-            # 添加字符到当前行
-            current_line.append((i, char))
-            current_width += char_full_width
-        
+
+            glyphs.append((i, char, len(lines), current_width, width, is_emoji))
+            current_width += advance
+
         # 添加最后一行
-        if current_line:
-            lines.append((current_line, current_width))
-        
+        if len(glyphs) > line_first:
+            lines.append((line_first, len(glyphs) - 1, current_width))
+
         # 计算总高度，确保文本垂直居中
         total_height = len(lines) * line_height
         start_y = (self.height - total_height) // 2
+
+        return CoverLayout(glyphs, lines, self.margin, start_y, line_height, font.size)
+
+    def draw_styled_text(self, draw, text, marks, x, y, font, char_spacing=0, line_spacing=20,
+                         scale=1.0, layout=None):
+        """
+        绘制带样式的文本，支持 emoji
         
-        # 先绘制椭圆（确保在文字下面）
+        参数:
+            font: 基准单位的字体，绘制时按 scale 缩放
+            scale (float): 基准单位到输出像素的缩放系数
+            layout (CoverLayout): 已计算好的布局，为空时重新计算
+        """
+        marks = MarkStore.coerce(marks)
+        if layout is None:
+            layout = self.layout_styled_text(text, font, char_spacing, line_spacing)
+        # 椭圆在文字下面，下划线在文字上面
+        self.draw_cover_ellipses(draw, layout, marks, scale)
+        self.draw_cover_glyphs(draw, layout, font, scale)
+        self.draw_cover_underlines(draw, layout, marks, scale)
+
+    def draw_cover_ellipses(self, draw, layout, marks, scale=1.0):
+        """绘制椭圆标记（只绘制同一行内的椭圆）"""
         for (start, end), style in marks.items():
             if style['type'] == 'ellipse':
-                # 找到起始和结束字符的位置
-                start_line = -1
-                end_line = -1
-                start_x = 0
-                end_x = 0
-                
-                for line_idx, (line_chars, _) in enumerate(lines):
-                    for char_idx, (text_idx, _) in enumerate(line_chars):
-                        if text_idx == start:
-                            start_line = line_idx
-                            start_x = x + char_idx * (char_width + char_spacing)
-                        if text_idx == end:
-                            end_line = line_idx
-                            end_x = x + (char_idx + 1) * (char_width + char_spacing)
-                
-                if start_line == end_line:  # 同一行
-                    ellipse_y = start_y + start_line * line_height
-                    draw.ellipse([
-                        start_x - style.get('size', 10),
-                        ellipse_y - style.get('size', 10) + style.get('position', 0),
-                        end_x + style.get('size', 10),
-                        ellipse_y + font.size + style.get('size', 10) + style.get('position', 0)
-                    ], outline=style.get('color', '#000000'), width=style.get('width', 2))
-        
-        # 绘制文字和其他样式
-        for line_idx, (line_chars, line_width) in enumerate(lines):
-            current_y = start_y + line_idx * line_height
-            current_x = x
-            
-            # 收集每行的下划线信息
-            underlines = []
-            current_underline = None
-            
-            for char_idx, (text_idx, char) in enumerate(line_chars):
-                # 检查下划线样式
-                for (start, end), style in marks.items():
-                    if style['type'] == 'underline' and start <= text_idx <= end:
-                        if current_underline is None:
-                            current_underline = {
-                                'start_x': current_x,
-                                'color': style.get('color', '#000000'),
-                                'width': style.get('width', 2),
-                                'offset': style.get('offset', 5)
-                            }
-                        current_underline['end_x'] = current_x + font.getlength(char)
-                        break
-                else:
-                    if current_underline is not None:
-                        underlines.append(current_underline)
-                        current_underline = None
-                
-                # 检查是否是 emoji
-                if self.is_emoji(char):
-                    current_font = self.fonts['emoji']
-                    # 计算缩放比例
-                    scale = (font.size / current_font.size) * self.emoji_scale_factor
-                    # 计算 emoji 的偏移量
-                    emoji_offset = (font.size - current_font.size * scale) // 2
-                    # 绘制 emoji
-                    draw.text((current_x, current_y + emoji_offset), char, 
-                             font=current_font, fill='black', embedded_color=True)
-                    current_x += current_font.getlength(char) * scale
-                else:
-                    # 绘制普通文字
-                    draw.text((current_x, current_y), char, font=font, fill='black')
-                    current_x += font.getlength(char) + char_spacing
-            
-            # 添加最后一个下划线
-            if current_underline is not None:
-                underlines.append(current_underline)
-            
-            # 绘制该行的所有下划线
-            for underline in underlines:
-                line_y = current_y + font.size + underline['offset']
-                draw.line(
-                    [(underline['start_x'], line_y), 
-                     (underline['end_x'], line_y)],
-                    fill=underline['color'],
-                    width=underline['width']
-                )
+                box = layout.ellipse_box(start, end, style)
+                if box is not None:
+                    draw.ellipse([v * scale for v in box],
+                                 outline=style.get('color', '#000000'),
+                                 width=max(1, int(round(style.get('width', 2) * scale))))
+
+    def draw_cover_glyphs(self, draw, layout, font, scale=1.0):
+        """按布局绘制封面文字"""
+        draw_font = self.get_scaled_font(font, scale)
+        emoji_font = self.get_scaled_font(self.fonts['emoji'], scale)
+        emoji_scale = (font.size * scale / emoji_font.size) * self.emoji_scale_factor
+        emoji_offset = (draw_font.size - emoji_font.size * emoji_scale) // 2
+        for _, char, line_idx, char_x, _, is_emoji in layout.glyphs:
+            current_x = (layout.origin_x + char_x) * scale
+            current_y = layout.line_y(line_idx) * scale
+            if is_emoji:
+                draw.text((current_x, current_y + emoji_offset), char,
+                          font=emoji_font, fill='black', embedded_color=True)
+            else:
+                draw.text((current_x, current_y), char, font=draw_font, fill='black')
+
+    def draw_cover_underlines(self, draw, layout, marks, scale=1.0):
+        """绘制下划线标记（跨行时每行一段）"""
+        for (start, end), style in marks.items():
+            if style['type'] == 'underline':
+                for x0, line_y, x1 in layout.underline_segments(start, end, style):
+                    draw.line(
+                        [(x0 * scale, line_y * scale), (x1 * scale, line_y * scale)],
+                        fill=style.get('color', '#000000'),
+                        width=max(1, int(round(style.get('width', 2) * scale)))
+                    )
     
     def create_font(self, size, is_bold=False):
         """
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from utils.app_paths import get_cache_dir
+
+
+class LayoutCache:
+    """
+    换行结果的磁盘缓存（SQLite，WAL 模式）
+
+    功能:
+        - 键为 (文本, 字体文件摘要, 字号, 行间距, 最大宽度, 排版版本) 的 sha256
+        - 按总大小淘汰最久未使用的条目
+        - 命中时的使用时间先记在内存中，写入、淘汰时（或积累一定数量后）一次写回，读取不写数据库
+        - 界面和批量渲染等多个进程可以同时读写同一个缓存文件
+        - 缓存出错（包括无法创建缓存目录）时只记录日志，不影响正常排版
+    """
+
+    def __init__(self, path=None, max_bytes=64 * 1024 * 1024, max_pending_touches=256):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_pending_touches = max_pending_touches
+        self.enabled = True
+        self._local = threading.local()  # sqlite 连接不能跨线程使用，每个线程一个连接
+        self._puts = 0
+        self._touched = {}  # 键 -> 命中时间，还没有写回数据库
+        self._touched_lock = threading.Lock()
+        self.logger = logging.getLogger('LayoutCache')
+
+        try:
+            if self.path is None:
+                self.path = os.path.join(get_cache_dir(), 'layout_cache.sqlite3')
+            conn = self._connect()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS layouts (
+                    key TEXT PRIMARY KEY,
+                    lines TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_layouts_last_used ON layouts(last_used)")
+            self.logger.info(f"换行缓存: {self.path}")
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+
+    @staticmethod
+    def make_key(text, font_digest, font_size, line_spacing, max_width, layout_version):
+        """生成缓存键"""
+        payload = json.dumps([layout_version, font_digest, font_size, line_spacing, max_width, text],
+                             ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _disable(self, error):
+        self.enabled = False
+        self.logger.warning(f"换行缓存不可用，已禁用: {str(error)}")
+
+    def get(self, key):
+        """
+        读取缓存
+
+        返回:
+            list: 换行后的文本行，未命中时返回 None
+        """
+        if not self.enabled:
+            return None
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT lines FROM layouts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            lines = json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            self.logger.warning(f"读取换行缓存失败: {str(e)}")
+            return None
+
+        with self._touched_lock:
+            self._touched[key] = time.time()
+            pending = len(self._touched)
+        if pending >= self.max_pending_touches:
+            self.flush_touches()
+        return lines
+
+    def flush_touches(self):
+        """把内存中记录的命中时间一次写回数据库"""
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+        if not touched or not self.enabled:
+            return
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany("UPDATE layouts SET last_used = ? WHERE key = ?",
+                                 [(used, key) for key, used in touched.items()])
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            self.logger.warning(f"更新换行缓存使用时间失败: {str(e)}")
+
+    def put(self, key, lines):
+        """写入缓存，每写入一定次数检查一次总大小"""
+        if not self.enabled:
+            return
+        data = json.dumps(lines, ensure_ascii=False)
+        self.flush_touches()
+        try:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO layouts (key, lines, size, last_used) VALUES (?, ?, ?, ?)",
+                         (key, data, len(data.encode('utf-8')), time.time()))
+        except sqlite3.Error as e:
+            self.logger.warning(f"写入换行缓存失败: {str(e)}")
+            return
+
+        self._puts += 1
+        if self._puts % 64 == 0:
+            self.evict()
+
+    def total_bytes(self):
+        if not self.enabled:
+            return 0
+        row = self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM layouts").fetchone()
+        return row[0]
+
+    def evict(self):
+        """总大小超过上限时，删除最久未使用的条目直到降到上限的 80%"""
+        if not self.enabled:
+            return 0
+        self.flush_touches()
+        try:
+            conn = self._connect()
+            total = self.total_bytes()
+            if total <= self.max_bytes:
+                return 0
+
+            target = int(self.max_bytes * 0.8)
+            removed = 0
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute("SELECT key, size FROM layouts ORDER BY last_used").fetchall()
+                keys = []
+                for key, size in rows:
+                    if total <= target:
+                        break
+                    keys.append((key,))
+                    total -= size
+                conn.executemany("DELETE FROM layouts WHERE key = ?", keys)
+                removed = len(keys)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            self.logger.info(f"换行缓存淘汰 {removed} 条")
+            return removed
+        except sqlite3.Error as e:
+            self.logger.warning(f"清理换行缓存失败: {str(e)}")
+            return 0
+
+    def clear(self):
+        if self.enabled:
+            self._connect().execute("DELETE FROM layouts")
+
+    def close(self):
+        """写回命中时间并关闭当前线程的连接"""
+        self.flush_touches()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -3,84 +3,105 @@ import os
 import sys
 import logging
 import traceback
+from core.output_profiles import BASE_WIDTH
 
 class LogoProcessor:
-    def __init__(self, width, height):
-        self.width = width
-        self.height = height
+    def __init__(self):
+        # Logo 尺寸和边距使用基准单位，按图片宽度缩放
+        self.logo_height = 50
+        self.margin = 20
+        self._logo = None          # 解码后的原始 logo
+        self._scaled_logos = {}    # 目标高度 -> 缩放后的 logo
         self.setup_logger()
-        
+
     def setup_logger(self):
         """配置日志"""
         self.logger = logging.getLogger('LogoProcessor')
         if not self.logger.handlers:
             self.logger.setLevel(logging.DEBUG)
             formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-            
+
             # 添加控制台处理器
             console_handler = logging.StreamHandler()
             console_handler.setFormatter(formatter)
             self.logger.addHandler(console_handler)
-    
-    def add_logo(self, images):
-        """为图片添加Logo"""
-        try:
-            # 获取 logo 路径
-            if hasattr(sys, '_MEIPASS'):
-                logo_path = os.path.join(sys._MEIPASS, 'resources', 'icons', 'logo.png')
-            else:
-                logo_path = os.path.join('resources', 'icons', 'logo.png')
-            
-            self.logger.info("\n=== 添加 Logo ===")
+
+    def get_logo_path(self):
+        """获取 logo 路径"""
+        if hasattr(sys, '_MEIPASS'):
+            return os.path.join(sys._MEIPASS, 'resources', 'icons', 'logo.png')
+        return os.path.join('resources', 'icons', 'logo.png')
+
+    def get_logo(self, logo_height):
+        """获取指定高度的 logo（解码和缩放结果都会缓存），文件不存在时返回 None"""
+        if logo_height in self._scaled_logos:
+            return self._scaled_logos[logo_height]
+
+        if self._logo is None:
+            logo_path = self.get_logo_path()
+            self.logger.info("\n=== 加载 Logo ===")
             self.logger.info(f"Logo 路径: {logo_path}")
-            self.logger.info(f"Logo 文件是否存在: {os.path.exists(logo_path)}")
-            
-            if os.path.exists(logo_path):
-                # 加载并处理logo
-                with Image.open(logo_path) as logo:
-                    # 确保logo是RGBA模式
-                    logo = logo.convert('RGBA')
-                    self.logger.debug(f"Logo 模式: {logo.mode}")
-                    self.logger.debug(f"原始 Logo 尺寸: {logo.size}")
-                    
-                    # 调整logo大小
-                    logo_height = 50  # 增大logo尺寸
-                    aspect_ratio = logo.width / logo.height
-                    logo_width = int(logo_height * aspect_ratio)
-                    logo = logo.resize((logo_width, logo_height), Image.Resampling.LANCZOS)
-                    self.logger.debug(f"调整后的 Logo 尺寸: {logo.size}")
-                    
-                    # 计算位置
-                    margin = 20
-                    x = margin
-                    y = self.height - logo_height - margin
-                    self.logger.debug(f"Logo 位置: ({x}, {y})")
-                    
-                    # 为每个图片添加logo
-                    for i, image in enumerate(images):
-                        try:
-                            # 创建新的图片副本
-                            new_image = image.copy()
-                            new_image = new_image.convert('RGBA')
-                            
-                            # 创建透明图层
-                            overlay = Image.new('RGBA', new_image.size, (0, 0, 0, 0))
-                            overlay.paste(logo, (x, y), logo)
-                            
-                            # 合并图层
-                            result = Image.alpha_composite(new_image, overlay)
-                            images[i] = result.convert('RGB')
-                            
-                            self.logger.debug(f"成功添加Logo到第 {i+1} 张图片")
-                        except Exception as e:
-                            self.logger.error(f"处理第 {i+1} 张图片时出错: {str(e)}")
-                            self.logger.error(traceback.format_exc())
-                            continue
-                    
-                    self.logger.info("Logo 添加成功")
-            else:
+            if not os.path.exists(logo_path):
                 self.logger.warning(f"Logo 文件不存在: {logo_path}")
-                
+                return None
+            with Image.open(logo_path) as logo:
+                # 确保logo是RGBA模式
+                self._logo = logo.convert('RGBA')
+            self.logger.debug(f"原始 Logo 尺寸: {self._logo.size}")
+
+        # 调整logo大小
+        aspect_ratio = self._logo.width / self._logo.height
+        logo_width = int(logo_height * aspect_ratio)
+        logo = self._logo.resize((logo_width, logo_height), Image.Resampling.LANCZOS)
+        self.logger.debug(f"调整后的 Logo 尺寸: {logo.size}")
+        self._scaled_logos[logo_height] = logo
+        return logo
+
+    def get_placement(self, width, height):
+        """
+        计算 logo 在指定尺寸图片上的位置（左下角，按图片宽度缩放）
+
+        返回:
+            tuple: (缩放后的 logo, (x, y))，logo 文件不存在时返回 None
+        """
+        scale = width / BASE_WIDTH
+        logo_height = max(1, int(round(self.logo_height * scale)))
+        logo = self.get_logo(logo_height)
+        if logo is None:
+            return None
+        margin = int(round(self.margin * scale))
+        return logo, (margin, height - logo_height - margin)
+
+    def add_logo(self, images):
+        """为图片添加Logo（按每张图片的宽度缩放 logo 和边距）"""
+        try:
+            # 为每个图片添加logo
+            for i, image in enumerate(images):
+                try:
+                    placement = self.get_placement(image.width, image.height)
+                    if placement is None:
+                        return
+                    logo, (x, y) = placement
+
+                    # 创建新的图片副本
+                    new_image = image.convert('RGBA')
+
+                    # 创建透明图层
+                    overlay = Image.new('RGBA', new_image.size, (0, 0, 0, 0))
+                    overlay.paste(logo, (x, y), logo)
+
+                    # 合并图层
+                    result = Image.alpha_composite(new_image, overlay)
+                    images[i] = result.convert('RGB')
+
+                    self.logger.debug(f"成功添加Logo到第 {i+1} 张图片")
+                except Exception as e:
+                    self.logger.error(f"处理第 {i+1} 张图片时出错: {str(e)}")
+                    self.logger.error(traceback.format_exc())
+                    continue
+
+            self.logger.info("Logo 添加成功")
+
         except Exception as e:
             self.logger.error(f"添加 Logo 失败: {str(e)}")
-            self.logger.error(traceback.format_exc()) 
\ No newline at end of file
+            self.logger.error(traceback.format_exc())
@@ -0,0 +1,344 @@
+import random
+
+_MISSING = object()
+
+
+def diff_text_edit(old_text, new_text):
+    """
+    比较编辑前后的文本，推算出一次连续编辑
+
+    参数:
+        old_text (str): 编辑前的文本
+        new_text (str): 编辑后的文本
+
+    返回:
+        tuple: (position, chars_removed, chars_added)，文本未变化时返回 None
+    """
+    if old_text == new_text:
+        return None
+
+    # 公共前缀
+    limit = min(len(old_text), len(new_text))
+    prefix = 0
+    while prefix < limit and old_text[prefix] == new_text[prefix]:
+        prefix += 1
+
+    # 公共后缀（不能与前缀重叠）
+    suffix = 0
+    while (suffix < limit - prefix and
+           old_text[len(old_text) - 1 - suffix] == new_text[len(new_text) - 1 - suffix]):
+        suffix += 1
+
+    return prefix, len(old_text) - prefix - suffix, len(new_text) - prefix - suffix
+
+
+class _MarkNode:
+    """树堆节点，按 (start, end) 排序，并维护子树内最大的 end；同一区间的多个样式保存在一个节点中"""
+    __slots__ = ('start', 'end', 'styles', 'priority', 'left', 'right', 'max_end', 'lazy')
+
+    def __init__(self, start, end, styles, priority):
+        self.start = start
+        self.end = end
+        self.styles = styles
+        self.priority = priority
+        self.left = None
+        self.right = None
+        self.max_end = end
+        self.lazy = 0  # 尚未下推到子节点的偏移量
+
+
+class MarkStore:
+    """
+    封面样式标记存储
+    以区间树（带最大端点的树堆）保存 (start, end) -> style 的标记，end 为闭区间
+
+    功能:
+        - 接口与原来的 dict 兼容（items/keys/[]/del 等）
+        - 文本插入、删除时平移标记位置，而不是清空所有标记
+        - 删除文字后两个标记可能落到同一区间，这时两个都保留（items 中同一区间出现多次，
+          [] 和 get 返回第一个，get_all 返回全部，len 为标记总数）
+        - 点查询和区间重叠查询为对数复杂度（加上命中数量）
+    """
+
+    def __init__(self, marks=None):
+        self._root = None
+        self._count = 0
+        self._random = random.Random()
+        if marks:
+            pairs = marks.items() if hasattr(marks, 'items') else marks
+            for key, style in pairs:
+                self.add(key, style)
+
+    @classmethod
+    def from_dict(cls, marks):
+        """从 {(start, end): style} 字典创建"""
+        return cls(marks)
+
+    @classmethod
+    def coerce(cls, marks):
+        """把 dict 或 None 转换为 MarkStore，已是 MarkStore 时原样返回"""
+        if isinstance(marks, cls):
+            return marks
+        return cls(marks or {})
+
+    # ---------- 树堆基础操作 ----------
+
+    @staticmethod
+    def _push_down(node):
+        if node.lazy:
+            for child in (node.left, node.right):
+                if child is not None:
+                    child.start += node.lazy
+                    child.end += node.lazy
+                    child.max_end += node.lazy
+                    child.lazy += node.lazy
+            node.lazy = 0
+
+    @staticmethod
+    def _update(node):
+        max_end = node.end
+        if node.left is not None and node.left.max_end > max_end:
+            max_end = node.left.max_end
+        if node.right is not None and node.right.max_end > max_end:
+            max_end = node.right.max_end
+        node.max_end = max_end
+
+    @staticmethod
+    def _shift(node, delta):
+        if node is not None and delta:
+            node.start += delta
+            node.end += delta
+            node.max_end += delta
+            node.lazy += delta
+
+    def _split(self, node, key):
+        """拆分为 (key 之前的节点, key 及之后的节点)"""
+        if node is None:
+            return None, None
+        self._push_down(node)
+        if (node.start, node.end) < key:
+            node.right, right = self._split(node.right, key)
+            self._update(node)
+            return node, right
+        left, node.left = self._split(node.left, key)
+        self._update(node)
+        return left, node
+
+    def _merge(self, left, right):
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            self._push_down(left)
+            left.right = self._merge(left.right, right)
+            self._update(left)
+            return left
+        self._push_down(right)
+        right.left = self._merge(left, right.left)
+        self._update(right)
+        return right
+
+    def _walk(self, node, result):
+        """中序遍历，返回 [(start, end, styles), ...]"""
+        if node is None:
+            return result
+        self._push_down(node)
+        self._walk(node.left, result)
+        result.append((node.start, node.end, node.styles))
+        self._walk(node.right, result)
+        return result
+
+    def _collect_overlaps(self, node, start, end, result):
+        if node is None or node.max_end < start:
+            return
+        self._push_down(node)
+        self._collect_overlaps(node.left, start, end, result)
+        if node.start <= end:
+            if node.end >= start:
+                result.append((node.start, node.end, node.styles))
+            self._collect_overlaps(node.right, start, end, result)
+
+    # ---------- dict 兼容接口 ----------
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        style = self.get(key)
+        if style is None:
+            raise KeyError(key)
+        return style
+
+    def __setitem__(self, key, style):
+        """设置区间的样式（替换该区间原有的所有标记）"""
+        self._insert(key, [style], replace=True)
+
+    def __delitem__(self, key):
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def __repr__(self):
+        return f"MarkStore({self.to_dict()!r})"
+
+    def _insert(self, key, styles, replace=False):
+        """把样式加入区间 key 的节点（replace 为 True 时替换原有样式）"""
+        start, end = key
+        left, right = self._split(self._root, (start, end))
+        same, right = self._split(right, (start, end + 1))
+        if same is not None:
+            self._count -= len(same.styles)
+            if not replace:
+                styles = same.styles + styles
+        self._count += len(styles)
+        node = _MarkNode(start, end, styles, self._random.random())
+        self._root = self._merge(self._merge(left, node), right)
+
+    def add(self, key, style):
+        """添加一个标记，区间已有标记时两者都保留"""
+        self._insert(key, [style])
+
+    def _find(self, key):
+        start, end = key
+        node = self._root
+        while node is not None:
+            self._push_down(node)
+            node_key = (node.start, node.end)
+            if node_key == (start, end):
+                return node
+            node = node.left if (start, end) < node_key else node.right
+        return None
+
+    def get(self, key, default=None):
+        node = self._find(key)
+        return node.styles[0] if node is not None else default
+
+    def get_all(self, key):
+        """返回区间 key 上的所有样式"""
+        node = self._find(key)
+        return list(node.styles) if node is not None else []
+
+    def pop(self, key, default=None):
+        """删除区间 key 上的所有标记，返回第一个样式"""
+        start, end = key
+        left, right = self._split(self._root, (start, end))
+        same, right = self._split(right, (start, end + 1))
+        self._root = self._merge(left, right)
+        if same is None:
+            return default
+        self._count -= len(same.styles)
+        return same.styles[0]
+
+    def items(self):
+        return [((start, end), style)
+                for start, end, styles in self._walk(self._root, []) for style in styles]
+
+    def keys(self):
+        return [(start, end) for start, end, _ in self._walk(self._root, [])]
+
+    def values(self):
+        return [style for _, style in self.items()]
+
+    def clear(self):
+        self._root = None
+        self._count = 0
+
+    def copy(self):
+        """复制标记（样式字典也复制一份，副本不受原对象之后修改的影响）"""
+        return MarkStore([(key, dict(style)) for key, style in self.items()])
+
+    def to_dict(self):
+        """转换为 dict（同一区间有多个标记时只保留第一个）"""
+        return {(start, end): styles[0] for start, end, styles in self._walk(self._root, [])}
+
+    # ---------- 区间查询 ----------
+
+    def overlapping(self, start, end):
+        """返回与闭区间 [start, end] 重叠的标记 [((s, e), style), ...]，按起点排序"""
+        result = []
+        self._collect_overlaps(self._root, start, end, result)
+        return [((s, e), style) for s, e, styles in result for style in styles]
+
+    def first_overlapping(self, start, end):
+        """返回第一个与 [start, end] 重叠的标记，没有时返回 None"""
+        hits = self.overlapping(start, end)
+        return hits[0] if hits else None
+
+    def at(self, index):
+        """返回覆盖某个字符位置的所有标记"""
+        return self.overlapping(index, index)
+
+    # ---------- 文本编辑时的位置平移 ----------
+
+    def apply_edit(self, position, chars_removed, chars_added):
+        """
+        根据一次文本编辑平移标记
+
+        参数:
+            position (int): 编辑发生的位置
+            chars_removed (int): 删除的字符数
+            chars_added (int): 插入的字符数
+        """
+        if chars_removed > 0:
+            self._apply_delete(position, chars_removed)
+        if chars_added > 0:
+            self._apply_insert(position, chars_added)
+
+    def _apply_insert(self, position, count):
+        # 起点在插入点之后的标记整体后移
+        left, right = self._split(self._root, (position, float('-inf')))
+        self._shift(right, count)
+
+        # 跨越插入点的标记向后延长
+        spanning = []
+        self._collect_overlaps(left, position, float('inf'), spanning)
+        self._root = left
+        for start, end, styles in spanning:
+            self._count -= len(styles)
+            self._root = self._merge_key_out(start, end)
+        self._root = self._merge(self._root, right)
+        for start, end, styles in spanning:
+            self._insert((start, end + count), styles)
+
+    def _apply_delete(self, position, count):
+        deleted_end = position + count
+        left, rest = self._split(self._root, (position, float('-inf')))
+        middle, right = self._split(rest, (deleted_end, float('-inf')))
+        self._shift(right, -count)
+
+        # 起点落在删除范围内的标记：整个被删除的丢弃，剩余部分移到删除点
+        survivors = []
+        for start, end, styles in self._walk(middle, []):
+            self._count -= len(styles)
+            if end >= deleted_end:
+                survivors.append((position, end - count, styles))
+
+        # 跨越删除起点的标记：缩短结尾
+        spanning = []
+        self._collect_overlaps(left, position, float('inf'), spanning)
+        self._root = left
+        for start, end, styles in spanning:
+            self._count -= len(styles)
+            self._root = self._merge_key_out(start, end)
+            new_end = end - count if end >= deleted_end else position - 1
+            survivors.append((start, new_end, styles))
+
+        self._root = self._merge(self._root, right)
+        # 平移后可能与其他标记落到同一区间，合并到同一节点而不是覆盖
+        for start, end, styles in survivors:
+            self._insert((start, end), styles)
+
+    def _merge_key_out(self, start, end):
+        """从当前根中摘除指定键的节点（调用方负责计数）"""
+        left, right = self._split(self._root, (start, end))
+        _, right = self._split(right, (start, end + 1))
+        return self._merge(left, right)
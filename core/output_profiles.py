@@ -0,0 +1,61 @@
+from collections import OrderedDict
+
+# 布局使用的基准单位：所有分页、换行和位置都按 1080x1440 计算，光栅化时再按输出尺寸缩放
+BASE_WIDTH = 1080
+BASE_HEIGHT = 1440
+BASE_MARGIN = 50
+
+
+class OutputProfile:
+    """
+    输出尺寸配置
+
+    属性:
+        name (str): 配置名称
+        label (str): 界面显示名称
+        width (int): 输出宽度（像素）
+        height (int): 输出高度（像素）
+        scale (float): 相对基准单位的缩放系数
+    """
+
+    def __init__(self, name, label, width, height):
+        self.name = name
+        self.label = label
+        self.width = width
+        self.height = height
+        self.scale = width / BASE_WIDTH
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    def scaled(self, value):
+        """把基准单位换算为该尺寸下的像素"""
+        return value * self.scale
+
+    def __repr__(self):
+        return f"OutputProfile({self.name!r}, {self.width}x{self.height})"
+
+
+OUTPUT_PROFILES = OrderedDict((profile.name, profile) for profile in [
+    OutputProfile('standard', '标准 1080×1440', 1080, 1440),
+    OutputProfile('large', '高清 1242×1656', 1242, 1656),
+    OutputProfile('retina', '2x 视网膜 2160×2880', 2160, 2880),
+])
+
+DEFAULT_PROFILE = 'standard'
+
+
+def get_profile(profile=None):
+    """
+    获取输出尺寸配置
+
+    参数:
+        profile: 配置名称、OutputProfile 对象或 None（使用默认配置）
+
+    返回:
+        OutputProfile: 对应的配置，名称未知时返回默认配置
+    """
+    if isinstance(profile, OutputProfile):
+        return profile
+    return OUTPUT_PROFILES.get(profile or DEFAULT_PROFILE, OUTPUT_PROFILES[DEFAULT_PROFILE])
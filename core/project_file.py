@@ -0,0 +1,283 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+
+from core.mark_store import MarkStore
+
+# 项目文件（.rbp）：每行一条 JSON 记录的追加式日志
+#   header  文件格式和版本（第一行）
+#   editor  文本编辑的字号和行间距
+#   block   一个文本块的完整内容（同一 id 以最后一条为准）
+#   remove  删除文本块
+#   order   文本块顺序
+#   cover   封面文字、标记和排版参数
+#   style   样式面板状态
+#   layout  计算好的分页方案和字体/版本指纹，可为 null
+# 保存时只追加有变化的记录，日志明显大于有效内容时整体重写（压缩）
+
+PROJECT_FORMAT = 'rbp'
+PROJECT_VERSION = 1
+PROJECT_EXTENSION = '.rbp'
+
+
+def content_hash(items):
+    """计算文本块内容的摘要，用于判断保存的分页方案是否仍然有效"""
+    digest = hashlib.sha1()
+    for item in items:
+        digest.update(json.dumps(
+            [item['type'], item['text'], item.get('line_spacing'), item.get('font_size')],
+            ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def serialize_page_plan(page_plan):
+    """
+    把分页方案转换为紧凑的可保存格式
+
+    参数:
+        page_plan (list): ImageGenerator.paginate 的结果
+
+    返回:
+        dict: {'lines': {block_id: 换行结果}, 'pages': [[[block_id, 起始行, 结束行], ...], ...]}，
+              有内容块没有 block_id（如 Markdown 内容）时返回 None
+    """
+    lines = {}
+    pages = []
+    for page in page_plan:
+        page_refs = []
+        for item in page:
+            block_id = item.get('block_id')
+            if block_id is None:
+                return None
+            block_lines = lines.setdefault(str(block_id), [])
+            start = len(block_lines)
+            block_lines.extend(item['wrapped_lines'])
+            page_refs.append([block_id, start, len(block_lines)])
+        pages.append(page_refs)
+    return {'lines': lines, 'pages': pages}
+
+
+def restore_page_plan(layout, items):
+    """
+    用当前文本块恢复保存的分页方案
+
+    参数:
+        layout (dict): serialize_page_plan 的结果
+        items (list): 当前文本块的内容字典（带 block_id）
+
+    返回:
+        tuple: (分页方案, {block_id: 换行结果})，文本块对不上时返回 (None, None)
+    """
+    items_by_id = {item['block_id']: item for item in items}
+    block_lines = {int(block_id): lines for block_id, lines in layout['lines'].items()}
+    if set(block_lines) != set(items_by_id):
+        return None, None
+
+    page_plan = []
+    for page_refs in layout['pages']:
+        page = []
+        for block_id, start, end in page_refs:
+            page_item = dict(items_by_id[block_id])
+            page_item['wrapped_lines'] = block_lines[block_id][start:end]
+            page.append(page_item)
+        page_plan.append(page)
+    return page_plan, block_lines
+
+
+def encode_cover(content):
+    """把封面内容转换为可保存的格式（标记保存为 [起点, 终点, 样式] 列表）"""
+    cover = dict(content)
+    cover['marks'] = [[start, end, style] for (start, end), style in content.get('marks', {}).items()]
+    return cover
+
+
+def decode_cover(cover):
+    """encode_cover 的逆操作"""
+    content = dict(cover)
+    content['marks'] = MarkStore(((start, end), style) for start, end, style in cover.get('marks', []))
+    return content
+
+
+class ProjectFile:
+    """
+    项目文件读写
+
+    用法:
+        project = ProjectFile(path)
+        project.save(state)           # 第一次完整写入，之后只追加变化
+        project, state = ProjectFile.load(path)
+
+    state 字典:
+        editor (dict), blocks (list[dict 带 block_id]), cover (dict), style (dict), layout (dict 或 None)
+    """
+
+    def __init__(self, path, compact_ratio=2.0, compact_min_bytes=64 * 1024):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self._written = {}      # 记录键 -> 已写入的序列化内容
+        self._file_bytes = 0    # 日志文件当前大小
+        self.logger = logging.getLogger('ProjectFile')
+
+    # ---------- 记录 ----------
+
+    @staticmethod
+    def _dumps(record):
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+    @staticmethod
+    def build_records(state):
+        """把项目状态转换为 {记录键: 记录}"""
+        records = {
+            'editor': {'kind': 'editor', 'editor': state.get('editor', {})},
+            'style': {'kind': 'style', 'style': state.get('style', {})},
+            'cover': {'kind': 'cover', 'cover': state.get('cover', {})},
+            'order': {'kind': 'order', 'ids': [block['block_id'] for block in state.get('blocks', [])]},
+            'layout': {'kind': 'layout', 'layout': state.get('layout')},
+        }
+        for block in state.get('blocks', []):
+            records[f"block:{block['block_id']}"] = {
+                'kind': 'block',
+                'id': block['block_id'],
+                'type': block['type'],
+                'text': block['text'],
+                'line_spacing': block.get('line_spacing'),
+                'font_size': block.get('font_size')
+            }
+        return records
+
+    def _header(self):
+        return self._dumps({'kind': 'header', 'format': PROJECT_FORMAT, 'version': PROJECT_VERSION,
+                            'created': datetime.now().isoformat(timespec='seconds')})
+
+    # ---------- 保存 ----------
+
+    def save(self, state):
+        """
+        保存项目：文件不存在时完整写入，否则只追加有变化的记录
+
+        返回:
+            int: 本次写入的记录数
+        """
+        records = {key: self._dumps(record) for key, record in self.build_records(state).items()}
+
+        if not self._written or not os.path.exists(self.path):
+            return self.compact(state, records)
+
+        lines = [line for key, line in records.items() if self._written.get(key) != line]
+        removed = [key for key in self._written if key.startswith('block:') and key not in records]
+        lines.extend(self._dumps({'kind': 'remove', 'id': int(key.split(':', 1)[1])}) for key in removed)
+
+        if not lines:
+            self.logger.info("项目没有变化，跳过保存")
+            return 0
+
+        data = ''.join(line + '\n' for line in lines).encode('utf-8')
+        with open(self.path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._file_bytes += len(data)
+
+        for key in removed:
+            del self._written[key]
+        self._written.update((key, line) for key, line in records.items())
+        self.logger.info(f"增量保存 {len(lines)} 条记录到 {self.path}")
+
+        # 日志明显大于有效内容时压缩
+        live_bytes = sum(len(line.encode('utf-8')) + 1 for line in self._written.values())
+        if self._file_bytes > max(self.compact_min_bytes, live_bytes * self.compact_ratio):
+            self.compact(state, records)
+        return len(lines)
+
+    def compact(self, state, records=None):
+        """完整重写项目文件（先写临时文件再替换，避免写入中断损坏项目）"""
+        if records is None:
+            records = {key: self._dumps(record) for key, record in self.build_records(state).items()}
+
+        lines = [self._header()] + list(records.values())
+        data = ''.join(line + '\n' for line in lines).encode('utf-8')
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+        self._written = dict(records)
+        self._file_bytes = len(data)
+        self.logger.info(f"完整写入项目文件 {self.path}（{len(data) // 1024} KB）")
+        return len(lines)
+
+    # ---------- 读取 ----------
+
+    @classmethod
+    def load(cls, path):
+        """
+        读取项目文件，按顺序重放所有记录
+
+        返回:
+            tuple: (ProjectFile, state)
+
+        异常:
+            ValueError: 不是项目文件或版本过新
+        """
+        project = cls(path)
+        state = {'editor': {}, 'blocks': [], 'cover': {}, 'style': {}, 'layout': None}
+        blocks = {}
+        order = []
+        truncated = False
+
+        with open(path, 'rb') as f:
+            raw_lines = f.read().decode('utf-8').split('\n')
+
+        for number, line in enumerate(raw_lines):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if number >= len(raw_lines) - 2:
+                    # 最后一行写入中断，忽略
+                    project.logger.warning(f"忽略不完整的最后一条记录: {path}")
+                    truncated = True
+                    continue
+                raise ValueError(f"项目文件第 {number + 1} 行损坏")
+
+            kind = record.get('kind')
+            if number == 0:
+                if kind != 'header' or record.get('format') != PROJECT_FORMAT:
+                    raise ValueError("不是有效的项目文件")
+                if record.get('version', 0) > PROJECT_VERSION:
+                    raise ValueError(f"项目文件版本 {record.get('version')} 过新，请升级程序")
+                continue
+
+            if kind == 'block':
+                blocks[record['id']] = record
+                project._written[f"block:{record['id']}"] = cls._dumps(record)
+            elif kind == 'remove':
+                blocks.pop(record['id'], None)
+                project._written.pop(f"block:{record['id']}", None)
+            elif kind == 'order':
+                order = record['ids']
+                project._written['order'] = cls._dumps(record)
+            elif kind in ('editor', 'style', 'cover', 'layout'):
+                state[kind] = record[kind]
+                project._written[kind] = cls._dumps(record)
+            else:
+                project.logger.warning(f"忽略未知记录类型: {kind}")
+
+        state['blocks'] = [
+            {'block_id': block_id, 'type': blocks[block_id]['type'], 'text': blocks[block_id]['text'],
+             'line_spacing': blocks[block_id].get('line_spacing'),
+             'font_size': blocks[block_id].get('font_size')}
+            for block_id in order if block_id in blocks
+        ]
+        project._file_bytes = os.path.getsize(path)
+        if truncated:
+            # 下次保存时完整重写，避免在损坏的行之后继续追加
+            project._written.clear()
+        project.logger.info(f"读取项目文件 {path}: {len(state['blocks'])} 个文本块")
+        return project, state
@@ -0,0 +1,255 @@
+import logging
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw
+
+try:
+    from PyQt6.QtCore import QPointF
+    from PyQt6.QtGui import (QImage, QPainter, QFont, QFontDatabase, QColor, QGuiApplication,
+                             QRawFont, QGlyphRun)
+except ImportError:  # 没有 PyQt6 时（如只做批量渲染）只能使用 PIL 后端
+    QImage = None
+
+
+# 这些表说明字体带彩色字形（emoji），需要 drawText 才能按颜色绘制
+COLOR_FONT_TABLES = ('COLR', 'CBDT', 'sbix')
+
+
+class PILCanvas:
+    """PIL 后端的画布"""
+
+    def __init__(self, image):
+        self.image = image
+        self.draw = ImageDraw.Draw(image)
+
+
+class PILBackend:
+    """
+    PIL 渲染后端（默认）
+
+    逐字符调用 ImageDraw.text，字符位置与排版计算完全一致；输出 PIL.Image。
+    """
+    name = 'pil'
+
+    def __init__(self):
+        self.logger = logging.getLogger('PILBackend')
+
+    def new_canvas(self, background, size):
+        """
+        参数:
+            background (PIL.Image): 共用的背景图片（不会被修改），为空时使用白色
+            size (tuple): 页面尺寸
+        """
+        image = background.copy() if background is not None else Image.new('RGB', size, 'white')
+        return PILCanvas(image)
+
+    def draw_run(self, canvas, text, positions, y, font, emoji=False):
+        """
+        绘制一段连续的文字（同一行、同一字体）
+
+        参数:
+            text (str): 文字
+            positions (list): 每个字符的 x 坐标
+            y (float): 文字顶部的 y 坐标
+            font: PIL 字体
+            emoji (bool): 是否为 emoji（使用字体自带的颜色）
+        """
+        for char, x in zip(text, positions):
+            try:
+                if emoji:
+                    canvas.draw.text((x, y), char, font=font, fill='black', embedded_color=True)
+                else:
+                    canvas.draw.text((x, y), char, font=font, fill='black')
+            except Exception as e:
+                self.logger.error(f"Error rendering character '{char}': {str(e)}")
+
+    def draw_overlay(self, canvas, image, position):
+        """把带透明通道的图片（如 Logo）合成到页面上"""
+        page = canvas.image.convert('RGBA')
+        overlay = Image.new('RGBA', page.size, (0, 0, 0, 0))
+        overlay.paste(image, position, image)
+        canvas.image = Image.alpha_composite(page, overlay).convert('RGB')
+        canvas.draw = ImageDraw.Draw(canvas.image)
+
+    def finish(self, canvas):
+        return canvas.image
+
+    def to_pil(self, image):
+        return image
+
+
+class QtCanvas:
+    """Qt 后端的画布"""
+
+    def __init__(self, image):
+        self.image = image
+        self.painter = QPainter(image)
+        self.painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        self.painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.painter.setPen(QColor('black'))
+
+
+class QtBackend:
+    """
+    QPainter 渲染后端，在 QImage 上绘制
+
+    功能:
+        - 一行中连续的普通文字作为一个 QGlyphRun 一次绘制，不再逐字符调用
+        - 字形位置使用排版计算的结果（与分页、换行使用的 PIL 字宽一致），不使用 Qt 的字距调整，
+          字形微调方式与 PIL（FreeType）相同，所以输出与 PIL 后端几乎一致
+        - emoji 同样按排版的位置绘制字形；只有彩色 emoji 字体（COLR、CBDT、sbix）逐个用 drawText 绘制
+        - 输出 QImage，界面可直接显示，不需要从 PIL 转换；导出时用 to_pil 转换
+        - PIL 字体按文件（或内存中的字体数据）注册到 Qt，结果缓存
+
+    benchmarks/bench_render_backends.py 对比两种后端的速度和像素差异。
+    需要 QGuiApplication，没有时会创建一个（无界面环境可设置 QT_QPA_PLATFORM=offscreen）。
+    """
+    name = 'qt'
+
+    _app = None  # 没有 QGuiApplication 时自己创建的实例，需要保持引用
+
+    def __init__(self, max_backgrounds=4):
+        if QImage is None:
+            raise RuntimeError("Qt 渲染后端需要 PyQt6")
+        if QGuiApplication.instance() is None:
+            QtBackend._app = QGuiApplication([])
+        self.max_backgrounds = max_backgrounds
+        self._families = {}                 # 字体文件 -> Qt 字体族
+        self.fallback_fonts = set()         # 无法注册到 Qt、改用默认字体的字体文件
+        self._fonts = {}                    # (字体文件, 像素大小) -> (QFont, QRawFont, 是否彩色字体)
+        self._backgrounds = OrderedDict()   # (id(背景), 尺寸) -> (背景, QImage)
+        self._overlays = {}                 # id(图片) -> (图片, QImage)
+        self.logger = logging.getLogger('QtBackend')
+
+    @staticmethod
+    def from_pil(image):
+        """PIL 图片转换为 QImage（数据已复制）"""
+        if image.mode == 'RGBA':
+            data = image.tobytes('raw', 'RGBA')
+            qimage = QImage(data, image.width, image.height, image.width * 4, QImage.Format.Format_RGBA8888)
+            return qimage.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+        data = image.convert('RGB').tobytes('raw', 'RGB')
+        qimage = QImage(data, image.width, image.height, image.width * 3, QImage.Format.Format_RGB888)
+        return qimage.convertToFormat(QImage.Format.Format_RGB32)
+
+    def background_image(self, background, size):
+        """背景转换为 QImage 的结果按背景对象缓存（背景引擎返回的是共用的缓存对象）"""
+        if background is None:
+            image = QImage(size[0], size[1], QImage.Format.Format_RGB32)
+            image.fill(QColor('white'))
+            return image
+        key = (id(background), tuple(size))
+        entry = self._backgrounds.get(key)
+        if entry is None or entry[0] is not background:
+            entry = (background, self.from_pil(background))
+            self._backgrounds[key] = entry
+            while len(self._backgrounds) > self.max_backgrounds:
+                self._backgrounds.popitem(last=False)
+        self._backgrounds.move_to_end(key)
+        return entry[1]
+
+    def new_canvas(self, background, size):
+        return QtCanvas(self.background_image(background, size).copy())
+
+    def qfont(self, font):
+        """
+        PIL 字体对应的 Qt 字体
+
+        返回:
+            tuple: (QFont, QRawFont, 是否为彩色字体)
+        """
+        path = getattr(font, 'path', None)
+        font_key = path if isinstance(path, str) else id(path)
+        key = (font_key, font.size)
+        fonts = self._fonts.get(key)
+        if fonts is not None:
+            return fonts
+
+        if font_key not in self._families:
+            if isinstance(path, str):
+                font_id = QFontDatabase.addApplicationFont(path)
+            elif hasattr(path, 'getvalue'):
+                font_id = QFontDatabase.addApplicationFontFromData(path.getvalue())
+            else:
+                font_id = -1
+            families = QFontDatabase.applicationFontFamilies(font_id) if font_id != -1 else []
+            if not families:
+                self.logger.warning(f"字体无法注册到 Qt，使用默认字体: {path}")
+                self.fallback_fonts.add(font_key)
+            self._families[font_key] = families[0] if families else None
+
+        family = self._families[font_key]
+        qfont = QFont(family) if family else QFont()
+        qfont.setPixelSize(max(1, int(font.size)))
+        # PIL 使用 FreeType 默认的完整微调，Qt 默认只做垂直微调，小字号时笔画位置差别很大
+        qfont.setHintingPreference(QFont.HintingPreference.PreferFullHinting)
+        raw_font = QRawFont.fromFont(qfont)
+        color = raw_font.isValid() and any(raw_font.fontTable(table) for table in COLOR_FONT_TABLES)
+        fonts = (qfont, raw_font, color)
+        self._fonts[key] = fonts
+        return fonts
+
+    def draw_run(self, canvas, text, positions, y, font, emoji=False):
+        painter = canvas.painter
+        qfont, raw_font, color = self.qfont(font)
+        # PIL 以字体的上沿为 y，Qt 以基线为 y
+        baseline = y + font.getmetrics()[0]
+        if raw_font.isValid() and not color:
+            # 与 PIL 一样只使用这个字体中的字形（缺字时为字体自己的缺字符号，不换用其他字体）
+            glyphs = raw_font.glyphIndexesForString(text)
+            # 每个字符对应一个字形时按排版的位置一次绘制，否则逐字符绘制
+            if len(glyphs) == len(text):
+                run = QGlyphRun()
+                run.setRawFont(raw_font)
+                run.setGlyphIndexes(glyphs)
+                run.setPositions([QPointF(x - positions[0], 0) for x in positions])
+                painter.drawGlyphRun(QPointF(positions[0], baseline), run)
+                return
+
+        painter.setFont(qfont)
+        for char, x in zip(text, positions):
+            painter.drawText(QPointF(x, baseline), char)
+
+    def draw_overlay(self, canvas, image, position):
+        entry = self._overlays.get(id(image))
+        if entry is None or entry[0] is not image:
+            entry = (image, self.from_pil(image))
+            self._overlays[id(image)] = entry
+        canvas.painter.drawImage(QPointF(*position), entry[1])
+
+    def finish(self, canvas):
+        canvas.painter.end()
+        return canvas.image
+
+    def to_pil(self, image):
+        """QImage 转换为 PIL.Image（用于导出）"""
+        if not isinstance(image, QImage):
+            return image
+        image = image.convertToFormat(QImage.Format.Format_RGB888)
+        data = bytes(image.constBits().asstring(image.sizeInBytes()))
+        return Image.frombuffer('RGB', (image.width(), image.height()), data,
+                                'raw', 'RGB', image.bytesPerLine(), 1)
+
+
+RENDER_BACKENDS = OrderedDict([
+    ('pil', PILBackend),
+    ('qt', QtBackend),
+])
+
+DEFAULT_RENDER_BACKEND = 'pil'
+
+
+def create_backend(name=None):
+    """
+    创建渲染后端
+
+    参数:
+        name (str): 'pil' 或 'qt'，为空时使用默认后端
+
+    返回:
+        渲染后端实例，名称未知时抛出 ValueError
+    """
+    name = name or DEFAULT_RENDER_BACKEND
+    if name not in RENDER_BACKENDS:
+        raise ValueError(f"未知的渲染后端: {name}（可选 {', '.join(RENDER_BACKENDS)}）")
+    return RENDER_BACKENDS[name]()
@@ -0,0 +1,78 @@
+import threading
+from collections import deque, Counter
+
+# 耗时直方图的分桶上限（毫秒），最后一档为更慢的请求
+LATENCY_BUCKETS_MS = (50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class RequestStats:
+    """
+    请求结果和耗时统计
+
+    属性:
+        outcomes (Counter): 各种结果的次数，如 success、retry、timeout、error、hedged、hedge_won
+        histogram (list): 每个耗时分桶的请求数，比 LATENCY_BUCKETS_MS 多一档
+        recent (deque): 最近成功请求的耗时（秒），用于计算分位数
+    """
+
+    def __init__(self, window=200):
+        self.outcomes = Counter()
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, outcome, count=1):
+        with self._lock:
+            self.outcomes[outcome] += count
+
+    def record_latency(self, seconds):
+        """记录一次成功请求的耗时"""
+        milliseconds = seconds * 1000
+        bucket = next((i for i, limit in enumerate(LATENCY_BUCKETS_MS) if milliseconds <= limit),
+                      len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            self.histogram[bucket] += 1
+            self.recent.append(seconds)
+
+    def percentile(self, fraction, min_samples=1):
+        """
+        最近请求耗时的分位数（秒）
+
+        参数:
+            fraction (float): 0~1，如 0.95
+            min_samples (int): 样本数不足时返回 None
+        """
+        with self._lock:
+            samples = sorted(self.recent)
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self):
+        """返回可序列化的统计结果"""
+        with self._lock:
+            outcomes = dict(self.outcomes)
+            histogram = list(self.histogram)
+        labels = [f"<={limit}ms" for limit in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'outcomes': outcomes,
+            'histogram': dict(zip(labels, histogram)),
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99)
+        }
+
+    def format_report(self):
+        """格式化为可读的统计报告"""
+        snapshot = self.snapshot()
+        lines = ["请求结果: " + (", ".join(f"{name} {count}" for name, count in sorted(snapshot['outcomes'].items()))
+                             or "无")]
+        for name in ('p50', 'p95', 'p99'):
+            if snapshot[name] is not None:
+                lines.append(f"{name}: {snapshot[name] * 1000:.0f} ms")
+        total = sum(snapshot['histogram'].values())
+        for label, count in snapshot['histogram'].items():
+            if count:
+                lines.append(f"{label:>9} {count:5d} {'#' * max(1, round(count * 40 / total))}")
+        return "\n".join(lines)
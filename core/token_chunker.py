@@ -0,0 +1,96 @@
+import re
+
+# 中日韩文字、全角标点大约每个字一个 token，其他字符大约每 4 个一个 token
+_WIDE_CHAR = re.compile(r'[⺀-鿿가-힯豈-﫿＀-￯　-〿]')
+_PARAGRAPH_BREAK = re.compile(r'(\n[ \t]*\n+)')
+_SENTENCE_END = re.compile(r'(?<=[。！？；!?;.])')
+
+
+def estimate_tokens(text):
+    """
+    快速估算 token 数（不调用分词器）
+
+    中日韩文字按每字 1 个 token，其余字符按每 4 个 1 个 token 计算，
+    对中文为主的文本略微偏大，用来控制请求大小足够安全。
+    """
+    wide = len(_WIDE_CHAR.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+
+def split_keep_separators(text, pattern):
+    """按正则切分，分隔符并入前一段，保证 ''.join(结果) == text"""
+    parts = pattern.split(text)
+    pieces = []
+    for i in range(0, len(parts), 2):
+        piece = parts[i] + (parts[i + 1] if i + 1 < len(parts) else '')
+        if piece:
+            pieces.append(piece)
+    return pieces
+
+
+def split_oversized(text, max_tokens):
+    """把超过预算的段落依次按行、句子切分，仍然过长时按字符硬切"""
+    for splitter in (lambda t: t.splitlines(keepends=True), lambda t: [p for p in _SENTENCE_END.split(t) if p]):
+        pieces = splitter(text)
+        if len(pieces) > 1:
+            result = []
+            for piece in pieces:
+                if estimate_tokens(piece) > max_tokens:
+                    result.extend(split_oversized(piece, max_tokens))
+                else:
+                    result.append(piece)
+            return result
+
+    # 没有可用的边界：按字符数切分（每个字最多 1 个 token）
+    return [text[i:i + max_tokens] for i in range(0, len(text), max_tokens)]
+
+
+def chunk_text(text, max_tokens=1500):
+    """
+    把长文本切分为不超过 token 预算的片段
+
+    参数:
+        text (str): 要切分的文本（如导入的 Markdown）
+        max_tokens (int): 每个片段的 token 预算（估算值）
+
+    返回:
+        list: 片段列表，''.join(片段) == text
+
+    功能:
+        - 优先在段落（空行）处切分，相邻的短段落合并到同一个片段
+        - 单个段落超过预算时依次按行、句子切分
+    """
+    if not text:
+        return []
+
+    units = []
+    for paragraph in split_keep_separators(text, _PARAGRAPH_BREAK):
+        if estimate_tokens(paragraph) > max_tokens:
+            units.extend(split_oversized(paragraph, max_tokens))
+        else:
+            units.append(paragraph)
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for unit in units:
+        tokens = estimate_tokens(unit)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(''.join(current))
+            current = []
+            current_tokens = 0
+        current.append(unit)
+        current_tokens += tokens
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+
+def chunk_blocks(texts, max_tokens=1500):
+    """
+    按文本块切分：文本块之间总是分开，过长的文本块再按 chunk_text 切分
+
+    返回:
+        list: [(文本块序号, 片段)]，同一文本块的片段按顺序排列
+    """
+    return [(index, chunk) for index, text in enumerate(texts) for chunk in chunk_text(text, max_tokens)]
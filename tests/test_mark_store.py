@@ -0,0 +1,76 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.mark_store import MarkStore
+
+
+def apply_edit_to_list(marks, position, chars_removed, chars_added):
+    """按与 MarkStore.apply_edit 相同的规则平移 [((start, end), style)] 列表（逐个标记处理的朴素实现）"""
+    result = []
+    for (start, end), style in marks:
+        if chars_removed:
+            deleted_end = position + chars_removed
+            if start >= deleted_end:
+                start, end = start - chars_removed, end - chars_removed
+            elif start >= position:
+                if end < deleted_end:
+                    continue
+                start, end = position, end - chars_removed
+            elif end >= position:
+                end = end - chars_removed if end >= deleted_end else position - 1
+        if chars_added:
+            if start >= position:
+                start, end = start + chars_added, end + chars_added
+            elif end >= position:
+                end += chars_added
+        result.append(((start, end), style))
+    return result
+
+
+class MarkStoreTest(unittest.TestCase):
+
+    def test_delete_collapsing_marks_keeps_both(self):
+        marks = MarkStore()
+        ellipse = {'type': 'ellipse'}
+        underline = {'type': 'underline'}
+        marks[(2, 5)] = ellipse
+        marks[(3, 5)] = underline
+
+        marks.apply_edit(2, 2, 0)
+
+        self.assertEqual(len(marks), 2)
+        self.assertEqual(marks.items(), [((2, 3), ellipse), ((2, 3), underline)])
+        self.assertEqual(marks.get_all((2, 3)), [ellipse, underline])
+
+    def test_delete_falsy_style(self):
+        marks = MarkStore({(1, 1): {}})
+        del marks[(1, 1)]
+        self.assertEqual(len(marks), 0)
+        with self.assertRaises(KeyError):
+            del marks[(1, 1)]
+
+    def test_edits_match_list_model(self):
+        for seed in range(500):
+            rng = random.Random(seed)
+            marks = MarkStore()
+            expected = []
+            for i in range(rng.randint(1, 8)):
+                start = rng.randint(0, 20)
+                key = (start, start + rng.randint(0, 6))
+                marks.add(key, {'id': i})
+                expected.append((key, {'id': i}))
+            for _ in range(10):
+                edit = (rng.randint(0, 25), rng.randint(0, 5), rng.randint(0, 3))
+                marks.apply_edit(*edit)
+                expected = apply_edit_to_list(expected, *edit)
+                self.assertEqual(sorted((key, style['id']) for key, style in marks.items()),
+                                 sorted((key, style['id']) for key, style in expected), f"seed {seed}")
+                self.assertEqual(len(marks), len(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
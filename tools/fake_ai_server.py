@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+本地模拟的 chat/completions 服务器，用于在没有网络和 API 密钥时测试 AI 润色
+
+用法:
+    python tools/fake_ai_server.py --port 8765 --delay 0.2 --token-delay 0.05
+    然后设置环境变量 AI_API_URL=http://127.0.0.1:8765/api/paas/v4/chat/completions 启动程序
+
+也可以在测试脚本中使用:
+    server = FakeAIServer(delay=0.1)
+    await server.start()
+    helper = AIHelper(api_url=server.url)
+    ...
+    await server.stop()
+
+返回的润色结果为 "润色：" + 原文，并统计请求数、最大并发数和使用过的 TCP 连接数。
+请求中带 "stream": true 时按 SSE 格式每 token_delay 秒返回 chars_per_token 个字符；
+内容包含 fail_substring 的请求返回 400（类似内容审核拒绝，不应重试），用于测试失败处理。
+
+故障注入（用于测试重试和对冲请求）：按比例随机返回 500/503（error_rate）、429（rate_limit_rate）、
+直接断开连接（drop_rate），或额外延迟 slow_delay 秒（slow_rate，模拟长尾）。设置 seed 可复现。
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import random
+from collections import Counter
+
+from aiohttp import web
+
+CHAT_PATH = '/api/paas/v4/chat/completions'
+
+
+class FakeAIServer:
+    def __init__(self, host='127.0.0.1', port=0, delay=0.05, token_delay=0.02, chars_per_token=2,
+                 fail_substring=None, error_rate=0.0, rate_limit_rate=0.0, slow_rate=0.0, slow_delay=2.0,
+                 drop_rate=0.0, seed=None):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.token_delay = token_delay
+        self.chars_per_token = chars_per_token
+        self.fail_substring = fail_substring  # 内容包含该字符串的请求返回 400
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.faults = Counter()  # 注入的各类故障次数
+        self.streams_cancelled = 0  # 客户端中途断开的流式请求数
+        self.url = None
+        self.requests = 0
+        self.active = 0
+        self.peak_concurrency = 0
+        self.peers = set()  # 客户端 (地址, 端口)，即使用过的 TCP 连接
+        self._runner = None
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_post(CHAT_PATH, self.handle_chat)
+        return app
+
+    async def start(self):
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{self.host}:{self.port}{CHAT_PATH}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @staticmethod
+    def polish(content):
+        return f"润色：{content}"
+
+    async def handle_chat(self, request):
+        payload = await request.json()
+        content = payload['messages'][-1]['content']
+        self.requests += 1
+        self.peers.add(request.transport.get_extra_info('peername'))
+        self.active += 1
+        self.peak_concurrency = max(self.peak_concurrency, self.active)
+        try:
+            fault = self.pick_fault()
+            await asyncio.sleep(self.delay + (self.slow_delay if fault == 'slow' else 0))
+            if self.fail_substring and self.fail_substring in content:
+                return web.json_response({'error': {'code': '1301', 'message': '模拟的内容审核拒绝'}}, status=400)
+            if fault == 'error':
+                status = self.random.choice((500, 503))
+                return web.json_response({'error': {'code': str(status), 'message': '模拟的服务器错误'}},
+                                         status=status)
+            if fault == 'rate_limit':
+                return web.json_response({'error': {'code': '1302', 'message': '模拟的限流'}}, status=429)
+            if fault == 'drop':
+                request.transport.close()
+                return web.Response()
+            if payload.get('stream'):
+                return await self.stream_reply(request, payload, self.polish(content))
+            return web.json_response({
+                'id': f'fake-{self.requests}',
+                'created': int(time.time()),
+                'model': payload.get('model'),
+                'choices': [{
+                    'index': 0,
+                    'finish_reason': 'stop',
+                    'message': {'role': 'assistant', 'content': self.polish(content)}
+                }],
+                'usage': {'prompt_tokens': len(content), 'completion_tokens': len(content) + 3}
+            })
+        finally:
+            self.active -= 1
+
+    def pick_fault(self):
+        """按设置的比例随机选择本次请求要注入的故障，返回 None 表示正常响应"""
+        roll = self.random.random()
+        for fault, rate in (('error', self.error_rate), ('rate_limit', self.rate_limit_rate),
+                            ('drop', self.drop_rate), ('slow', self.slow_rate)):
+            if roll < rate:
+                self.faults[fault] += 1
+                return fault
+            roll -= rate
+        return None
+
+    async def stream_reply(self, request, payload, text):
+        """按 SSE 格式逐段发送结果"""
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache'})
+        await response.prepare(request)
+        try:
+            for i in range(0, len(text), self.chars_per_token):
+                chunk = {
+                    'id': f'fake-{self.requests}',
+                    'model': payload.get('model'),
+                    'choices': [{'index': 0, 'delta': {'role': 'assistant',
+                                                       'content': text[i:i + self.chars_per_token]}}]
+                }
+                await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+                await asyncio.sleep(self.token_delay)
+            done = {'id': f'fake-{self.requests}', 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]}
+            await response.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode('utf-8'))
+            await response.write_eof()
+        except ConnectionResetError:
+            # 客户端取消了请求
+            self.streams_cancelled += 1
+        return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地模拟的 AI 润色服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.2, help='每个请求的响应延迟（秒）')
+    parser.add_argument('--token-delay', type=float, default=0.05, help='流式响应中每段之间的延迟（秒）')
+    parser.add_argument('--chars-per-token', type=int, default=2, help='流式响应中每段的字符数')
+    parser.add_argument('--fail-substring', help='内容包含该字符串的请求返回 400')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 500/503 的比例')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='返回 429 的比例')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='直接断开连接的比例')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='额外延迟的比例')
+    parser.add_argument('--slow-delay', type=float, default=2.0, help='额外延迟（秒）')
+    parser.add_argument('--seed', type=int, help='故障注入的随机种子')
+    args = parser.parse_args()
+
+    server = FakeAIServer(args.host, args.port, args.delay, args.token_delay, args.chars_per_token,
+                          args.fail_substring, args.error_rate, args.rate_limit_rate, args.slow_rate,
+                          args.slow_delay, args.drop_rate, args.seed)
+    print(f"AI_API_URL=http://{args.host}:{args.port}{CHAT_PATH}")
+    web.run_app(server.make_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == '__main__':
+    main()
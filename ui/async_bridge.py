@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class AsyncBridge(QObject):
+    """
+    在独立线程中运行整个程序共用的 asyncio 事件循环
+
+    界面线程通过 submit 提交协程，立即返回，不会阻塞界面；
+    完成、出错和取消的回调以及 call_in_ui 都通过信号（跨线程自动排队）切回界面线程执行。
+    所有协程共用一个事件循环，AIHelper 的连接池等绑定事件循环的资源可以一直复用。
+
+    用法:
+        bridge = AsyncBridge()
+        future = bridge.submit(helper.polish_text(text), on_done=show_result)
+        future.cancel()   # 可从界面线程取消
+        bridge.shutdown(helper.close())
+    """
+    _callback = pyqtSignal(object, object)  # 回调, 参数元组
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger('AsyncBridge')
+        self._callback.connect(self._invoke)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name='AsyncBridge', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            # 取消剩余的任务后关闭事件循环
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    def _invoke(self, callback, args):
+        try:
+            callback(*args)
+        except Exception as e:
+            self.logger.error(f"回调出错: {str(e)}")
+
+    def call_in_ui(self, callback, *args):
+        """在界面线程中执行 callback(*args)（可从任意线程调用）"""
+        self._callback.emit(callback, args)
+
+    def submit(self, coro, on_done=None, on_error=None, on_cancel=None):
+        """
+        在事件循环中运行协程
+
+        参数:
+            coro: 协程对象
+            on_done (callable): on_done(结果)，在界面线程调用
+            on_error (callable): on_error(异常)，在界面线程调用；未提供时记录日志
+            on_cancel (callable): on_cancel()，取消后在界面线程调用
+
+        返回:
+            concurrent.futures.Future: 可用 cancel() 取消
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+        def finished(f):
+            if f.cancelled():
+                if on_cancel is not None:
+                    self.call_in_ui(on_cancel)
+                return
+            error = f.exception()
+            if error is not None:
+                if on_error is not None:
+                    self.call_in_ui(on_error, error)
+                else:
+                    self.logger.error(f"后台任务出错: {str(error)}")
+            elif on_done is not None:
+                self.call_in_ui(on_done, f.result())
+
+        future.add_done_callback(finished)
+        return future
+
+    def shutdown(self, cleanup=None, timeout=2.0):
+        """
+        停止事件循环
+
+        参数:
+            cleanup: 停止前执行的协程（如关闭会话），最多等待 timeout 秒
+        """
+        if not self.thread.is_alive():
+            return
+        if cleanup is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(cleanup, self.loop).result(timeout)
+            except Exception as e:
+                self.logger.warning(f"清理后台任务失败: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
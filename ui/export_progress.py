@@ -0,0 +1,73 @@
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QProgressBar, QPushButton
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class ExportSignals(QObject):
+    """
+    导出队列的信号桥
+    ExportQueue 的回调在工作线程中执行，通过信号（跨线程自动排队）切回界面线程
+    """
+    progress = pyqtSignal(object, int, int)  # job, 已完成, 总数
+    finished = pyqtSignal(object)            # job
+
+    def on_progress(self, job, completed, total, index, result):
+        self.progress.emit(job, completed, total)
+
+    def on_finished(self, job):
+        self.finished.emit(job)
+
+
+class ExportProgressBar(QWidget):
+    """导出进度条：显示所有进行中的导出任务的总进度，可取消"""
+    cancel_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = {}  # job_id -> (已完成, 总数, 标题)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.label = QLabel()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setTextVisible(True)
+        self.cancel_button = QPushButton("取消导出")
+        self.cancel_button.clicked.connect(self.cancel_requested.emit)
+
+        layout.addWidget(self.label)
+        layout.addWidget(self.progress_bar, 1)
+        layout.addWidget(self.cancel_button)
+
+        self.setVisible(False)
+
+    def add_job(self, job):
+        self.jobs[job.job_id] = (0, job.total, job.title)
+        self.refresh()
+
+    def update_job(self, job, completed, total):
+        if job.job_id in self.jobs:
+            self.jobs[job.job_id] = (completed, total, job.title)
+            self.refresh()
+
+    def remove_job(self, job):
+        self.jobs.pop(job.job_id, None)
+        self.refresh()
+
+    def refresh(self):
+        """刷新显示，没有任务时隐藏"""
+        if not self.jobs:
+            self.setVisible(False)
+            return
+
+        completed = sum(done for done, _, _ in self.jobs.values())
+        total = sum(count for _, count, _ in self.jobs.values())
+        if len(self.jobs) == 1:
+            title = next(iter(self.jobs.values()))[2]
+            self.label.setText(f"正在导出：{title}")
+        else:
+            self.label.setText(f"正在导出 {len(self.jobs)} 个任务")
+
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(completed)
+        self.progress_bar.setFormat(f"{completed}/{total}")
+        self.setVisible(True)
@@ -4,25 +4,44 @@ try:
     from .style_panel import StylePanel
     from .styles import FusionStyle
     from .style_text_editor import StyleTextEditor
+    from .export_progress import ExportSignals, ExportProgressBar
+    from .thumbnail_strip import ThumbnailStrip, THUMBNAIL_PROFILE
+    from .qt_image import pil_to_qpixmap
+    from .preview_cache import PreviewCache, PixmapPyramid
+    from .async_bridge import AsyncBridge
+    from .prepolisher import PrePolisher
 except ImportError:
     # 如果相对导入失败，使用绝对导入（当直接运行文件时）
     from ui.text_editor import TextEditor
     from ui.style_panel import StylePanel
     from ui.styles import FusionStyle
     from ui.style_text_editor import StyleTextEditor
+    from ui.export_progress import ExportSignals, ExportProgressBar
+    from ui.thumbnail_strip import ThumbnailStrip, THUMBNAIL_PROFILE
+    from ui.qt_image import pil_to_qpixmap
+    from ui.preview_cache import PreviewCache, PixmapPyramid
+    from ui.async_bridge import AsyncBridge
+    from ui.prepolisher import PrePolisher
 
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                            QTabWidget, QTextEdit, QPushButton, QComboBox, 
                            QRadioButton, QLabel, QScrollArea, QFileDialog, 
-                           QSizePolicy, QFrame, QMessageBox)
-from PyQt6.QtCore import Qt, QSize, QPoint
-from PyQt6.QtGui import QPixmap, QResizeEvent, QIcon, QPainter, QPen, QColor
+                           QSizePolicy, QFrame, QMessageBox, QCheckBox)
+from PyQt6.QtCore import Qt, QSize, QPoint, QPointF, QRectF, pyqtSignal
+from PyQt6.QtGui import QPixmap, QImage, QResizeEvent, QIcon, QPainter, QPen, QColor
 from core.image_generator import ImageGenerator
 from core.ai_helper import AIHelper
+from core.output_profiles import BASE_WIDTH, BASE_HEIGHT, DEFAULT_PROFILE, get_profile
+from core.exporter import format_export_report
+from core.export_queue import ExportQueue, ExportJob, FolderTarget, ZipTarget, TextFileTarget
+from core.project_file import (ProjectFile, PROJECT_EXTENSION, content_hash, serialize_page_plan,
+                               restore_page_plan, encode_cover, decode_cover)
+import hashlib
 import asyncio
 import os
 import json
 from datetime import datetime
+from functools import partial
 from PIL import Image
 from PyQt6.QtCore import QTimer
 from PIL import ImageDraw
@@ -38,8 +57,23 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("小红书文字转图片工具")
         self.setMinimumSize(1400, 800)
         self.image_generator = ImageGenerator()
+        self.ai_helper = AIHelper()
+        # 共用的 asyncio 事件循环（独立线程），AI 请求在其中运行，不阻塞界面
+        self.async_bridge = AsyncBridge(self)
+        self.polish_future = None  # 进行中的整篇润色
         self.current_images = []
+        self.current_render = None  # 生成当前图片所用的分页方案/封面内容，用于其他尺寸导出
         self.current_image_index = 0
+        self.project_file = None  # 当前打开或保存过的项目文件
+        
+        # 后台导出队列，回调通过信号切回界面线程
+        self.export_queue = ExportQueue()
+        self.export_signals = ExportSignals()
+        
+        # 预览页面的 QPixmap 缓存，空闲时预取相邻页面
+        self.preview_cache = PreviewCache(lambda index: self.current_images[index],
+                                          lambda: len(self.current_images), parent=self)
+        
         self.init_ui()
         
         # 在显示窗口之先计算一次预览尺寸
@@ -70,6 +104,9 @@ class MainWindow(QMainWindow):
         manual_tab = QWidget()
         manual_layout = QVBoxLayout(manual_tab)
         self.text_editor = TextEditor()
+        self.text_editor.ai_helper = self.ai_helper
+        self.text_editor.async_bridge = self.async_bridge
+        self.prepolisher = PrePolisher(self.text_editor, self.ai_helper, self.async_bridge, parent=self)
         manual_layout.addWidget(self.text_editor)
         manual_tab.setLayout(manual_layout)
         
@@ -105,10 +142,34 @@ class MainWindow(QMainWindow):
         self.download_text_button.setMinimumHeight(40)
         self.download_text_button.clicked.connect(self.download_text_document)
         
+        # 项目按钮
+        self.open_project_button = QPushButton("打开项目")
+        self.open_project_button.setMinimumHeight(40)
+        self.open_project_button.clicked.connect(self.open_project)
+        
+        self.save_project_button = QPushButton("保存项目")
+        self.save_project_button.setMinimumHeight(40)
+        self.save_project_button.clicked.connect(self.save_project)
+        
+        # AI 润色按钮（润色中再次点击取消）
+        self.polish_button = QPushButton("AI润色")
+        self.polish_button.setMinimumHeight(40)
+        self.polish_button.setToolTip("润色文本编辑中的所有文本块")
+        self.polish_button.clicked.connect(self.polish_all)
+        
+        # 空闲时预润色（默认关闭）
+        self.prepolish_check = QCheckBox("空闲时预润色")
+        self.prepolish_check.setToolTip("停止输入几秒后在后台预先润色修改过的段落，点击「AI润色」时直接使用结果（会在后台调用接口）")
+        self.prepolish_check.toggled.connect(self.prepolisher.set_enabled)
+        
         # 添加按钮到布局
         button_layout.addWidget(self.generate_button)
         button_layout.addWidget(self.download_button)
         button_layout.addWidget(self.download_text_button)
+        button_layout.addWidget(self.open_project_button)
+        button_layout.addWidget(self.save_project_button)
+        button_layout.addWidget(self.polish_button)
+        button_layout.addWidget(self.prepolish_check)
         
         # 设置按钮容器的大小策略
         button_container.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
@@ -117,6 +178,13 @@ class MainWindow(QMainWindow):
         left_layout.addWidget(self.style_panel)
         left_layout.addWidget(button_container)  # 添加按钮容器
         
+        # 导出进度（有导出任务时显示）
+        self.export_progress = ExportProgressBar()
+        self.export_progress.cancel_requested.connect(self.cancel_exports)
+        self.export_signals.progress.connect(self.export_progress.update_job)
+        self.export_signals.finished.connect(self.on_export_finished)
+        left_layout.addWidget(self.export_progress)
+        
         # 样式文本编辑标签页
         self.style_text_tab = QWidget()
         style_text_layout = QVBoxLayout(self.style_text_tab)
@@ -155,6 +223,8 @@ class MainWindow(QMainWindow):
         # 创建图片预览标签
         self.preview_label = PreviewLabel()
         self.preview_label.style_text_editor = self.style_text_editor
+        self.preview_label.image_generator = self.image_generator
+        self.preview_label.marks_edited.connect(self.generate_image)
         self.preview_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.preview_label.setSizePolicy(
             QSizePolicy.Policy.Fixed,  # 改为固定宽度
@@ -181,6 +251,11 @@ class MainWindow(QMainWindow):
         # 添加底部弹性空间
         preview_content_layout.addStretch(1)
         
+        # 页面缩略图条，点击切换预览页面
+        self.thumbnail_strip = ThumbnailStrip()
+        self.thumbnail_strip.page_selected.connect(self.show_image_at)
+        preview_content_layout.addWidget(self.thumbnail_strip)
+        
         # 创建导航按钮容器
         nav_container = QWidget()
         nav_layout = QHBoxLayout(nav_container)  # 水平布局
@@ -253,6 +328,7 @@ class MainWindow(QMainWindow):
         self.generate_button.clicked.connect(self.generate_image)
         self.style_panel.style_changed.connect(self.preview_style_change)
         self.style_text_editor.content_changed.connect(self.on_style_text_changed)
+        self.markdown_tab.content_changed.connect(self.on_markdown_changed)
         
         # 接样式应用信号生成图片方法
         self.style_text_editor.style_applied.connect(self.generate_image)
@@ -288,12 +364,9 @@ class MainWindow(QMainWindow):
         try:
             print("\n=== 开始生成图片 ===")
             style = self.style_panel.get_current_style()
-            bg_value = style['background']
-            bg_config = next((bg for bg in self.style_panel.config['backgrounds'] 
-                            if bg['value'] == bg_value), None)
-            bg_path = bg_config['url'] if bg_config else None
+            bg_config = self.get_background_config(style)
             
-            print(f"背景路径: {bg_path}")
+            print(f"背景配置: {bg_config}")
             
             # 获取当前激活的标签页
             current_tab = self.tabs.currentWidget()
@@ -301,147 +374,30 @@ class MainWindow(QMainWindow):
             
             if current_tab == self.style_text_tab:
                 print("处理封面编辑内容")
+                # 标记在界面线程中会继续被编辑，导出线程和缩略图使用生成时的快照
                 content = self.style_text_editor.get_content()
+                content = dict(content, marks=content['marks'].copy())
                 print(f"封面编辑内容: {content}")
                 
-                # 创建单页图片
-                image = Image.new('RGB', (self.image_generator.width, self.image_generator.height), 'white')
-                print("创建新图片")
-                
-                # 加载背景
-                if bg_path:
-                    try:
-                        bg = Image.open(bg_path)
-                        bg = bg.resize((self.image_generator.width, self.image_generator.height))
-                        image.paste(bg, (0, 0))
-                        print("背景加载成功")
-                    except Exception as e:
-                        print(f"加载背景图片失败: {str(e)}")
-                
-                # 创建绘图对象
-                draw = ImageDraw.Draw(image)
-                print("创建绘图对象")
-                
-                # 获取字体大小和加粗状态
-                font_size = content.get('font_size', 48)
-                is_bold = content.get('font_bold', False)
-                print(f"字体大小: {font_size}, 是否加粗: {is_bold}")
-                
-                # 创建字体对象，传入加粗参数
-                font = self.image_generator.create_font(font_size, is_bold)
-                print(f"字体对象创建完成: {font}")
-                
-                # 绘制文字
-                self.image_generator.draw_styled_text(
-                    draw,
-                    content['text'],
-                    content['marks'],
-                    0,
-                    0,
-                    font,
-                    char_spacing=content.get('char_spacing', 0),
-                    line_spacing=content.get('line_spacing', 20)
-                )
-                print("文本绘制完成")
-                
-                # 添加 logo
-                try:
-                    # 获取 logo 路径
-                    if hasattr(sys, '_MEIPASS'):
-                        logo_path = os.path.join(sys._MEIPASS, 'resources/icons', 'logo.png')
-                    else:
-                        logo_path = os.path.join('resources/icons', 'logo.png')
-                    
-                    print(f"\n=== 添加 Logo ===")
-                    print(f"Logo 路径: {logo_path}")
-                    print(f"Logo 文件是否存在: {os.path.exists(logo_path)}")
-                    print(f"当前工作目录: {os.getcwd()}")
-                    print(f"resources 目录内容:")
-                    try:
-                        for item in os.listdir('resources'):
-                            print(f"  - {item}")
-                    except Exception as e:
-                        print(f"无法列出 resources 目录内容: {str(e)}")
-                    
-                    if os.path.exists(logo_path):
-                        # 加载 logo
-                        logo = Image.open(logo_path)
-                        print(f"Logo 模式: {logo.mode}")
-                        print(f"Logo 尺寸: {logo.size}")
-                        
-                        # 设置 logo 大小
-                        logo_height = 50  # logo 的目标高度
-                        aspect_ratio = logo.width / logo.height
-                        logo_width = int(logo_height * aspect_ratio)
-                        
-                        # 调整 logo 大小
-                        logo = logo.resize((logo_width, logo_height), Image.Resampling.LANCZOS)
-                        print(f"调整后的 Logo 尺寸: {logo.size}")
-                        
-                        # 计算 logo 位置（左下角，留出边距）
-                        margin = 20  # 边距
-                        x = margin
-                        y = self.image_generator.height - logo_height - margin
-                        print(f"Logo 位置: ({x}, {y})")
-                        
-                        # 如果 logo 有透明通道，需要特殊处理
-                        if logo.mode == 'RGBA':
-                            print("处理带透明通道的 Logo")
-                            # 将原图转换为 RGBA 模式
-                            image = image.convert('RGBA')
-                            # 创建一个与原图大小相同的透明图层
-                            overlay = Image.new('RGBA', image.size, (0, 0, 0, 0))
-                            # 将 logo 粘贴到透明图层上
-                            overlay.paste(logo, (x, y))
-                            # 将透明图层与原图合并
-                            image = Image.alpha_composite(image, overlay)
-                            # 转换回 RGB 模式
-                            image = image.convert('RGB')
-                        else:
-                            print("处理不带透明通道的 Logo")
-                            # 如果 logo 没有透明通道，直接粘贴
-                            image.paste(logo, (x, y))
-                            
-                        print("Logo 添加成功")
-                    else:
-                        print(f"Logo 文件不存在: {logo_path}")
-                        
-                except Exception as e:
-                    print(f"添加 Logo 失败: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+                # 封面布局按基准单位计算，预览使用标准尺寸光栅化
+                image = self.image_generator.create_cover_image(content, bg_config)
+                print("封面绘制完成")
                 
+                self.current_render = {'kind': 'cover', 'content': content, 'background': bg_config}
                 self.current_images = [image]
                 print("图片生成完成")
                 
             elif current_tab == self.markdown_tab:
                 print("处理Markdown内容")
                 content = self.markdown_tab.get_all_content()
-                self.current_images = self.image_generator.create_images(
-                    content,
-                    bg_path,
-                    style['font_style']
-                )
+                self.render_text_pages(content, bg_config, style['font_style'])
                 
             else:
                 print("处理普通文本编辑内容")
                 content = self.text_editor.get_all_content()
-                self.current_images = self.image_generator.create_images(
-                    content,
-                    bg_path,
-                    style['font_style']
-                )
-            
-            # 更新预览
-            self.current_image_index = 0
-            print("开始更新预览")
-            self.update_preview()
-            print("预览更新完成")
+                self.render_text_pages(content, bg_config, style['font_style'])
             
-            # 更新按钮状态
-            self.update_navigation_buttons()
-            self.download_button.setEnabled(True)
-            self.download_text_button.setEnabled(True)
+            self.show_generated_images()
             
             print(f"生成了 {len(self.current_images)} 张图片")
             print("=== 图片生成完成 ===\n")
@@ -450,62 +406,104 @@ class MainWindow(QMainWindow):
             print(f"生成图片错误: {str(e)}")
             import traceback
             traceback.print_exc()
+            self.preview_label.set_cover(None)
             self.preview_label.setText("生成图片失败")
+            self.thumbnail_strip.clear()
             self.download_button.setEnabled(False)
             self.download_text_button.setEnabled(False)
             self.prev_button.setEnabled(False)
             self.next_button.setEnabled(False)
     
+    def get_background_config(self, style):
+        """根据样式中的背景名称查找背景配置"""
+        return next((bg for bg in self.style_panel.config['backgrounds']
+                     if bg['value'] == style['background']), None)
+    
+    def show_generated_images(self):
+        """显示第一页并更新按钮状态"""
+        self.current_image_index = 0
+        self.preview_cache.invalidate()
+        # 预览封面时可以直接拖动椭圆和下划线
+        render = self.current_render
+        self.preview_label.set_cover(render['content'] if render and render['kind'] == 'cover' else None)
+        print("开始更新预览")
+        self.update_preview()
+        print("预览更新完成")
+        
+        self.update_thumbnails()
+        self.update_navigation_buttons()
+        self.download_button.setEnabled(True)
+        self.download_text_button.setEnabled(True)
+    
+    def render_text_pages(self, content, background, font_style):
+        """分页一次并按标准尺寸光栅化，保留分页方案供其他尺寸导出复用"""
+        page_plan = self.image_generator.paginate(content, font_style)
+        self.show_page_plan(page_plan, background, font_style)
+    
+    def show_page_plan(self, page_plan, background, font_style):
+        """按标准尺寸光栅化分页方案（保留渲染后端的原生图片，Qt 后端的 QImage 预览时不需要转换）"""
+        self.current_images = self.image_generator.render_pages(page_plan, background, font_style, native=True)
+        self.current_render = {
+            'kind': 'pages',
+            'page_plan': page_plan,
+            'background': background,
+            'font_style': font_style
+        }
+    
+    def get_page_producers(self, profile_name):
+        """
+        获取指定输出尺寸下每页图片的生成函数（在导出线程中调用）
+        标准尺寸直接使用预览图片，其他尺寸复用已有的分页方案或封面布局，只重新光栅化
+        """
+        profile = get_profile(profile_name)
+        if profile.name == DEFAULT_PROFILE or not self.current_render:
+            return [partial(self.image_generator.to_pil, image) for image in self.current_images]
+        
+        print(f"按输出尺寸 {profile.width}x{profile.height} 重新光栅化")
+        render = self.current_render
+        if render['kind'] == 'cover':
+            return [partial(self.image_generator.create_cover_image,
+                            render['content'], render['background'], profile)]
+        return [partial(self.image_generator.render_page, page, render['background'],
+                        render['font_style'], profile)
+                for page in render['page_plan']]
+    
+    def update_thumbnails(self):
+        """
+        更新缩略图条：每页的指纹和缩略图尺寸的渲染函数
+        缩略图只在滚动到可见范围时才光栅化，指纹未变的页面直接使用缓存
+        """
+        render = self.current_render
+        if not render:
+            self.thumbnail_strip.clear()
+            return
+        
+        if render['kind'] == 'cover':
+            data = json.dumps(['cover', encode_cover(render['content']), render['background']],
+                              ensure_ascii=False, sort_keys=True, default=str)
+            pages = [(hashlib.sha1(data.encode('utf-8')).hexdigest(),
+                      partial(self.image_generator.create_cover_image,
+                              render['content'], render['background'], THUMBNAIL_PROFILE))]
+        else:
+            pages = [(self.image_generator.page_fingerprint(page, render['background'], render['font_style']),
+                      partial(self.image_generator.render_page_native, page, render['background'],
+                              render['font_style'], THUMBNAIL_PROFILE))
+                     for page in render['page_plan']]
+        
+        self.thumbnail_strip.set_pages(pages)
+        self.thumbnail_strip.set_current(self.current_image_index)
+    
     def update_preview(self):
-        """更新预览图片"""
+        """更新预览图片（缓存命中时不需要转换和缩放），并在空闲时预取前后页面"""
         if not self.current_images or self.current_image_index >= len(self.current_images):
             print("没有可预览的图片")
             return
             
         try:
-            # 在系统临时目录创建临时文件
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                temp_path = temp_file.name
-                
-            print(f"使用临时文件路径: {temp_path}")
-            
-            # 保存图片到临时文件
-            self.current_images[self.current_image_index].save(temp_path, 'PNG')
-            print(f"图片已保存到临时文件")
-            
-            # 强制刷新文件到磁盘
-            import time
-            time.sleep(0.1)  # 给文件系统一点时间
-            
-            # 加载图片
-            pixmap = QPixmap(temp_path)
-            if pixmap.isNull():
-                print("预览图片加载失败")
-                print(f"检查临时文件是否存在: {os.path.exists(temp_path)}")
-                print(f"临时文件大小: {os.path.getsize(temp_path) if os.path.exists(temp_path) else 'file not found'}")
-                return
-                
-            # 获取预览标签的大小
             label_size = self.preview_label.size()
-            
-            # 缩放图片以填充预览标签，保持宽高比
-            scaled_pixmap = pixmap.scaled(
-                label_size,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-            
-            # 显示图片
-            self.preview_label.setPixmap(scaled_pixmap)
-            print("预览图片更新成功")
-            
-            # 清理临时文件
-            try:
-                os.remove(temp_path)
-                print("临时预览文件已清理")
-            except Exception as e:
-                print(f"清理临时文件败: {str(e)}")
+            pyramid = self.preview_cache.get(self.current_image_index, label_size)
+            self.preview_label.set_pyramid(pyramid)
+            self.preview_cache.prefetch_around(self.current_image_index, label_size)
                 
         except Exception as e:
             print(f"更新预览失败: {str(e)}")
@@ -515,16 +513,20 @@ class MainWindow(QMainWindow):
     def show_previous_image(self):
         """显示上一页"""
         if self.current_image_index > 0:
-            self.current_image_index -= 1
-            self.update_preview()
-            self.update_navigation_buttons()
+            self.show_image_at(self.current_image_index - 1)
     
     def show_next_image(self):
         """显示下一页"""
         if self.current_image_index < len(self.current_images) - 1:
-            self.current_image_index += 1
+            self.show_image_at(self.current_image_index + 1)
+    
+    def show_image_at(self, index):
+        """显示指定页（导航按钮和缩略图条共用）"""
+        if 0 <= index < len(self.current_images):
+            self.current_image_index = index
             self.update_preview()
             self.update_navigation_buttons()
+            self.thumbnail_strip.set_current(index)
     
     def update_navigation_buttons(self):
         """更新导航按钮状态"""
@@ -532,7 +534,7 @@ class MainWindow(QMainWindow):
         self.next_button.setEnabled(self.current_image_index < len(self.current_images) - 1)
     
     def download_images(self):
-        """下载所有图片"""
+        """把所有图片提交到后台导出队列"""
         if not self.current_images:
             QMessageBox.warning(self, "导出失败", "没有可下载的图片")
             return
@@ -549,74 +551,57 @@ class MainWindow(QMainWindow):
                 QFileDialog.Option.ShowDirsOnly
             )
             
-            if directory:
-                if current_tab == self.style_text_tab:
-                    # 封面编辑模式：直接保存图片
-                    content = self.style_text_editor.text_edit.toPlainText()
-                    # 去除可能存在的非法文件名字符
-                    safe_content = "".join(c for c in content if c not in r'\/:*?"<>|')
-                    filename = f"{safe_content}_封面.png"
-                    filepath = os.path.join(directory, filename)
-                    
-                    # 保存图片
-                    self.current_images[0].save(filepath, 'PNG')
-                    
-                    # 显示成功消息
-                    QMessageBox.information(
-                        self,
-                        "导出成功",
-                        f"成功导出 1 张封面图片\n保存路径：{filepath}"
+            if not directory:
+                return
+            
+            # 按选择的输出尺寸生成页面
+            profile_name = self.style_panel.get_current_style().get('output_profile')
+            producers = self.get_page_producers(profile_name)
+            export_settings = self.style_panel.get_export_settings()
+            
+            if current_tab == self.style_text_tab:
+                # 封面编辑模式：直接保存图片
+                content = self.style_text_editor.text_edit.toPlainText()
+                # 去除可能存在的非法文件名字符
+                safe_content = "".join(c for c in content if c not in r'\/:*?"<>|')
+                job = ExportJob("封面", [(f"{safe_content}_封面", producers[0])],
+                                FolderTarget(directory, export_settings))
+                
+            else:
+                # 文本编辑模式：创建日期-标题文件夹
+                content = self.text_editor.get_all_content()
+                title = ""
+                
+                # 查找第一个标题块
+                for item in content:
+                    if item['type'] == 'title' and item.get('text', '').strip():
+                        title = item['text'].strip()
+                        break
+                
+                if not title:
+                    title = "未命名"
+                
+                # 去除可能存在的非法文件名字符
+                safe_title = "".join(c for c in title if c not in r'\/:*?"<>|')
+                
+                # 创建文件夹名称：日期-标题
+                today = datetime.now().strftime('%Y%m%d')
+                folder_name = f"{today}-{safe_title}"
+                
+                if export_settings.bundle_zip:
+                    target = ZipTarget(
+                        os.path.join(directory, f"{folder_name}.zip"),
+                        export_settings,
+                        folder=folder_name,
+                        metadata={'title': title, 'output_profile': get_profile(profile_name).name}
                     )
-                    
                 else:
-                    # 文本编辑模式：创建日期-标题文件夹
-                    content = self.text_editor.get_all_content()
-                    title = ""
-                    
-                    # 查找第一个标题块
-                    for item in content:
-                        if item['type'] == 'title' and item.get('text', '').strip():
-                            title = item['text'].strip()
-                            break
-                    
-                    if not title:
-                        title = "未命名"
-                    
-                    # 去除可能存在的非法文件名字符
-                    safe_title = "".join(c for c in title if c not in r'\/:*?"<>|')
-                    
-                    # 创建文件夹名称：日期-标题
-                    today = datetime.now().strftime('%Y%m%d')
-                    folder_name = f"{today}-{safe_title}"
-                    folder_path = os.path.join(directory, folder_name)
-                    
-                    # 创建文件夹
-                    os.makedirs(folder_path, exist_ok=True)
-                    
-                    # 保存所有图片
-                    saved_count = 0
-                    for i, image in enumerate(self.current_images):
-                        try:
-                            filename = f"{safe_title}_{i + 1}.png"
-                            filepath = os.path.join(folder_path, filename)
-                            image.save(filepath, 'PNG')
-                            saved_count += 1
-                        except Exception as e:
-                            print(f"保存图片 {i + 1} 失败: {str(e)}")
-                    
-                    # 显示成功消息
-                    if saved_count == len(self.current_images):
-                        QMessageBox.information(
-                            self,
-                            "导出成功",
-                            f"成功导出 {saved_count} 张图片\n保存路径：{folder_path}"
-                        )
-                    else:
-                        QMessageBox.warning(
-                            self,
-                            "部分导出成功",
-                            f"成功导出 {saved_count}/{len(self.current_images)} 张图片\n保存路径：{folder_path}"
-                        )
+                    target = FolderTarget(os.path.join(directory, folder_name), export_settings)
+                
+                items = [(f"{safe_title}_{i + 1}", produce) for i, produce in enumerate(producers)]
+                job = ExportJob(title, items, target)
+            
+            self.submit_export(job)
             
         except Exception as e:
             QMessageBox.critical(
@@ -625,6 +610,62 @@ class MainWindow(QMainWindow):
                 f"保存图片时发生错误：\n{str(e)}"
             )
     
+    def submit_export(self, job):
+        """提交导出任务，导出期间可以继续编辑"""
+        self.export_progress.add_job(job)
+        self.export_queue.submit(job, self.export_signals.on_progress, self.export_signals.on_finished)
+    
+    def cancel_exports(self):
+        """取消所有进行中的导出任务"""
+        print("取消导出任务")
+        self.export_queue.cancel_all()
+    
+    def on_export_finished(self, job):
+        """导出任务结束（界面线程）"""
+        self.export_progress.remove_job(job)
+        location = job.target.location
+        
+        if job.status == 'cancelled':
+            QMessageBox.information(
+                self,
+                "导出已取消",
+                f"已导出 {job.completed}/{job.total} 项后取消\n{location}"
+            )
+            return
+        
+        if job.status == 'failed':
+            QMessageBox.critical(
+                self,
+                "导出失败",
+                f"保存时发生错误：\n{job.error}"
+            )
+            return
+        
+        if isinstance(job.target, TextFileTarget):
+            if job.failures:
+                QMessageBox.critical(self, "导出失败", f"保存文档时发生错误：\n{job.failures[0][2]}")
+            else:
+                QMessageBox.information(self, "导出成功", f"文档已保存到：\n{location}")
+            return
+        
+        saved = [info for info in job.results if info is not None]
+        if not job.failures:
+            QMessageBox.information(
+                self,
+                "导出成功",
+                f"成功导出 {len(saved)} 张图片\n保存路径：{location}\n"
+                f"{format_export_report(saved)}"
+            )
+        else:
+            failed = "\n".join(f"第 {index + 1} 张（{name}）: {error}"
+                                for index, name, error in job.failures)
+            QMessageBox.warning(
+                self,
+                "部分导出成功",
+                f"成功导出 {len(saved)}/{job.total} 张图片\n保存路径：{location}\n"
+                f"失败：\n{failed}"
+            )
+    
     def preview_style_change(self, style):
         """当样式改变时更新预览"""
         if self.current_images:
@@ -642,22 +683,16 @@ class MainWindow(QMainWindow):
     def calculate_initial_preview_size(self):
         """计算初始预览尺寸"""
         # 使用 iPhone 15 Pro 的显示比例
-        preview_width = int(1080 * self.preview_label.default_zoom)
-        preview_height = int(1440 * self.preview_label.default_zoom)
+        preview_width = int(BASE_WIDTH * self.preview_label.default_zoom)
+        preview_height = int(BASE_HEIGHT * self.preview_label.default_zoom)
         
         # 更新预览标签的固定大小
         self.preview_label.setFixedSize(QSize(preview_width, preview_height))
     
     def update_preview_size(self):
         """更新预览图片大小"""
-        # 让 PreviewLabel 自己处理缩放
-        self.preview_label.update_preview_size()
-        
-        # 更新当前显示的图片或背景
-        if self.current_images:
-            self.update_preview()
-        else:
-            self.preview_background()
+        # 让 PreviewLabel 自己处理缩放（从已有的多级图片缩放，不重新转换页面或背景图片）
+        self.preview_label.update_preview_size(smooth=False)
     
     def preview_background(self):
         """预览当前选择的背景"""
@@ -668,35 +703,22 @@ class MainWindow(QMainWindow):
             bg_config = next((bg for bg in self.style_panel.config['backgrounds'] 
                             if bg['value'] == bg_value), None)
             
-            if bg_config and bg_config['url']:
-                # bg_config['url'] 现在应该已经是完整路径
-                bg_path = bg_config['url']
-                print(f"加载背景图片: {bg_path}")
-                    
-                if not os.path.exists(bg_path):
-                    print(f"背景图片不存在: {bg_path}")
-                    self.preview_label.clear()
-                    return
-                    
-                # 加载背景图片
-                pixmap = QPixmap(bg_path)
+            # 程序化背景直接生成，图片背景从缓存读取
+            background = self.image_generator.background_engine.get_background(
+                bg_config,
+                (self.image_generator.width, self.image_generator.height)
+            ) if bg_config else None
+            
+            if background is not None:
+                print(f"加载背景: {bg_config.get('value')}")
+                pixmap = pil_to_qpixmap(background)
                 if pixmap.isNull():
                     print("背景图片加载失败")
                     self.preview_label.clear()
                     return
                     
-                # 获取预览标签的大小
-                label_size = self.preview_label.size()
-                
-                # 缩放图片以填充预览标签，保持宽高比
-                scaled_pixmap = pixmap.scaled(
-                    label_size,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                
-                # 显示预
-                self.preview_label.setPixmap(scaled_pixmap)
+                # 预览标签按缩放比例从多级图片缩放
+                self.preview_label.setPixmap(pixmap)
                 print("背景图片加载成功")
             else:
                 # 如果没有背景配置，显示空白
@@ -713,6 +735,12 @@ class MainWindow(QMainWindow):
         # 移除自动生成图片的逻辑，只在点击生成按钮时生成
         pass
 
+    def on_markdown_changed(self):
+        """监视模式下 Markdown 文件重新加载后自动重新生成（未变化的段落不会重新换行）"""
+        if (self.markdown_tab.watch_checkbox.isChecked()
+                and self.tabs.currentWidget() == self.markdown_tab and self.current_images):
+            self.generate_image()
+
     def download_text_document(self):
         """下载文本内容到txt文件"""
         try:
@@ -753,16 +781,11 @@ class MainWindow(QMainWindow):
                             text_content.append(f"{item['text']}\n")
                         text_content.append("\n")  # 添加空行分隔
                 
-                # 写入文件
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.writelines(text_content)
-                
-                # 显示成功消息
-                QMessageBox.information(
-                    self,
-                    "导出成功",
-                    f"文档已保存到：\n{filepath}"
-                )
+                # 在导出队列中写入文件
+                text = "".join(text_content)
+                job = ExportJob(filename, [(filename, lambda: text)],
+                                TextFileTarget(filepath))
+                self.submit_export(job)
                 
         except Exception as e:
             QMessageBox.critical(
@@ -771,8 +794,190 @@ class MainWindow(QMainWindow):
                 f"保存文档时发生错误：\n{str(e)}"
             )
 
+    def polish_all(self):
+        """整篇润色：所有文本块在后台并发请求，完成后写回；润色中再次点击取消"""
+        if self.polish_future is not None:
+            self.polish_future.cancel()
+            return
+        
+        blocks = [block for block in self.text_editor.document.blocks() if block.text.strip()]
+        if not blocks:
+            QMessageBox.warning(self, "AI润色", "没有需要润色的文本")
+            return
+        
+        originals = {block.block_id: block.text for block in blocks}
+        start = time.perf_counter()
+        self.polish_button.setText("取消润色")
+        self.polish_future = self.async_bridge.submit(
+            self.ai_helper.polish_document(list(originals.values())),
+            on_done=lambda results: self.on_polish_finished(originals, dict(zip(originals, results)), start),
+            on_error=self.on_polish_failed,
+            on_cancel=lambda: self.on_polish_failed(None)
+        )
+    
+    def on_polish_finished(self, originals, polished, start):
+        """整篇润色完成（界面线程）"""
+        self.polish_future = None
+        self.polish_button.setText("AI润色")
+        updated = self.text_editor.apply_polished(originals, polished)
+        print(f"AI润色完成: 更新 {updated}/{len(originals)} 个文本块，耗时 {time.perf_counter() - start:.1f} 秒")
+        print(self.ai_helper.stats.format_report())
+        self.statusBar().showMessage(f"AI润色完成：更新 {updated} 个文本块", 3000)
+    
+    def on_polish_failed(self, error):
+        """整篇润色出错或被取消（界面线程）"""
+        self.polish_future = None
+        self.polish_button.setText("AI润色")
+        if error is None:
+            self.statusBar().showMessage("已取消AI润色", 3000)
+        else:
+            QMessageBox.critical(self, "AI润色失败", f"润色时发生错误：\n{str(error)}")
+    
+    def build_project_state(self):
+        """收集当前的文本块、封面、样式和分页方案"""
+        style = self.style_panel.get_current_style()
+        style['export'] = self.style_panel.get_export_settings().to_dict()
+        blocks = [{
+            'block_id': block.block_id,
+            'type': block.type,
+            'text': block.text,
+            'line_spacing': block.line_spacing,
+            'font_size': block.font_size
+        } for block in self.text_editor.document.blocks()]
+        
+        return {
+            'editor': self.text_editor.get_editor_settings(),
+            'blocks': blocks,
+            'cover': encode_cover(self.style_text_editor.get_content()),
+            'style': style,
+            'layout': self.build_layout_record()
+        }
+    
+    def build_layout_record(self):
+        """
+        当前预览的分页方案与文本编辑内容一致时，连同指纹一起保存，
+        重新打开项目时可以直接使用，不需要重新换行
+        """
+        render = self.current_render
+        if not render or render['kind'] != 'pages':
+            return None
+        
+        items = self.text_editor.get_all_content()
+        plan_keys = []
+        for page in render['page_plan']:
+            for item in page:
+                key = (item.get('block_id'), item.get('version'))
+                if not plan_keys or plan_keys[-1] != key:
+                    plan_keys.append(key)
+        if plan_keys != [(item['block_id'], item['version']) for item in items]:
+            return None
+        
+        layout = serialize_page_plan(render['page_plan'])
+        if layout is None:
+            return None
+        layout.update({
+            'font_style': render['font_style'],
+            'fingerprint': self.image_generator.layout_fingerprint(render['font_style']),
+            'content_hash': content_hash(items)
+        })
+        return layout
+    
+    def save_project(self):
+        """保存项目（已有项目文件时只追加变化的部分）"""
+        try:
+            if self.project_file is None:
+                path, _ = QFileDialog.getSaveFileName(
+                    self, "保存项目", "", f"项目文件 (*{PROJECT_EXTENSION})")
+                if not path:
+                    return
+                if not path.endswith(PROJECT_EXTENSION):
+                    path += PROJECT_EXTENSION
+                self.project_file = ProjectFile(path)
+            
+            count = self.project_file.save(self.build_project_state())
+            print(f"项目已保存: {self.project_file.path}（写入 {count} 条记录）")
+            self.statusBar().showMessage(f"项目已保存：{self.project_file.path}", 3000)
+            
+        except Exception as e:
+            QMessageBox.critical(self, "保存失败", f"保存项目时发生错误：\n{str(e)}")
+    
+    def open_project(self):
+        """打开项目，分页方案仍然有效时直接显示，不重新换行"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "打开项目", "", f"项目文件 (*{PROJECT_EXTENSION})")
+        if not path:
+            return
+        
+        try:
+            project, state = ProjectFile.load(path)
+            
+            self.text_editor.set_editor_settings(state['editor'])
+            self.text_editor.set_all_content(state['blocks'])
+            if state['style']:
+                self.style_panel.set_style(state['style'])
+            if state['cover']:
+                self.style_text_editor.set_content(decode_cover(state['cover']))
+            self.project_file = project
+            self.tabs.setCurrentIndex(0)
+            
+            style = self.style_panel.get_current_style()
+            page_plan = self.restore_layout(state.get('layout'), style['font_style'])
+            if page_plan is None:
+                self.generate_image()
+                return
+            
+            print("使用项目中保存的分页方案")
+            self.show_page_plan(page_plan, self.get_background_config(style), style['font_style'])
+            self.show_generated_images()
+            
+        except Exception as e:
+            QMessageBox.critical(self, "打开失败", f"打开项目时发生错误：\n{str(e)}")
+    
+    def restore_layout(self, layout, font_style):
+        """检查指纹和内容摘要，恢复保存的分页方案，无效时返回 None"""
+        if not layout or layout.get('font_style') != font_style:
+            return None
+        if layout.get('fingerprint') != self.image_generator.layout_fingerprint(font_style):
+            print("字体或排版版本已变化，重新分页")
+            return None
+        
+        items = self.text_editor.get_all_content()
+        if layout.get('content_hash') != content_hash(items):
+            return None
+        
+        page_plan, block_lines = restore_page_plan(layout, items)
+        if page_plan is None:
+            return None
+        
+        # 之后修改其他文本块时，未修改的文本块也不需要重新换行
+        for item in items:
+            self.image_generator.prime_block_lines(item, font_style, block_lines[item['block_id']])
+        return page_plan
+    
+    def closeEvent(self, event):
+        """关闭窗口时取消未完成的导出任务和 AI 润色"""
+        self.export_queue.shutdown(wait=False)
+        self.text_editor.cancel_streams()
+        self.prepolisher.set_enabled(False)
+        if self.polish_future is not None:
+            self.polish_future.cancel()
+        self.async_bridge.shutdown(self.ai_helper.close())
+        super().closeEvent(event)
+
 class PreviewLabel(QLabel):
-    """自定义预览标签，支持椭圆调整"""
+    """
+    自定义预览标签，支持缩放和直接拖动封面装饰
+
+    预览封面时:
+        - 拖动椭圆上下移动（位置），拖动椭圆左右边缘调整大小
+        - 拖动下划线上下移动（距离），按住 Shift 拖动调整粗细
+        - 拖动过程中只用 QPainter 在预览上绘制新的位置（最多 60 帧/秒），松开鼠标后
+          把结果写回 StyleTextEditor.text_marks，再重新生成一次封面；Esc 取消
+    """
+    marks_edited = pyqtSignal()  # 拖动装饰结束，样式标记已更新
+
+    HIT_TOLERANCE = 6  # 命中装饰的容差（屏幕像素）
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMouseTracking(True)
@@ -780,14 +985,35 @@ class PreviewLabel(QLabel):
         self.resizing = False
         self.adjusting_width = False
         self.drag_start = QPoint()
-        self.current_ellipse = None
-        self.current_underline = None
-        self.ellipse_marks = []
-        self.underline_marks = []
+        self.current_ellipse = None     # 正在拖动的椭圆标记 (start, end)
+        self.current_underline = None   # 正在拖动的下划线标记 (start, end)
+        self.ellipse_marks = []         # 封面上的椭圆 [((start, end), style)]
+        self.underline_marks = []       # 封面上的下划线 [((start, end), style)]
         self.style_text_editor = None
+        self.image_generator = None
         self.scale_factor = 1.0
         
+        self.cover_text = None     # 当前预览的封面文字，None 表示预览的不是封面
+        self.cover_layout = None   # 封面文字布局（基准单位），用于命中检测和绘制
+        self.drag_style = None     # 拖动中的样式（原样式的副本）
+        self.drag_origin = None    # 按下时的样式
+        self.drag_target = None    # 被拖动的样式对象（同一区间可能有多个标记，不能按区间查找）
+        self.resize_edge = 0       # 调整椭圆大小时抓住的边：-1 左边，1 右边
+        
+        # 拖动时按 60 帧/秒刷新叠加层
+        self.overlay_timer = QTimer(self)
+        self.overlay_timer.setSingleShot(True)
+        self.overlay_timer.setInterval(16)
+        self.overlay_timer.timeout.connect(self.update)
+        
         self._original_pixmap = None  # 添加这行来存储原始图片
+        self._pyramid = None  # 原始图片的多级缩小版本
+        
+        # 缩放或调整窗口大小期间快速缩放，停止输入后平滑缩放一次
+        self.smooth_timer = QTimer(self)
+        self.smooth_timer.setSingleShot(True)
+        self.smooth_timer.setInterval(150)
+        self.smooth_timer.timeout.connect(self.update_preview_size)
         self.zoom_factor = 1.0
         self.iphone_width = 1179
         self.iphone_height = 2556
@@ -796,8 +1022,8 @@ class PreviewLabel(QLabel):
         
         # 设置默认缩放以适应 iPhone 显示效果
         self.default_zoom = min(
-            self.iphone_width / 1080,
-            self.iphone_height / 1440
+            self.iphone_width / BASE_WIDTH,
+            self.iphone_height / BASE_HEIGHT
         ) * 0.4
         self.zoom_factor = self.default_zoom
         
@@ -806,37 +1032,237 @@ class PreviewLabel(QLabel):
     def setPixmap(self, pixmap):
         """重写setPixmap方法以应用缩放"""
         if pixmap:
-            self._original_pixmap = pixmap
-            self.update_preview_size()
+            self.set_pyramid(PixmapPyramid(pixmap))
         else:
             self._original_pixmap = None
+            self._pyramid = None
             super().setPixmap(None)
 
-    def update_preview_size(self):
-        """更新预览图片大小"""
-        if not self._original_pixmap:
-                    return
+    def set_pyramid(self, pyramid):
+        """显示预先生成的多级图片（来自预览缓存）"""
+        self._pyramid = pyramid
+        self._original_pixmap = pyramid.source
+        self.update_preview_size()
+
+    def update_preview_size(self, smooth=True):
+        """
+        更新预览图片大小
+        
+        参数:
+            smooth (bool): False 时从最接近的一级快速缩放，输入停止后再平滑缩放一次
+        """
+        if not self._pyramid:
+            return
 
         # 计算缩放后的尺寸
-        scaled_width = int(1080 * self.zoom_factor)
-        scaled_height = int(1440 * self.zoom_factor)
+        scaled_width = int(BASE_WIDTH * self.zoom_factor)
+        scaled_height = int(BASE_HEIGHT * self.zoom_factor)
         
         # 设置固定大小
         self.setFixedSize(scaled_width, scaled_height)
         
         # 缩放图片
-        scaled_pixmap = self._original_pixmap.scaled(
-            scaled_width,
-            scaled_height,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
+        scaled_pixmap = self._pyramid.scaled(scaled_width, scaled_height, smooth)
+        if smooth or self._pyramid.is_smooth(scaled_width, scaled_height):
+            self.smooth_timer.stop()
+        else:
+            self.smooth_timer.start()
         
         # 使用父类的setPixmap方法来避免递归
         super().setPixmap(scaled_pixmap)
         
         # 更新缩放因子
-        self.scale_factor = scaled_width / 1080
+        self.scale_factor = scaled_width / BASE_WIDTH
+
+    def set_cover(self, content):
+        """
+        设置当前预览的封面内容，用于直接拖动装饰
+
+        参数:
+            content (dict): 生成封面时的内容，预览的不是封面时为 None
+        """
+        self.cancel_drag()
+        if content is None or self.image_generator is None:
+            self.cover_text = None
+            self.cover_layout = None
+            self.ellipse_marks = []
+            self.underline_marks = []
+            self.unsetCursor()
+            return
+        with self.image_generator.render_lock:
+            _, _, self.cover_layout = self.image_generator.get_cover_layout(content)
+        self.cover_text = content['text']
+        self.refresh_marks()
+
+    def refresh_marks(self):
+        """从封面编辑器读取当前的椭圆和下划线标记"""
+        marks = self.style_text_editor.text_marks.items() if self.style_text_editor else []
+        self.ellipse_marks = [(key, style) for key, style in marks if style['type'] == 'ellipse']
+        self.underline_marks = [(key, style) for key, style in marks if style['type'] == 'underline']
+
+    def can_edit_marks(self):
+        """封面文字在生成之后被修改过时布局已经不对，不能拖动"""
+        return (self.cover_layout is not None and self.style_text_editor is not None
+                and self.style_text_editor.text_edit.toPlainText() == self.cover_text)
+
+    def hit_test(self, pos):
+        """
+        查找鼠标位置上的装饰
+
+        返回:
+            tuple: (类型, 标记, 样式, 抓住的边)，类型为 'underline' / 'move' / 'resize'，没有命中时返回 None
+        """
+        scale = self.scale_factor
+        tol = self.HIT_TOLERANCE
+        x, y = pos.x(), pos.y()
+        # 下划线较细，优先检测
+        for key, style in self.underline_marks:
+            half = max(tol, style.get('width', 2) * scale / 2)
+            for x0, line_y, x1 in self.cover_layout.underline_segments(key[0], key[1], style):
+                if x0 * scale - tol <= x <= x1 * scale + tol and abs(y - line_y * scale) <= half:
+                    return 'underline', key, style, 0
+        for key, style in self.ellipse_marks:
+            box = self.cover_layout.ellipse_box(key[0], key[1], style)
+            if box is None:
+                continue
+            x0, y0, x1, y1 = (v * scale for v in box)
+            if not (x0 - tol <= x <= x1 + tol and y0 - tol <= y <= y1 + tol):
+                continue
+            if abs(x - x0) <= tol:
+                return 'resize', key, style, -1
+            if abs(x - x1) <= tol:
+                return 'resize', key, style, 1
+            return 'move', key, style, 0
+        return None
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.MouseButton.LeftButton or not self.can_edit_marks():
+            super().mousePressEvent(event)
+            return
+        self.refresh_marks()
+        hit = self.hit_test(event.position())
+        if hit is None:
+            super().mousePressEvent(event)
+            return
+
+        kind, key, style, edge = hit
+        self.drag_start = event.position().toPoint()
+        self.drag_target = style
+        self.drag_origin = dict(style)
+        self.drag_style = dict(style)
+        self.resize_edge = edge
+        if kind == 'underline':
+            self.current_underline = key
+            self.adjusting_width = bool(event.modifiers() & Qt.KeyboardModifier.ShiftModifier)
+            self.dragging = not self.adjusting_width
+        else:
+            self.current_ellipse = key
+            self.resizing = kind == 'resize'
+            self.dragging = not self.resizing
+        self.setFocus()
+        event.accept()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_style is None:
+            self.update_hover_cursor(event.position())
+            super().mouseMoveEvent(event)
+            return
+
+        dx = (event.position().x() - self.drag_start.x()) / self.scale_factor
+        dy = (event.position().y() - self.drag_start.y()) / self.scale_factor
+        editor = self.style_text_editor
+        origin = self.drag_origin
+        if self.current_ellipse is not None:
+            if self.resizing:
+                self.drag_style['size'] = self.clamp(origin.get('size', 10) + dx * self.resize_edge,
+                                                     editor.size_spin)
+            else:
+                self.drag_style['position'] = self.clamp(origin.get('position', 0) + dy, editor.position_spin)
+        elif self.adjusting_width:
+            self.drag_style['width'] = self.clamp(origin.get('width', 2) + dy, editor.underline_width_spin)
+        else:
+            self.drag_style['offset'] = self.clamp(origin.get('offset', 5) + dy, editor.underline_offset_spin)
+
+        # 合并同一帧内的多次移动
+        if not self.overlay_timer.isActive():
+            self.overlay_timer.start()
+        event.accept()
+
+    @staticmethod
+    def clamp(value, spin):
+        """取整并限制在对应调节框的范围内"""
+        return max(spin.minimum(), min(spin.maximum(), int(round(value))))
+
+    def mouseReleaseEvent(self, event):
+        if self.drag_style is None or event.button() != Qt.MouseButton.LeftButton:
+            super().mouseReleaseEvent(event)
+            return
+
+        key = self.current_ellipse if self.current_ellipse is not None else self.current_underline
+        changed = self.drag_style != self.drag_origin
+        style = self.drag_style
+        target = self.drag_target
+        self.cancel_drag()
+        marks = self.style_text_editor.text_marks
+        if changed and any(existing is target for existing in marks.get_all(key)):
+            target.update(style)
+            # 只在松开时重新生成一次封面
+            self.marks_edited.emit()
+        event.accept()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Escape and self.drag_style is not None:
+            self.cancel_drag()
+            event.accept()
+            return
+        super().keyPressEvent(event)
+
+    def cancel_drag(self):
+        """结束拖动并清除叠加层"""
+        had_overlay = self.drag_style is not None
+        self.dragging = self.resizing = self.adjusting_width = False
+        self.current_ellipse = self.current_underline = None
+        self.drag_style = self.drag_origin = self.drag_target = None
+        self.overlay_timer.stop()
+        if had_overlay:
+            self.update()
+
+    def update_hover_cursor(self, pos):
+        """鼠标悬停在装饰上时显示对应的光标"""
+        hit = self.hit_test(pos) if self.can_edit_marks() else None
+        if hit is None:
+            self.unsetCursor()
+        elif hit[0] == 'resize':
+            self.setCursor(Qt.CursorShape.SizeHorCursor)
+        else:
+            self.setCursor(Qt.CursorShape.SizeVerCursor)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.drag_style is None or self.cover_layout is None:
+            return
+
+        # 拖动中的装饰用 QPainter 绘制在预览图片上，不重新生成封面
+        scale = self.scale_factor
+        style = self.drag_style
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        pen = QPen(QColor(style.get('color', '#000000')))
+        pen.setWidthF(max(1.0, style.get('width', 2) * scale))
+        painter.setPen(pen)
+        if self.current_ellipse is not None:
+            box = self.cover_layout.ellipse_box(self.current_ellipse[0], self.current_ellipse[1], style)
+            if box is not None:
+                rect = QRectF(QPointF(box[0] * scale, box[1] * scale), QPointF(box[2] * scale, box[3] * scale))
+                painter.drawEllipse(rect)
+                guide = QPen(QColor('#4096FF'), 1, Qt.PenStyle.DashLine)
+                painter.setPen(guide)
+                painter.drawRect(rect)
+        else:
+            key = self.current_underline
+            for x0, line_y, x1 in self.cover_layout.underline_segments(key[0], key[1], style):
+                painter.drawLine(QPointF(x0 * scale, line_y * scale), QPointF(x1 * scale, line_y * scale))
+        painter.end()
 
     def wheelEvent(self, event):
         """处理鼠标滚轮事件实现缩放"""
@@ -850,7 +1276,7 @@ class PreviewLabel(QLabel):
             # 限制缩放范围
             if self.min_zoom <= new_zoom <= self.max_zoom:
                 self.zoom_factor = new_zoom
-                self.update_preview_size()
+                self.update_preview_size(smooth=False)
                 event.accept()
                 return
                 
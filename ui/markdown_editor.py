@@ -1,52 +1,94 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                           QFileDialog, QTextEdit, QLabel)
-from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+                           QFileDialog, QTextEdit, QLabel, QCheckBox)
+from PyQt6.QtCore import pyqtSignal, QFileSystemWatcher, QTimer
+from difflib import SequenceMatcher
+import itertools
 import markdown
 import os
+import re
 
 class MarkdownEditor(QWidget):
     content_changed = pyqtSignal()  # 内容变化信号
 
+    DEBOUNCE_MS = 300        # 编辑器保存时常连续触发多次变化，合并为一次重新加载
+    POLL_INTERVAL_MS = 1000  # 无法监视文件时的轮询间隔
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_file = None
+        self.content = []
+
+        # 增量重新加载的状态：原始分块及每块的编号和版本
+        self.chunks = []
+        self.chunk_ids = []
+        self.chunk_versions = []
+        self._chunk_ids = itertools.count(1)
+        self._versions = itertools.count(1)
+        self._parsed = {}      # 原始分块 -> (类型, 文本, 样式标记)
+        self._html = {}        # 原始分块 -> HTML 片段
+        self._file_stamp = None
+
         self.init_ui()
+        self.init_watcher()
 
     def init_ui(self):
         layout = QVBoxLayout(self)
-        
+
         # 创建顶部按钮区域
         button_container = QWidget()
         button_layout = QHBoxLayout(button_container)
-        
+
         # 创建打开文件按钮
         self.open_button = QPushButton("打开Markdown文件")
         self.open_button.setMinimumHeight(40)
         self.open_button.clicked.connect(self.open_markdown_file)
-        
+
         # 创建刷新按钮
         self.refresh_button = QPushButton("刷新")
         self.refresh_button.setMinimumHeight(40)
         self.refresh_button.clicked.connect(self.refresh_content)
         self.refresh_button.setEnabled(False)
-        
+
+        # 监视文件变化
+        self.watch_checkbox = QCheckBox("监视文件变化")
+        self.watch_checkbox.setToolTip("文件保存后自动重新加载，只重新解析有变化的段落")
+        self.watch_checkbox.setEnabled(False)
+        self.watch_checkbox.toggled.connect(self.set_watching)
+
         # 添加按钮到布局
         button_layout.addWidget(self.open_button)
         button_layout.addWidget(self.refresh_button)
+        button_layout.addWidget(self.watch_checkbox)
         button_layout.addStretch()
-        
+
         # 添加文件路径显示标签
         self.file_label = QLabel()
-        
+
         # 创建预览区域
         self.preview = QTextEdit()
         self.preview.setReadOnly(True)
-        
+
         # 添加所有组件到主布局
         layout.addWidget(button_container)
         layout.addWidget(self.file_label)
         layout.addWidget(self.preview)
 
+    def init_watcher(self):
+        """文件监视（系统通知）、轮询和防抖定时器"""
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.schedule_reload)
+        # 很多编辑器保存时先写临时文件再重命名，同时监视所在目录
+        self.watcher.directoryChanged.connect(self.schedule_reload)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(self.DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(self.reload_if_changed)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(self.POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self.reload_if_changed)
+
     def open_markdown_file(self):
         """打开Markdown文件"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -55,162 +97,264 @@ class MarkdownEditor(QWidget):
             "",
             "Markdown Files (*.md);;All Files (*)"
         )
-        
+
         if file_path:
+            watching = self.watch_checkbox.isChecked()
+            self.set_watching(False)
+
             self.current_file = file_path
             self.file_label.setText(f"当前文件: {os.path.basename(file_path)}")
             self.refresh_button.setEnabled(True)
+            self.watch_checkbox.setEnabled(True)
+
+            # 新文件不复用之前的分块
+            self.chunks = []
+            self.chunk_ids = []
+            self.chunk_versions = []
+            self._parsed.clear()
+            self._html.clear()
             self.load_markdown()
 
+            if watching:
+                self.set_watching(True)
+
     def refresh_content(self):
         """刷新内容"""
         if self.current_file:
             self.load_markdown()
 
+    def set_watching(self, enabled):
+        """开启或关闭文件监视"""
+        self.debounce_timer.stop()
+        self.poll_timer.stop()
+        watched = self.watcher.files() + self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+
+        if not enabled or not self.current_file:
+            return
+
+        if self.watcher.addPath(self.current_file):
+            self.watcher.addPath(os.path.dirname(os.path.abspath(self.current_file)))
+            print(f"监视文件变化: {self.current_file}")
+        else:
+            # 系统不支持文件监视（如部分网络磁盘），改为按修改时间轮询
+            print(f"无法监视文件，改为每 {self.POLL_INTERVAL_MS} ms 检查修改时间")
+            self.poll_timer.start()
+
+    def schedule_reload(self, path=None):
+        """收到变化通知后等待一段时间再加载，合并连续的保存"""
+        self.debounce_timer.start()
+
+    def get_file_stamp(self):
+        try:
+            stat = os.stat(self.current_file)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def reload_if_changed(self):
+        """文件的修改时间或大小变化时重新加载"""
+        if not self.current_file:
+            return
+
+        # 重命名保存后需要重新监视新的文件
+        if self.watch_checkbox.isChecked() and not self.poll_timer.isActive() \
+                and self.current_file not in self.watcher.files() and os.path.exists(self.current_file):
+            self.watcher.addPath(self.current_file)
+
+        stamp = self.get_file_stamp()
+        if stamp is not None and stamp != self._file_stamp:
+            self.load_markdown()
+
     def load_markdown(self):
-        """加载并解析Markdown文件"""
+        """
+        加载并解析Markdown文件
+        文件按段落和标题分块，与上次加载的分块比较后，只有变化的分块重新解析和转换为 HTML；
+        未变化的分块保留原来的编号和版本，分页时可以直接使用缓存的换行结果
+        """
         try:
+            self._file_stamp = self.get_file_stamp()
             with open(self.current_file, 'r', encoding='utf-8') as f:
                 markdown_text = f.read()
-            
-            # 将Markdown转换为HTML以便预览
-            html = markdown.markdown(markdown_text)
-            self.preview.setHtml(html)
-            
-            # 解析Markdown内容为文本编辑器格式
-            content = self.parse_markdown_to_content(markdown_text)
+
+            new_chunks = self.split_markdown_chunks(markdown_text)
+            old_content = self.content
+            content, chunk_ids, chunk_versions = [], [], []
+            parsed_count = 0
+
+            matcher = SequenceMatcher(None, self.chunks, new_chunks, autojunk=False)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                if tag == 'equal':
+                    # 未变化的分块直接复用
+                    content.extend(old_content[i1:i2])
+                    chunk_ids.extend(self.chunk_ids[i1:i2])
+                    chunk_versions.extend(self.chunk_versions[i1:i2])
+                    continue
+
+                for offset, j in enumerate(range(j1, j2)):
+                    # 原位置替换的分块沿用编号，版本递增；新增的分块分配新编号
+                    if tag == 'replace' and i1 + offset < i2:
+                        block_id = self.chunk_ids[i1 + offset]
+                    else:
+                        block_id = f"md:{next(self._chunk_ids)}"
+                    version = next(self._versions)
+
+                    raw = new_chunks[j]
+                    if raw not in self._parsed:
+                        self._parsed[raw] = self.parse_chunk(raw)
+                        parsed_count += 1
+                    block_type, text, marks = self._parsed[raw]
+                    content.append({
+                        'type': block_type,
+                        'text': text,
+                        'marks': dict(marks),
+                        'block_id': block_id,
+                        'version': version
+                    })
+                    chunk_ids.append(block_id)
+                    chunk_versions.append(version)
+
+            self.chunks = new_chunks
+            self.chunk_ids = chunk_ids
+            self.chunk_versions = chunk_versions
             self.content = content
+
+            # 只转换变化的分块，丢弃不再使用的缓存
+            live = set(new_chunks)
+            self._parsed = {raw: value for raw, value in self._parsed.items() if raw in live}
+            self._html = {raw: value for raw, value in self._html.items() if raw in live}
+            self.update_preview_html()
+
+            print(f"Markdown 加载完成: {len(new_chunks)} 个分块，重新解析 {parsed_count} 个")
             self.content_changed.emit()
-            
+
         except Exception as e:
             self.preview.setPlainText(f"加载文件失败: {str(e)}")
 
+    def update_preview_html(self):
+        """拼接各分块的 HTML 作为预览，保持滚动位置"""
+        fragments = []
+        for raw in self.chunks:
+            if raw not in self._html:
+                # 将Markdown转换为HTML以便预览
+                self._html[raw] = markdown.markdown(raw)
+            fragments.append(self._html[raw])
+
+        scroll_bar = self.preview.verticalScrollBar()
+        scroll_value = scroll_bar.value()
+        self.preview.setHtml('\n'.join(fragments))
+        scroll_bar.setValue(scroll_value)
+
+    @staticmethod
+    def split_markdown_chunks(markdown_text):
+        """
+        按解析规则把Markdown拆分为原始分块：每个标题行单独成块，其余内容以空行分隔
+        （跨空行的结构如带空行的代码块会被拆开，与内容块的解析方式一致）
+        """
+        chunks = []
+        current = []
+        for line in markdown_text.split('\n'):
+            if line.startswith('#'):
+                if current:
+                    chunks.append('\n'.join(current))
+                    current = []
+                chunks.append(line)
+            elif line.strip():
+                current.append(line)
+            elif current:
+                chunks.append('\n'.join(current))
+                current = []
+        if current:
+            chunks.append('\n'.join(current))
+        return chunks
+
+    def parse_chunk(self, raw):
+        """
+        解析一个原始分块
+
+        返回:
+            tuple: (类型, 处理后的文本, 样式标记)
+        """
+        if raw.startswith('#'):
+            # 移除 # 号并保存标题
+            title, marks = self.process_inline_styles(raw.lstrip('#').strip())
+            return 'title', title, marks
+        text, marks = self.process_inline_styles(raw.strip())
+        return 'content', text, marks
+
     def parse_markdown_to_content(self, markdown_text):
         """将Markdown文本解析为内容块列表"""
         content = []
-        current_text = []
-        is_title = False
-        
-        lines = markdown_text.split('\n')
-        
-        def process_inline_styles(text):
-            """处理行内样式（加粗和倾斜）"""
-            # 存储样式标记
-            marks = {}
-            processed_text = ""
-            current_pos = 0
-            
-            # 处理加粗 (**text** 或 __text__)
-            bold_pattern = r'\*\*(.*?)\*\*|__(.*?)__'
-            # 处理倾斜 (*text* 或 _text_)
-            italic_pattern = r'\*((?!\*).+?)\*|_((?!_).+?)_'
-            
-            # 先处理加粗
-            import re
-            text_parts = []
-            last_end = 0
-            
-            for match in re.finditer(bold_pattern, text):
-                bold_text = match.group(1) or match.group(2)
-                start_pos = len(processed_text + text[last_end:match.start()])
-                
-                # 添加匹配之前的文本
-                text_parts.append(text[last_end:match.start()])
-                # 添加加粗文本
-                text_parts.append(bold_text)
-                
-                # 记录加粗样式
-                end_pos = start_pos + len(bold_text) - 1
-                marks[(start_pos, end_pos)] = {'type': 'bold'}
-                
-                last_end = match.end()
-            
-            text_parts.append(text[last_end:])
-            text = ''.join(text_parts)
-            
-            # 再处理倾斜
-            text_parts = []
-            last_end = 0
-            processed_text = ""
-            
-            for match in re.finditer(italic_pattern, text):
-                italic_text = match.group(1) or match.group(2)
-                start_pos = len(processed_text + text[last_end:match.start()])
-                
-                # 添加匹配之前的文本
-                text_parts.append(text[last_end:match.start()])
-                # 添加倾斜文本
-                text_parts.append(italic_text)
-                
-                # 记录倾斜样式
-                end_pos = start_pos + len(italic_text) - 1
-                marks[(start_pos, end_pos)] = {'type': 'italic'}
-                
-                last_end = match.end()
-                processed_text += text[last_end:match.start()] + italic_text
-            
-            text_parts.append(text[last_end:])
-            final_text = ''.join(text_parts)
-            
-            return final_text, marks
-        
-        for line in lines:
-            # 检测标题
-            if line.startswith('#'):
-                # 如果之前有内容，先保存
-                if current_text:
-                    text = '\n'.join(current_text).strip()
-                    processed_text, marks = process_inline_styles(text)
-                    content.append({
-                        'type': 'title' if is_title else 'content',
-                        'text': processed_text,
-                        'marks': marks
-                    })
-                    current_text = []
-                
-                # 移除 # 号并保存标题
-                title = line.lstrip('#').strip()
-                processed_title, title_marks = process_inline_styles(title)
-                content.append({
-                    'type': 'title',
-                    'text': processed_title,
-                    'marks': title_marks
-                })
-                is_title = False
-                
-            else:
-                # 处理普通文本
-                if line.strip():
-                    current_text.append(line)
-                elif current_text:
-                    # 遇到空行时保存当前文本块
-                    text = '\n'.join(current_text).strip()
-                    processed_text, marks = process_inline_styles(text)
-                    content.append({
-                        'type': 'title' if is_title else 'content',
-                        'text': processed_text,
-                        'marks': marks
-                    })
-                    current_text = []
-                    is_title = False
-        
-        # 保存最后的文本块
-        if current_text:
-            text = '\n'.join(current_text).strip()
-            processed_text, marks = process_inline_styles(text)
-            content.append({
-                'type': 'title' if is_title else 'content',
-                'text': processed_text,
-                'marks': marks
-            })
-        
+        for raw in self.split_markdown_chunks(markdown_text):
+            block_type, text, marks = self.parse_chunk(raw)
+            content.append({'type': block_type, 'text': text, 'marks': marks})
         return content
 
+    def process_inline_styles(self, text):
+        """处理行内样式（加粗和倾斜）"""
+        # 存储样式标记
+        marks = {}
+        processed_text = ""
+
+        # 处理加粗 (**text** 或 __text__)
+        bold_pattern = r'\*\*(.*?)\*\*|__(.*?)__'
+        # 处理倾斜 (*text* 或 _text_)
+        italic_pattern = r'\*((?!\*).+?)\*|_((?!_).+?)_'
+
+        # 先处理加粗
+        text_parts = []
+        last_end = 0
+
+        for match in re.finditer(bold_pattern, text):
+            bold_text = match.group(1) or match.group(2)
+            start_pos = len(processed_text + text[last_end:match.start()])
+
+            # 添加匹配之前的文本
+            text_parts.append(text[last_end:match.start()])
+            # 添加加粗文本
+            text_parts.append(bold_text)
+
+            # 记录加粗样式
+            end_pos = start_pos + len(bold_text) - 1
+            marks[(start_pos, end_pos)] = {'type': 'bold'}
+
+            last_end = match.end()
+
+        text_parts.append(text[last_end:])
+        text = ''.join(text_parts)
+
+        # 再处理倾斜
+        text_parts = []
+        last_end = 0
+        processed_text = ""
+
+        for match in re.finditer(italic_pattern, text):
+            italic_text = match.group(1) or match.group(2)
+            start_pos = len(processed_text + text[last_end:match.start()])
+
+            # 添加匹配之前的文本
+            text_parts.append(text[last_end:match.start()])
+            # 添加倾斜文本
+            text_parts.append(italic_text)
+
+            # 记录倾斜样式
+            end_pos = start_pos + len(italic_text) - 1
+            marks[(start_pos, end_pos)] = {'type': 'italic'}
+
+            last_end = match.end()
+            processed_text += text[last_end:match.start()] + italic_text
+
+        text_parts.append(text[last_end:])
+        final_text = ''.join(text_parts)
+
+        return final_text, marks
+
     def get_all_content(self):
         """获取所有内容，格式与TextEditor兼容"""
-        if not hasattr(self, 'content'):
+        if not self.content:
             return []
-        
+
         # 为每个内容块添加默认的样式参数
         for item in self.content:
             if item['type'] == 'title':
@@ -219,7 +363,7 @@ class MarkdownEditor(QWidget):
             else:
                 item['font_size'] = 32
                 item['line_spacing'] = 45
-            
+
             # 处理加粗和倾斜样式
             marks = item.get('marks', {})
             for (start, end), style in list(marks.items()):
@@ -235,5 +379,5 @@ class MarkdownEditor(QWidget):
                         'width': 2,
                         'color': '#ffaa7f'
                     }
-        
-        return self.content 
\ No newline at end of file
+
+        return self.content
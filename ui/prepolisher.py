@@ -0,0 +1,144 @@
+import logging
+
+from PyQt6.QtCore import QObject, QTimer
+
+
+class PrePolisher(QObject):
+    """
+    空闲时预润色（可选，默认关闭）
+
+    功能:
+        - 监听文本编辑的文档模型，记录修改过的文本块
+        - 停止输入 idle_ms 毫秒后，认为这些文本块已经稳定，在后台预润色
+        - 只请求缓存中没有的片段，结果按内容摘要写入 AI 润色缓存，不修改文本块
+        - 之后点击「AI润色」时，预润色过的片段直接从缓存返回，只有之后又修改过的片段需要请求
+        - 润色结果写回后的文本块、正在流式润色的文本块不预润色
+
+    预润色会在用户没有要求时调用接口，所以默认关闭，同时只发一个请求。
+    """
+
+    def __init__(self, text_editor, ai_helper, async_bridge, idle_ms=3000, max_concurrency=1, parent=None):
+        super().__init__(parent)
+        self.text_editor = text_editor
+        self.ai_helper = ai_helper
+        self.async_bridge = async_bridge
+        self.max_concurrency = max_concurrency
+        self.enabled = False
+        self.dirty = set()     # 修改过、还没有预润色的文本块
+        self.polished = {}     # block_id -> 润色结果写回后的文本，这些文本不需要再润色
+        self.future = None
+        self.token = None      # 每次预润色一个标记，取消后迟到的回调不处理
+        self.requested = 0     # 预润色成功的片段数
+        self.logger = logging.getLogger('PrePolisher')
+
+        # 每次修改重新计时，停止输入一段时间后才处理
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(idle_ms)
+        self.idle_timer.timeout.connect(self.on_idle)
+
+        text_editor.document.subscribe(self.on_document_event)
+        text_editor.block_polished.connect(self.mark_polished)
+
+    def set_enabled(self, enabled):
+        """开启时把现有的文本块都作为待预润色；关闭时取消正在进行的预润色"""
+        self.enabled = enabled
+        if enabled:
+            self.dirty = {block.block_id for block in self.text_editor.document.blocks()}
+            self.idle_timer.start()
+        else:
+            self.dirty.clear()
+            self.idle_timer.stop()
+            if self.future is not None:
+                self.future.cancel()
+                self.future = None
+                self.token = None
+
+    def on_document_event(self, event, block):
+        if not self.enabled:
+            return
+        if event == 'reset':
+            self.polished.clear()
+            self.dirty = {block.block_id for block in self.text_editor.document.blocks()}
+        elif event in ('added', 'text'):
+            self.dirty.add(block.block_id)
+        elif event == 'removed':
+            self.dirty.discard(block.block_id)
+            self.polished.pop(block.block_id, None)
+            return
+        else:
+            return
+        self.idle_timer.start()
+
+    def mark_polished(self, block_id, text):
+        """润色结果写回文本块后调用，这段文字不再预润色"""
+        self.polished[block_id] = text
+
+    def settled_texts(self):
+        """
+        取出稳定的、需要预润色的文本块
+
+        返回:
+            list: [(block_id, 文本)]
+        """
+        settled = []
+        for block_id in sorted(self.dirty):
+            block = self.text_editor.document.get(block_id)
+            if block is None or block_id in self.text_editor.streams:
+                continue
+            if block.text.strip() and block.text != self.polished.get(block_id):
+                settled.append((block_id, block.text))
+        self.dirty = {block_id for block_id in self.dirty if block_id in self.text_editor.streams}
+        return settled
+
+    def on_idle(self):
+        if not self.enabled or not self.dirty:
+            return
+        if self.future is not None:
+            # 上一次预润色还没结束，结束后再处理
+            return
+        settled = self.settled_texts()
+        if not settled:
+            return
+        block_ids = [block_id for block_id, _ in settled]
+        token = self.token = object()
+        self.future = self.async_bridge.submit(
+            self.ai_helper.prepolish([text for _, text in settled], self.max_concurrency),
+            on_done=lambda result: self.on_finished(token, block_ids, result),
+            on_error=lambda e: self.on_failed(token, block_ids, e),
+            on_cancel=lambda: self.on_failed(token, block_ids, None)
+        )
+
+    def on_finished(self, token, block_ids, result):
+        if token is not self.token:
+            return
+        self.future = self.token = None
+        count, failed = result
+        self.requested += count
+        if count:
+            print(f"预润色完成: {count} 个片段（累计 {self.requested} 个）")
+        if failed:
+            self.logger.warning(f"预润色有 {len(failed)} 个文本块失败，稍后重试")
+        self.retry_later([block_ids[index] for index in failed])
+
+    def on_failed(self, token, block_ids, error):
+        if token is not self.token:
+            return
+        self.future = self.token = None
+        if error is None:
+            self.retry_later([])
+            return
+        self.logger.warning(f"预润色失败: {str(error) or type(error).__name__}")
+        self.retry_later(block_ids)
+
+    def retry_later(self, block_ids):
+        """
+        把失败的文本块放回待预润色，重新计时
+
+        预润色期间又修改过的文本块本来就还在 dirty 中，同样在下次空闲时处理。
+        """
+        if not self.enabled:
+            return
+        self.dirty.update(block_ids)
+        if self.dirty:
+            self.idle_timer.start()
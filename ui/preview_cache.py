@@ -0,0 +1,155 @@
+from collections import OrderedDict
+
+from PyQt6.QtCore import QObject, QTimer, Qt
+
+try:
+    from .qt_image import pil_to_qpixmap
+except ImportError:
+    from ui.qt_image import pil_to_qpixmap
+
+
+class PixmapPyramid:
+    """
+    预先缩小的多级图片（原图、1/2、1/4 ...）
+
+    缩放时从不小于目标尺寸的最小一级开始，快速缩放只需处理少量像素；
+    平滑缩放的结果按尺寸缓存一份，缩放停止后重复显示同一尺寸不需要再次计算。
+    """
+
+    def __init__(self, pixmap, min_width=200):
+        self.source = pixmap
+        self.levels = [pixmap]
+        level = pixmap
+        while level.width() // 2 >= min_width:
+            level = level.scaled(level.width() // 2, level.height() // 2,
+                                 Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+            self.levels.append(level)
+        self._smooth = None  # ((宽, 高), 平滑缩放结果)
+
+    def level_for(self, width, height):
+        """不小于目标尺寸的最小一级，目标比原图大时返回原图"""
+        for level in reversed(self.levels):
+            if level.width() >= width and level.height() >= height:
+                return level
+        return self.source
+
+    def is_smooth(self, width, height):
+        """该尺寸的平滑缩放结果是否已经缓存"""
+        return self._smooth is not None and self._smooth[0] == (width, height)
+
+    def scaled(self, width, height, smooth=True):
+        """
+        按目标尺寸缩放（保持宽高比）
+
+        参数:
+            smooth (bool): True 为平滑缩放（结果会缓存），False 为快速缩放（用于连续缩放过程中）；
+                           已有该尺寸的平滑缩放结果时都直接返回缓存
+        """
+        if self.is_smooth(width, height):
+            return self._smooth[1]
+
+        level = self.level_for(width, height)
+        if level.width() == width or level.height() == height:
+            return level
+
+        mode = Qt.TransformationMode.SmoothTransformation if smooth else Qt.TransformationMode.FastTransformation
+        result = level.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio, mode)
+        if smooth:
+            self._smooth = ((width, height), result)
+        return result
+
+
+class PreviewCache(QObject):
+    """
+    预览图片缓存
+
+    把页面图片转换为 PixmapPyramid 并按页码缓存（LRU，限制条目数），同时准备好当前显示尺寸的平滑缩放结果。
+    显示某一页后，在空闲时预先转换前后相邻的页面，翻页时直接命中缓存；
+    调整缩放或窗口大小时只从金字塔重新缩放，不需要重新转换 PIL 图片。
+
+    参数:
+        get_image (callable): get_image(index) 返回第 index 页的 PIL 图片
+        get_count (callable): 返回页数
+        max_items (int): 最多缓存的页数
+        radius (int): 预取当前页前后各多少页
+    """
+
+    def __init__(self, get_image, get_count, max_items=6, radius=2, parent=None):
+        super().__init__(parent)
+        self.get_image = get_image
+        self.get_count = get_count
+        self.max_items = max_items
+        self.radius = radius
+        self.pyramids = OrderedDict()  # 页码 -> PixmapPyramid（最近使用的在最后）
+        self.queue = []                # 待预取的页码
+        self.display_size = None       # 预取时准备的显示尺寸 (宽, 高)
+        self.hits = 0
+        self.misses = 0
+
+        # 每次空闲时处理一页，预取期间界面仍可响应
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setInterval(0)
+        self.prefetch_timer.timeout.connect(self.prefetch_next)
+
+    def invalidate(self):
+        """页面图片重新生成后清空缓存"""
+        self.pyramids.clear()
+        self.queue.clear()
+        self.prefetch_timer.stop()
+
+    def get(self, index, size):
+        """
+        获取第 index 页的 PixmapPyramid
+
+        参数:
+            index (int): 页码
+            size (QSize): 显示尺寸，未缓存时顺便准备该尺寸的平滑缩放结果
+        """
+        pyramid = self.pyramids.get(index)
+        if pyramid is not None:
+            self.hits += 1
+            self.pyramids.move_to_end(index)
+            return pyramid
+
+        self.misses += 1
+        return self.convert(index, (size.width(), size.height()))
+
+    def convert(self, index, display_size):
+        """转换一页并生成金字塔和显示尺寸的平滑缩放结果，存入缓存"""
+        pyramid = PixmapPyramid(pil_to_qpixmap(self.get_image(index)))
+        pyramid.scaled(*display_size)
+        self.pyramids[index] = pyramid
+        while len(self.pyramids) > self.max_items:
+            self.pyramids.popitem(last=False)
+        return pyramid
+
+    def prefetch_around(self, index, size):
+        """安排在空闲时预取 index 前后的页面（先后一页，再前一页，依次向外）"""
+        count = self.get_count()
+        self.display_size = (size.width(), size.height())
+        self.queue = []
+        for distance in range(1, self.radius + 1):
+            for neighbour in (index + distance, index - distance):
+                if 0 <= neighbour < count and neighbour not in self.pyramids:
+                    self.queue.append(neighbour)
+
+        # 当前页最后使用，预取的页面不会把它挤出缓存
+        if index in self.pyramids:
+            self.pyramids.move_to_end(index)
+
+        if self.queue:
+            self.prefetch_timer.start()
+
+    def prefetch_next(self):
+        if not self.queue:
+            self.prefetch_timer.stop()
+            return
+
+        index = self.queue.pop(0)
+        if index in self.pyramids or index >= self.get_count():
+            return
+        try:
+            self.convert(index, self.display_size)
+        except Exception as e:
+            print(f"预取第 {index + 1} 页失败: {str(e)}")
@@ -0,0 +1,13 @@
+from PyQt6.QtGui import QPixmap, QImage
+
+
+def pil_to_qpixmap(image):
+    """把 PIL 图片直接转换为 QPixmap，不经过临时文件（Qt 渲染后端的 QImage 直接使用，不需要转换像素）"""
+    if isinstance(image, QImage):
+        return QPixmap.fromImage(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    data = image.tobytes('raw', 'RGB')
+    qimage = QImage(data, image.width, image.height, image.width * 3, QImage.Format.Format_RGB888)
+    # QImage 不持有 data 的所有权，复制一份
+    return QPixmap.fromImage(qimage.copy())
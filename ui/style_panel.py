@@ -1,6 +1,9 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                           QComboBox, QRadioButton, QColorDialog, QPushButton)
+                           QComboBox, QRadioButton, QColorDialog, QPushButton,
+                           QSpinBox, QCheckBox)
 from PyQt6.QtCore import pyqtSignal
+from core.output_profiles import OUTPUT_PROFILES, DEFAULT_PROFILE
+from core.exporter import ExportSettings, EXPORT_FORMATS, CHROMA_SUBSAMPLING
 import json
 import os
 import sys
@@ -31,10 +34,10 @@ class StylePanel(QWidget):
             with open(config_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
                 
-                # 修正背景图片路径
+                # 修正背景图片路径（程序化背景没有 url）
                 if hasattr(sys, '_MEIPASS'):
                     for bg in config['backgrounds']:
-                        if bg['url']:
+                        if bg.get('url'):
                             # 将相对路径转换为绝对路径
                             bg['url'] = os.path.join(sys._MEIPASS, bg['url'])
                             
@@ -77,6 +80,61 @@ class StylePanel(QWidget):
         font_layout.addWidget(font_label)
         font_layout.addLayout(font_buttons)
         
+        # 输出尺寸（只影响导出，预览始终使用标准尺寸）
+        profile_group = QWidget()
+        profile_layout = QVBoxLayout(profile_group)
+        
+        profile_label = QLabel("输出尺寸：")
+        self.profile_combo = QComboBox()
+        for profile in OUTPUT_PROFILES.values():
+            self.profile_combo.addItem(profile.label, profile.name)
+        self.profile_combo.setCurrentIndex(self.profile_combo.findData(DEFAULT_PROFILE))
+        
+        profile_layout.addWidget(profile_label)
+        profile_layout.addWidget(self.profile_combo)
+        
+        # 导出格式
+        export_group = QWidget()
+        export_layout = QVBoxLayout(export_group)
+        
+        export_label = QLabel("导出格式：")
+        export_row = QHBoxLayout()
+        self.format_combo = QComboBox()
+        for name, (label, _, _) in EXPORT_FORMATS.items():
+            self.format_combo.addItem(label, name)
+        
+        self.quality_spin = QSpinBox()
+        self.quality_spin.setRange(1, 100)
+        self.quality_spin.setValue(90)
+        self.quality_spin.setPrefix("质量 ")
+        self.quality_spin.setToolTip("有损格式的质量；设置大小预算时为质量上限")
+        
+        self.subsampling_combo = QComboBox()
+        self.subsampling_combo.addItems(CHROMA_SUBSAMPLING)
+        self.subsampling_combo.setToolTip("JPEG 色度抽样，4:4:4 色彩最好、文件最大")
+        
+        self.target_kb_spin = QSpinBox()
+        self.target_kb_spin.setRange(0, 20000)
+        self.target_kb_spin.setSingleStep(100)
+        self.target_kb_spin.setSuffix(" KB")
+        self.target_kb_spin.setSpecialValueText("不限大小")
+        self.target_kb_spin.setToolTip("每页大小预算，自动降低质量直到满足预算")
+        
+        export_row.addWidget(self.format_combo)
+        export_row.addWidget(self.quality_spin)
+        export_row.addWidget(self.subsampling_combo)
+        export_row.addWidget(self.target_kb_spin)
+        
+        self.zip_check = QCheckBox("打包为 ZIP")
+        self.zip_check.setToolTip("多页图片直接写入“日期-标题.zip”，不再创建文件夹")
+        
+        export_layout.addWidget(export_label)
+        export_layout.addLayout(export_row)
+        export_layout.addWidget(self.zip_check)
+        
+        self.format_combo.currentIndexChanged.connect(self.update_export_controls)
+        self.update_export_controls()
+        
         # 文字颜色
         #color_group = QWidget()
         #color_layout = QVBoxLayout(color_group)
@@ -91,6 +149,8 @@ class StylePanel(QWidget):
         # 添加所有组件到主布局
         layout.addWidget(bg_group)
         layout.addWidget(font_group)
+        layout.addWidget(profile_group)
+        layout.addWidget(export_group)
         #layout.addWidget(color_group)
         layout.addStretch()
         
@@ -112,9 +172,38 @@ class StylePanel(QWidget):
         return {
             'background': self.bg_combo.currentData(),
             'font_style': 'handwritten' if self.handwritten_font.isChecked() else 'normal',
+            'output_profile': self.profile_combo.currentData(),
             #'text_color': self.text_color_button.palette().button().color().name()
         }
 
+    def update_export_controls(self):
+        """根据导出格式启用对应的选项"""
+        export_format = self.format_combo.currentData()
+        self.quality_spin.setEnabled(export_format != 'png')
+        self.target_kb_spin.setEnabled(export_format != 'png')
+        self.subsampling_combo.setEnabled(export_format == 'jpeg')
+
+    def get_export_settings(self):
+        """获取当前导出设置"""
+        return ExportSettings(
+            format=self.format_combo.currentData(),
+            quality=self.quality_spin.value(),
+            subsampling=self.subsampling_combo.currentText(),
+            progressive=True,
+            target_kb=self.target_kb_spin.value(),
+            bundle_zip=self.zip_check.isChecked()
+        )
+
+    def set_export_settings(self, settings):
+        """恢复导出设置"""
+        index = self.format_combo.findData(settings.format)
+        if index >= 0:
+            self.format_combo.setCurrentIndex(index)
+        self.quality_spin.setValue(settings.quality)
+        self.subsampling_combo.setCurrentText(settings.subsampling)
+        self.target_kb_spin.setValue(settings.target_kb)
+        self.zip_check.setChecked(settings.bundle_zip)
+
     def emit_style_change(self):
         """发出样式变化信号"""
         self.style_changed.emit(self.get_current_style())
@@ -126,6 +215,15 @@ class StylePanel(QWidget):
         if index >= 0:
             self.bg_combo.setCurrentIndex(index)
             
+        # 设置输出尺寸
+        index = self.profile_combo.findData(style_dict.get('output_profile'))
+        if index >= 0:
+            self.profile_combo.setCurrentIndex(index)
+            
+        # 设置导出格式
+        if 'export' in style_dict:
+            self.set_export_settings(ExportSettings.from_dict(style_dict['export']))
+            
         # 设置字体样式
         if style_dict.get('font_style') == 'handwritten':
             self.handwritten_font.setChecked(True)
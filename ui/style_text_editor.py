@@ -6,6 +6,7 @@ from PyQt6.QtGui import QFont, QKeyEvent, QColor
 import os
 import sys
 from PyQt6.QtGui import QFontDatabase
+from core.mark_store import MarkStore, diff_text_edit
 
 class StyleTextEditor(QWidget):
     content_changed = pyqtSignal()
@@ -14,7 +15,8 @@ class StyleTextEditor(QWidget):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.text_marks = {}
+        self.text_marks = MarkStore()
+        self._last_text = ''  # 上一次的文本，用于推算编辑位置以平移标记
         self.selected_chars = set()
         self.last_selected_index = None
         self.shift_pressed = False
@@ -304,8 +306,12 @@ class StyleTextEditor(QWidget):
 
     def on_text_changed(self):
         """当文本改变时"""
-        # 重置样式标记
-        self.text_marks = {}
+        # 按编辑位置平移样式标记，而不是全部清空
+        text = self.text_edit.toPlainText()
+        edit = diff_text_edit(self._last_text, text)
+        if edit is not None:
+            self.text_marks.apply_edit(*edit)
+        self._last_text = text
         self.content_changed.emit()
 
     def on_char_selected(self, index):
@@ -341,10 +347,11 @@ class StyleTextEditor(QWidget):
         # 获取选中文字的样式
         selected_style = None
         selected_style_data = None
-        for (start, end), style in self.text_marks.items():
-            if any(i in range(start, end + 1) for i in self.selected_chars):
-                selected_style = style['type']
-                selected_style_data = style
+        for i in sorted(self.selected_chars):
+            hits = self.text_marks.at(i)
+            if hits:
+                selected_style_data = hits[0][1]
+                selected_style = selected_style_data['type']
                 break
 
         # 更新控制面板的值
@@ -426,10 +433,7 @@ class StyleTextEditor(QWidget):
         end = cursor.selectionEnd() - 1
         
         # 移除包含选中文字的样式
-        marks_to_remove = []
-        for (style_start, style_end), style in self.text_marks.items():
-            if (start <= style_end and end >= style_start):
-                marks_to_remove.append((style_start, style_end))
+        marks_to_remove = [key for key, _ in self.text_marks.overlapping(start, end)]
         
         for mark in marks_to_remove:
             del self.text_marks[mark]
@@ -455,9 +459,19 @@ class StyleTextEditor(QWidget):
     def set_content(self, content):
         """设置内容和样式标记"""
         self.text_edit.setPlainText(content.get('text', ''))
-        self.text_marks = content.get('marks', {})
+        self.text_marks = MarkStore.coerce(content.get('marks', {}))
         self.font_size = content.get('font_size', 48)
         self.font_bold = content.get('font_bold', False)
+        self.font_size_spin.blockSignals(True)
+        self.font_size_spin.setValue(self.font_size)
+        self.font_size_spin.blockSignals(False)
+        self.bold_checkbox.blockSignals(True)
+        self.bold_checkbox.setChecked(self.font_bold)
+        self.bold_checkbox.blockSignals(False)
+        if 'char_spacing' in content:
+            self.char_spacing_spin.setValue(content['char_spacing'])
+        if 'line_spacing' in content:
+            self.line_spacing_spin.setValue(content['line_spacing'])
         self.update_text_edit_font()
         self.update_all_char_buttons()
 
@@ -496,15 +510,11 @@ class StyleTextEditor(QWidget):
         end = cursor.selectionEnd() - 1
         
         # 更新或创建椭圆样式
-        style_key = None
-        for (s, e) in self.text_marks.keys():
-            if start <= e and end >= s:
-                style_key = (s, e)
-                break
+        hit = self.text_marks.first_overlapping(start, end)
         
-        if style_key:
-            # 更新现有样式
-            self.text_marks[style_key].update({
+        if hit:
+            # 更新现有样式（直接修改命中的样式，同一区间可能有多个标记）
+            hit[1].update({
                 'position': self.position_spin.value(),
                 'size': self.size_spin.value(),
                 'width': self.width_spin.value(),
@@ -561,15 +571,11 @@ class StyleTextEditor(QWidget):
         end = cursor.selectionEnd() - 1
         
         # 更新或创建下划线样式
-        style_key = None
-        for (s, e) in self.text_marks.keys():
-            if start <= e and end >= s:
-                style_key = (s, e)
-                break
+        hit = self.text_marks.first_overlapping(start, end)
         
-        if style_key:
-            # 更新现有样式
-            self.text_marks[style_key].update({
+        if hit:
+            # 更新现有样式（直接修改命中的样式，同一区间可能有多个标记）
+            hit[1].update({
                 'width': self.underline_width_spin.value(),
                 'color': self.underline_current_color,
                 'offset': self.underline_offset_spin.value()
@@ -596,42 +602,39 @@ class StyleTextEditor(QWidget):
             end = cursor.selectionEnd() - 1
             
             # 查找选中文字的样式
-            found_style = False
-            for (style_start, style_end), style in self.text_marks.items():
-                if (start <= style_end and end >= style_start):
-                    found_style = True
-                    # 更新控制面板的值
-                    if style['type'] == 'ellipse':
-                        # 启用椭圆控制面板
-                        for widget in self.ellipse_control.findChildren((QSpinBox, QPushButton)):
-                            widget.setEnabled(True)
-                        # 禁用下划线控制面板
-                        for widget in self.underline_control.findChildren((QSpinBox, QPushButton)):
-                            widget.setEnabled(False)
-                        
-                        # 更新椭圆控制值
-                        self.position_spin.setValue(style.get('position', 0))
-                        self.size_spin.setValue(style.get('size', 10))
-                        self.width_spin.setValue(style.get('width', 2))
-                        self.current_color = style.get('color', '#000000')
-                        self.update_color_button()
-                        
-                    elif style['type'] == 'underline':
-                        # 启用下划线控制面板
-                        for widget in self.underline_control.findChildren((QSpinBox, QPushButton)):
-                            widget.setEnabled(True)
-                        # 禁用椭圆控制面板
-                        for widget in self.ellipse_control.findChildren((QSpinBox, QPushButton)):
-                            widget.setEnabled(False)
-                        
-                        # 更新下划线控制值
-                        self.underline_width_spin.setValue(style.get('width', 2))
-                        self.underline_offset_spin.setValue(style.get('offset', 5))
-                        self.underline_current_color = style.get('color', '#000000')
-                        self.update_underline_color_button()
-                    break
-            
-            if not found_style:
+            hit = self.text_marks.first_overlapping(start, end)
+            if hit:
+                style = hit[1]
+                # 更新控制面板的值
+                if style['type'] == 'ellipse':
+                    # 启用椭圆控制面板
+                    for widget in self.ellipse_control.findChildren((QSpinBox, QPushButton)):
+                        widget.setEnabled(True)
+                    # 禁用下划线控制面板
+                    for widget in self.underline_control.findChildren((QSpinBox, QPushButton)):
+                        widget.setEnabled(False)
+                
+                    # 更新椭圆控制值
+                    self.position_spin.setValue(style.get('position', 0))
+                    self.size_spin.setValue(style.get('size', 10))
+                    self.width_spin.setValue(style.get('width', 2))
+                    self.current_color = style.get('color', '#000000')
+                    self.update_color_button()
+                
+                elif style['type'] == 'underline':
+                    # 启用下划线控制面板
+                    for widget in self.underline_control.findChildren((QSpinBox, QPushButton)):
+                        widget.setEnabled(True)
+                    # 禁用椭圆控制面板
+                    for widget in self.ellipse_control.findChildren((QSpinBox, QPushButton)):
+                        widget.setEnabled(False)
+                
+                    # 更新下划线控制值
+                    self.underline_width_spin.setValue(style.get('width', 2))
+                    self.underline_offset_spin.setValue(style.get('offset', 5))
+                    self.underline_current_color = style.get('color', '#000000')
+                    self.update_underline_color_button()
+            else:
                 # 如果选中的文字没有样式，启用所有控制面板
                 for widget in self.ellipse_control.findChildren((QSpinBox, QPushButton)):
                     widget.setEnabled(True)
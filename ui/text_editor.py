@@ -1,18 +1,23 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QTextEdit, QPushButton, 
                            QHBoxLayout, QComboBox, QLabel, QSpinBox, QScrollArea)
 from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QTextCursor
 import logging
-import os
-from datetime import datetime
-import sys
+from core.document_model import DocumentModel
 
 class TextBlock(QWidget):
     deleted = pyqtSignal(object)  # 删除信号
+    polish_requested = pyqtSignal(object)  # AI 润色（润色中再次点击为停止）
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.block_id = None  # 对应 DocumentModel 中的文本块
         self.init_ui()
 
+    @property
+    def block_type(self):
+        return 'title' if self.type_combo.currentText() == "标题" else 'content'
+
     def init_ui(self):
         layout = QHBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -52,6 +57,26 @@ class TextBlock(QWidget):
         """)
         editor_layout.addWidget(self.editor)
 
+        # AI 润色按钮
+        self.polish_button = QPushButton("AI")
+        self.polish_button.setFixedSize(28, 20)
+        self.polish_button.setToolTip("AI 润色这个文本块")
+        self.polish_button.clicked.connect(lambda: self.polish_requested.emit(self))
+        self.polish_button.setStyleSheet("""
+            QPushButton {
+                background-color: #4096FF;
+                color: white;
+                border: none;
+                border-radius: 6px;
+                font-size: 11px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #69B1FF;
+            }
+        """)
+        editor_layout.addWidget(self.polish_button)
+
         # 删除按钮
         delete_button = QPushButton("X")
         delete_button.setFixedSize(20, 20)  # 设置固定大小
@@ -118,6 +143,19 @@ class TextBlock(QWidget):
                 }
             """)
 
+    def set_streaming(self, streaming):
+        """润色期间编辑框只读，按钮变为停止"""
+        self.editor.setReadOnly(streaming)
+        self.polish_button.setText("停" if streaming else "AI")
+        self.polish_button.setToolTip("停止润色并恢复原文" if streaming else "AI 润色这个文本块")
+
+    def append_text(self, text):
+        """在末尾追加文字（用于流式显示润色结果）"""
+        cursor = self.editor.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+        self.editor.setTextCursor(cursor)
+
     def get_content(self):
         """获取文本内容，保留用户手动输入的换行符和前导空格"""
         # 获取原始文本内容
@@ -161,24 +199,21 @@ class TextBlock(QWidget):
 
 class TextEditor(QWidget):
     content_changed = pyqtSignal()  # 内容变化信号
+    block_polished = pyqtSignal(int, str)  # 润色结果写回文本块 (block_id, 文本)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.text_blocks = []
+        # 文档模型持有所有文本块的内容，编辑时增量更新，生成时不再逐个读取编辑框
+        self.document = DocumentModel()
+        self.ai_helper = None     # 由主窗口设置，用于 AI 润色
+        self.async_bridge = None  # 由主窗口设置，AI 请求在其事件循环中运行
+        self.streams = {}         # block_id -> (Future, 润色前的原文, 标记)
+        self.logger = logging.getLogger('TextEditor')
         self.init_ui()
-        # 添加一个默认的标题文本块
-        first_block = TextBlock()
-        first_block.deleted.connect(self.remove_text_block)
-        first_block.type_combo.setCurrentText("标题")  # 设置第一个文本块为标题类型
-        self.text_blocks.append(first_block)
-        self.blocks_layout.addWidget(first_block)
-
-        # 添加一个默认的内容文本块
-        second_block = TextBlock()
-        second_block.deleted.connect(self.remove_text_block)
-        second_block.type_combo.setCurrentText("内容")  # 设置第二个文本块为内容类型
-        self.text_blocks.append(second_block)
-        self.blocks_layout.addWidget(second_block)
+        # 添加一个默认的标题文本块和一个默认的内容文本块
+        self.create_text_block('title')
+        self.create_text_block('content')
 
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -231,6 +266,11 @@ class TextEditor(QWidget):
         
         # 将参数控制面板添加到主布局
         layout.addWidget(params_control)
+        
+        # 字号和行间距变化时同步到文档模型
+        self.title_font_spin.valueChanged.connect(self.on_font_size_changed)
+        self.content_font_spin.valueChanged.connect(self.on_font_size_changed)
+        self.line_spacing_spin.valueChanged.connect(self.on_line_spacing_changed)
 
         # 创建一个包含文本块和按钮的容器
         content_container = QWidget()
@@ -271,112 +311,185 @@ class TextEditor(QWidget):
         # 将内容容器添加到主布局
         layout.addWidget(content_container)
 
-    def add_text_block(self):
-        """添加新的文本块"""
+    def font_size_for(self, block_type):
+        """获取指定类型文本块的字号"""
+        if block_type == 'title':
+            return self.title_font_spin.value()
+        return self.content_font_spin.value()
+
+    def create_text_block(self, block_type, text='', block_id=None):
+        """
+        创建文本块控件并绑定到文档模型
+
+        参数:
+            block_type (str): 'title' 或 'content'
+            text (str): 初始文本
+            block_id (int): 已存在于文档模型中的编号，为 None 时新建
+        """
         text_block = TextBlock()
+        text_block.type_combo.setCurrentText("标题" if block_type == 'title' else "内容")
+        if text:
+            text_block.editor.setPlainText(text)
+
+        if block_id is None:
+            block_id = self.document.add_block(
+                block_type, text, self.line_spacing_spin.value(), self.font_size_for(block_type))
+        text_block.block_id = block_id
+
         text_block.deleted.connect(self.remove_text_block)
-        text_block.type_combo.setCurrentText("内容")  # 新增的文本块默认为内容类型
+        text_block.polish_requested.connect(self.on_polish_requested)
+        text_block.editor.textChanged.connect(lambda: self.on_block_text_changed(text_block))
+        text_block.type_combo.currentTextChanged.connect(lambda _: self.on_block_type_changed(text_block))
+
         self.text_blocks.append(text_block)
         self.blocks_layout.addWidget(text_block)
+        return text_block
+
+    def on_block_text_changed(self, text_block):
+        """只更新被编辑的文本块"""
+        self.document.set_text(text_block.block_id, text_block.editor.toPlainText())
+
+    def on_block_type_changed(self, text_block):
+        block_type = text_block.block_type
+        self.document.update_block(text_block.block_id, type=block_type,
+                                   font_size=self.font_size_for(block_type))
+
+    def on_font_size_changed(self, _value):
+        for block in self.document.blocks():
+            self.document.set_font_size(block.block_id, self.font_size_for(block.type))
+
+    def on_line_spacing_changed(self, value):
+        for block in self.document.blocks():
+            self.document.set_line_spacing(block.block_id, value)
+
+    def on_polish_requested(self, text_block):
+        """流式润色文本块：生成的文字边到达边显示，润色中再次点击则停止并恢复原文"""
+        if text_block.block_id in self.streams:
+            self.streams[text_block.block_id][0].cancel()
+            return
+
+        original = text_block.editor.toPlainText()
+        if self.ai_helper is None or self.async_bridge is None or not original.strip():
+            return
+
+        # 每次润色一个标记，取消后迟到的结果不会写入文本块
+        token = object()
+        text_block.set_streaming(True)
+        text_block.editor.clear()
+        future = self.async_bridge.submit(
+            self.stream_polish(text_block, token, original),
+            on_done=lambda _: self.on_stream_done(text_block, token, True, ''),
+            on_error=lambda e: self.on_stream_done(text_block, token, False, str(e) or type(e).__name__),
+            on_cancel=lambda: self.on_stream_done(text_block, token, False, '')
+        )
+        self.streams[text_block.block_id] = (future, original, token)
+
+    async def stream_polish(self, text_block, token, original):
+        """在事件循环中读取流式结果，逐段送回界面线程"""
+        async for delta in self.ai_helper.stream_polish(original):
+            self.async_bridge.call_in_ui(self.on_stream_delta, text_block, token, delta)
+
+    def is_streaming(self, text_block, token):
+        entry = self.streams.get(text_block.block_id)
+        return entry is not None and entry[2] is token
+
+    def on_stream_delta(self, text_block, token, delta):
+        if self.is_streaming(text_block, token):
+            text_block.append_text(delta)
+
+    def on_stream_done(self, text_block, token, completed, error):
+        """润色结束：未完整生成（取消或出错）时恢复原文"""
+        if not self.is_streaming(text_block, token):
+            return
+        _, original, _ = self.streams.pop(text_block.block_id)
+        text_block.set_streaming(False)
+        if not completed:
+            text_block.editor.setPlainText(original)
+            if error:
+                self.logger.error(f"AI润色失败: {error}")
+        else:
+            self.block_polished.emit(text_block.block_id, self.document.get(text_block.block_id).text)
+        self.content_changed.emit()
+
+    def cancel_stream(self, text_block):
+        """取消文本块的润色，不再更新该文本块（用于删除文本块）"""
+        entry = self.streams.pop(text_block.block_id, None)
+        if entry is not None:
+            entry[0].cancel()
+
+    def cancel_streams(self):
+        for text_block in list(self.text_blocks):
+            self.cancel_stream(text_block)
+
+    def apply_polished(self, originals, polished):
+        """
+        把整篇润色的结果写回文本块
+
+        参数:
+            originals (dict): block_id -> 提交润色时文档模型中的文本
+            polished (dict): block_id -> 润色结果
+
+        返回:
+            int: 更新的文本块数（润色期间被修改或删除的文本块保持不变）
+        """
+        updated = 0
+        for text_block in self.text_blocks:
+            block_id = text_block.block_id
+            if block_id not in polished or block_id in self.streams:
+                continue
+            block = self.document.get(block_id)
+            if block is None or block.text != originals[block_id] or polished[block_id] == originals[block_id]:
+                continue
+            text_block.editor.setPlainText(polished[block_id])
+            self.block_polished.emit(block_id, self.document.get(block_id).text)
+            updated += 1
+        if updated:
+            self.content_changed.emit()
+        return updated
+
+    def add_text_block(self):
+        """添加新的文本块"""
+        self.create_text_block('content')  # 新增的文本块默认为内容类型
         self.content_changed.emit()
 
     def remove_text_block(self, block):
         if len(self.text_blocks) > 1:  # 保持至少一个文本块
+            self.cancel_stream(block)
             self.text_blocks.remove(block)
+            self.document.remove_block(block.block_id)
             block.deleteLater()
             self.content_changed.emit()
 
     def get_all_content(self):
-        """获取所有内容，包括行间距和字体大小设置"""
-        content = []
-        
-        # 设置日志
-        logger = logging.getLogger('TextEditor')
-        logger.setLevel(logging.DEBUG)
-        
-        # 检查是否已经有处理器
-        if not logger.handlers:
-            # 创建logs目录
-            if not os.path.exists('logs'):
-                os.makedirs('logs')
-            
-            # 生成日志文件名，包含时间戳
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            log_file = os.path.join('logs', f'text_editor_{timestamp}.log')
-            
-            # 添加文件处理器
-            file_handler = logging.FileHandler(log_file, encoding='utf-8')
-            file_handler.setLevel(logging.DEBUG)
-            
-            # 添加控制台处理器
-            console_handler = logging.StreamHandler(sys.stdout)
-            console_handler.setLevel(logging.DEBUG)
-            
-            # 设置日志格式
-            formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-            file_handler.setFormatter(formatter)
-            console_handler.setFormatter(formatter)
-            
-            logger.addHandler(file_handler)
-            logger.addHandler(console_handler)
-        
-        logger.info("=== 开始获取文本内容 ===")
-        
-        for i, block in enumerate(self.text_blocks):
-            logger.info(f"\n处理文本块 {i+1}:")
-            
-            # 获取原始文本内容
-            raw_text = block.editor.toPlainText()
-            logger.info(f"原始文本内容: {repr(raw_text)}")
-            
-            # 统一换行符为 \n
-            text = raw_text.replace('\r\n', '\n').replace('\r', '\n')
-            
-            # 处理每一行
-            lines = text.split('\n')
-            logger.info(f"分割后的行数: {len(lines)}")
-            for j, line in enumerate(lines):
-                logger.info(f"  行 {j+1}: {repr(line)}")
-                logger.info(f"  行 {j+1} 长度: {len(line)}")
-                logger.info(f"  行 {j+1} 前导空格数: {len(line) - len(line.lstrip())}")
-            
-            # 保留原始文本，包括前导空格，只去掉尾部空格
-            text = '\n'.join(line.rstrip() for line in lines)
-            logger.info(f"处理后的文本: {repr(text)}")
-            
-            item = {
-                'type': 'title' if block.type_combo.currentText() == "标题" else 'content',
-                'text': text,
-                'line_spacing': self.line_spacing_spin.value()
-            }
-            
-            if item['type'] == 'title':
-                item['font_size'] = self.title_font_spin.value()
-            else:
-                item['font_size'] = self.content_font_spin.value()
-            
-            if text.strip():  # 只添加非空内容
-                content.append(item)
-                logger.info("文本块已添加到内容列表")
-            else:
-                logger.info("跳过空文本块")
-        
-        logger.info(f"\n=== 文本内容获取完成，共 {len(content)} 个内容块 ===")
+        """
+        获取所有非空内容块，包括行间距和字体大小设置
+
+        返回:
+            list: 内容字典，带 block_id 和 version，未修改的文本块返回同一个对象
+        """
+        content = self.document.items()
+        self.logger.debug(f"获取文本内容，共 {len(content)} 个内容块（文档版本 {self.document.revision}）")
         return content
 
     def set_all_content(self, content_list):
         # 清除现有的文本块
+        self.cancel_streams()
         while self.text_blocks:
             block = self.text_blocks.pop()
             block.deleteLater()
 
-        # 添加新的文本块
-        for content in content_list:
-            text_block = TextBlock()
-            text_block.set_content(content)
-            text_block.deleted.connect(self.remove_text_block)
-            self.text_blocks.append(text_block)
-            self.blocks_layout.addWidget(text_block)
+        # 替换文档内容后添加新的文本块
+        line_spacing = self.line_spacing_spin.value()
+        blocks = [{
+            'block_id': content.get('block_id'),
+            'type': 'title' if content.get('type') == 'title' else 'content',
+            'text': content.get('text', ''),
+            'line_spacing': line_spacing,
+            'font_size': self.font_size_for('title' if content.get('type') == 'title' else 'content')
+        } for content in content_list]
+        block_ids = self.document.reset(blocks)
+        for data, block_id in zip(blocks, block_ids):
+            self.create_text_block(data['type'], data['text'], block_id)
 
         # 如果没有内容，添加一个默认的文本块
         if not content_list:
@@ -384,6 +497,23 @@ class TextEditor(QWidget):
 
         self.content_changed.emit()
 
+    def get_editor_settings(self):
+        """获取字号和行间距设置"""
+        return {
+            'title_font_size': self.title_font_spin.value(),
+            'content_font_size': self.content_font_spin.value(),
+            'line_spacing': self.line_spacing_spin.value()
+        }
+
+    def set_editor_settings(self, settings):
+        """恢复字号和行间距设置"""
+        if 'title_font_size' in settings:
+            self.title_font_spin.setValue(settings['title_font_size'])
+        if 'content_font_size' in settings:
+            self.content_font_spin.setValue(settings['content_font_size'])
+        if 'line_spacing' in settings:
+            self.line_spacing_spin.setValue(settings['line_spacing'])
+
     def clear(self):
         """清除所有文本块并添加一个空的"""
-        self.set_all_content([])
\ No newline at end of file
+        self.set_all_content([])
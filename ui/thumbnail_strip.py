@@ -0,0 +1,190 @@
+from collections import OrderedDict
+
+from PyQt6.QtWidgets import QListView, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, QTimer, pyqtSignal
+from PyQt6.QtGui import QPixmap, QColor
+
+from core.output_profiles import OutputProfile
+
+try:
+    from .qt_image import pil_to_qpixmap
+except ImportError:
+    from ui.qt_image import pil_to_qpixmap
+
+# 缩略图按这个尺寸直接光栅化，不先生成整页图片再缩小
+THUMBNAIL_PROFILE = OutputProfile('thumbnail', '缩略图', 120, 160)
+
+
+class ThumbnailModel(QAbstractListModel):
+    """
+    缩略图数据模型
+
+    每页由 (指纹, 渲染函数) 描述，渲染函数返回缩略图尺寸的 PIL 图片。
+    视图绘制某一页时才请求它的缩略图，未渲染时先显示占位图并加入待渲染队列；
+    渲染结果按指纹缓存，内容更新后只有指纹变化的页面需要重新渲染。
+    """
+    thumbnail_requested = pyqtSignal()
+
+    def __init__(self, parent=None, cache_size=200):
+        super().__init__(parent)
+        self.pages = []                 # [(指纹, 渲染函数)]
+        self.cache = OrderedDict()      # 指纹 -> QPixmap（最近使用的在最后）
+        self.cache_size = cache_size
+        self.pending = OrderedDict()    # 待渲染的行（有序集合）
+        self.rendered_count = 0         # 实际渲染的缩略图数量
+
+        self.placeholder = QPixmap(THUMBNAIL_PROFILE.width, THUMBNAIL_PROFILE.height)
+        self.placeholder.fill(QColor('#F0F0F0'))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.pages)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.pages):
+            return None
+        row = index.row()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{row + 1}"
+        if role == Qt.ItemDataRole.DecorationRole:
+            fingerprint = self.pages[row][0]
+            pixmap = self.cache.get(fingerprint)
+            if pixmap is not None:
+                self.cache.move_to_end(fingerprint)
+                return pixmap
+            if row not in self.pending:
+                self.pending[row] = None
+                self.thumbnail_requested.emit()
+            return self.placeholder
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def set_pages(self, pages):
+        """
+        更新页面列表
+
+        参数:
+            pages (list): [(指纹, 渲染函数)]
+
+        功能:
+            - 只通知指纹变化的行和增减的行，不重置整个列表（保留滚动位置）
+            - 缓存按指纹保存，页面顺序变化时已渲染的缩略图仍可使用
+        """
+        old_count = len(self.pages)
+        new_count = len(pages)
+        self.pending.clear()
+
+        if new_count < old_count:
+            self.beginRemoveRows(QModelIndex(), new_count, old_count - 1)
+            self.pages = self.pages[:new_count]
+            self.endRemoveRows()
+
+        changed = [row for row in range(min(old_count, new_count)) if self.pages[row][0] != pages[row][0]]
+        common = min(old_count, new_count)
+        self.pages[:common] = pages[:common]
+        for row in changed:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+        if new_count > old_count:
+            self.beginInsertRows(QModelIndex(), old_count, new_count - 1)
+            self.pages.extend(pages[old_count:])
+            self.endInsertRows()
+
+    def take_pending(self):
+        """取出所有待渲染的行"""
+        rows = list(self.pending)
+        self.pending.clear()
+        return rows
+
+    def render_row(self, row):
+        """渲染一行的缩略图并通知视图刷新"""
+        if row >= len(self.pages):
+            return
+        fingerprint, render = self.pages[row]
+        if fingerprint not in self.cache:
+            self.cache[fingerprint] = pil_to_qpixmap(render())
+            self.rendered_count += 1
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+
+class ThumbnailStrip(QListView):
+    """
+    横向的页面缩略图条
+
+    只渲染滚动到可见范围内的页面（列表视图只为可见的行请求图标），
+    每次空闲时渲染一张，渲染期间界面仍可响应。
+    """
+    page_selected = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.thumbnail_model = ThumbnailModel(self)
+        self.setModel(self.thumbnail_model)
+
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(False)
+        self.setMovement(QListView.Movement.Static)
+        self.setUniformItemSizes(True)  # 不需要为每一行计算尺寸
+        self.setIconSize(QSize(THUMBNAIL_PROFILE.width, THUMBNAIL_PROFILE.height))
+        self.setSpacing(6)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setFixedHeight(THUMBNAIL_PROFILE.height + 60)
+
+        self.render_timer = QTimer(self)
+        self.render_timer.setInterval(0)
+        self.render_timer.timeout.connect(self.render_next)
+        self.thumbnail_model.thumbnail_requested.connect(self.render_timer.start)
+
+        self.selectionModel().currentChanged.connect(self.on_current_changed)
+        self._updating_current = False
+
+    def set_pages(self, pages):
+        """设置页面列表 [(指纹, 渲染函数)]"""
+        self.thumbnail_model.set_pages(pages)
+        self.viewport().update()
+
+    def clear(self):
+        self.thumbnail_model.set_pages([])
+
+    def set_current(self, row):
+        """选中并滚动到指定页（不触发 page_selected）"""
+        if row >= self.thumbnail_model.rowCount():
+            return
+        self._updating_current = True
+        try:
+            index = self.thumbnail_model.index(row)
+            self.setCurrentIndex(index)
+            self.scrollTo(index)
+        finally:
+            self._updating_current = False
+
+    def on_current_changed(self, current, previous):
+        if current.isValid() and not self._updating_current:
+            self.page_selected.emit(current.row())
+
+    def is_row_visible(self, row):
+        return self.visualRect(self.thumbnail_model.index(row)).intersects(self.viewport().rect())
+
+    def render_next(self):
+        """渲染一张仍然可见的缩略图；已滚出可见范围的行丢弃，重新滚动到时会再次请求"""
+        rows = [row for row in self.thumbnail_model.take_pending() if self.is_row_visible(row)]
+        if not rows:
+            self.render_timer.stop()
+            return
+
+        try:
+            self.thumbnail_model.render_row(rows[0])
+        except Exception as e:
+            print(f"生成第 {rows[0] + 1} 页缩略图失败: {str(e)}")
+
+        for row in rows[1:]:
+            self.thumbnail_model.pending[row] = None
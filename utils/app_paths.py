@@ -0,0 +1,24 @@
+import os
+import sys
+
+APP_NAME = '小红书文字转图片工具'
+
+
+def get_cache_dir():
+    """
+    获取应用缓存目录（不存在时创建）
+    - macOS: ~/Library/Caches/<应用名>
+    - Windows: %LOCALAPPDATA%\\<应用名>\\cache
+    - Linux: $XDG_CACHE_HOME/<应用名>，默认 ~/.cache/<应用名>
+    """
+    if sys.platform == 'darwin':
+        cache_dir = os.path.expanduser(os.path.join('~/Library/Caches', APP_NAME))
+    elif sys.platform == 'win32':
+        base = os.getenv('LOCALAPPDATA') or os.getenv('APPDATA') or os.path.expanduser('~')
+        cache_dir = os.path.join(base, APP_NAME, 'cache')
+    else:
+        base = os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+        cache_dir = os.path.join(base, APP_NAME)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir